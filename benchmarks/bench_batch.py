@@ -0,0 +1,102 @@
+"""
+Records/second of birthchart.batch.compute_charts against the per-chart
+path the app takes for each Generate, and of the batch current dasha
+lookup against one chart at a time.
+
+    python benchmarks/bench_batch.py [N]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import swisseph as swe
+
+from birthchart import dasha
+from birthchart.batch import PLANETS, compute_charts
+from birthchart.chart import generate_birth_chart, get_sign_and_abs, sidereal_positions
+from birthchart.panchanga import compute_karana, compute_yoga
+
+CITIES = [
+    (17.3850, 78.4867, "Asia/Kolkata"),
+    (16.5062, 80.6480, "Asia/Kolkata"),
+    (40.7128, -74.0060, "America/New_York"),
+    (51.5074, -0.1278, "Europe/London"),
+]
+
+
+def make_records(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime(1900, 1, 2)
+    return [(start + timedelta(seconds=rng.randrange(200 * 365 * 86400)),) + rng.choice(CITIES)
+            for _ in range(n)]
+
+
+def per_chart(records, full):
+    """The app's on_generate computation, one record at a time."""
+    from zoneinfo import ZoneInfo
+
+    out = []
+    for local, lat, lon, tz in records:
+        utc_offset = local.replace(tzinfo=ZoneInfo(tz)).utcoffset().total_seconds() / 3600
+        jd_ut = swe.julday(local.year, local.month, local.day,
+                           local.hour + local.minute / 60 + local.second / 3600, swe.GREG_CAL) - utc_offset / 24
+        positions = sidereal_positions(jd_ut, lat, lon)
+        if full:
+            out.append(generate_birth_chart("x", local.strftime("%Y-%m-%d"), local.strftime("%H:%M:%S"),
+                                            tz, lat, lon, utc_offset, jd_ut, positions, tz))
+        else:
+            signs = [get_sign_and_abs(positions[p])[2] for p in PLANETS]
+            out.append((signs, compute_yoga(positions["Moon"], positions["Sun"]),
+                        compute_karana(positions["Moon"], positions["Sun"])))
+    return out
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = make_records(n)
+
+    compute_charts(records[:10])      # map the tables before timing
+    batch, t_batch = timed(compute_charts, records)
+    m = min(n, 2000)
+    _, t_single = timed(per_chart, records[:m], False)
+    _, t_full = timed(per_chart, records[:m // 10], True)
+
+    print(f"records: {n}")
+    print(f"compute_charts                 {n / t_batch:12,.0f} records/s")
+    print(f"per-chart positions + classify {m / t_single:12,.0f} records/s")
+    print(f"per-chart generate_birth_chart {(m // 10) / t_full:12,.0f} records/s (includes end-time solves)")
+
+    # Spot-check the vectorized classification against the per-chart one.
+    check = per_chart(records[:200], False)
+    zodiac = ["Ar", "Ta", "Ge", "Cn", "Le", "Vi", "Li", "Sc", "Sg", "Cp", "Aq", "Pi"]
+    mismatches = sum(
+        [zodiac[s] for s in batch["signs"][i]] != signs for i, (signs, _, _) in enumerate(check))
+    print(f"sign mismatches in first 200: {mismatches}")
+
+    # Pratyantardasha running at each chart's 40th birthday
+    moon, jd_birth = batch["longitudes"][:, 1], batch["jd_ut"]
+    jd = jd_birth + 40 * dasha.YEAR_DAYS
+    dashas, t_dasha = timed(dasha.current_dashas, moon, jd_birth, jd)
+    single, t_loop = timed(lambda: [dasha.current(*args) for args in zip(moon[:m].tolist(), jd_birth[:m].tolist(),
+                                                                          jd[:m].tolist())])
+    print(f"current_dashas                 {n / t_dasha:12,.0f} records/s")
+    print(f"per-chart dasha.current        {m / t_loop:12,.0f} records/s")
+    mismatches = sum(tuple(dasha.LORDS[i] for i in dashas["lords"][r]) != periods[-1].lords
+                     for r, periods in enumerate(single))
+    print(f"dasha mismatches in first {m}: {mismatches}")
+    return 0 if np.all(batch["signs"] >= 0) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Chart history at scale: fills a ChartHistory with synthetic charts and
+times reopening and searching against computing a chart from scratch.
+
+    python benchmarks/bench_history.py                 # 100k charts in a temporary database
+    python benchmarks/bench_history.py -n 500000 --db history.sqlite
+
+The stored charts are a small computed corpus under many random names, so
+filling is quick. Reports the insert rate, the database size, and the
+median and p99 time of get(key), load(id), a name-prefix search, recent()
+and a whole compute_chart() with a ChartMemo backed by the history, next
+to compute_chart() with the city lookup stubbed and nothing stored.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_corpus
+from birthchart.chart import ChartMemo, ChartResult, compute_chart
+from birthchart.history import ChartHistory
+
+FIRST_NAMES = ("Aarav", "Anjali", "Bhavana", "Chandra", "Deepak", "Gayatri", "Hari", "Indira", "Kiran",
+               "Lakshmi", "Madhav", "Nandini", "Pranav", "Radha", "Ravi", "Sita", "Srinivas", "Uma",
+               "Venkat", "Yamini")
+SURNAMES = ("Rao", "Reddy", "Sharma", "Naidu", "Iyer", "Varma", "Sastry", "Murthy", "Kumar", "Devi")
+
+
+def synthetic_results(births, n, seed):
+    """``n`` ChartResults: the computed corpus charts under random names."""
+    rng = random.Random(seed)
+    records = []
+    for b in births:
+        lookup = lambda city, b=b: (b.lat, b.lon, b.utc_offset, b.tz)
+        records.append(compute_chart(b.name, b.dob, b.tob, b.city, lookup).pack())
+    for i in range(n):
+        result = ChartResult.unpack(rng.choice(records))
+        result.name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)} {i}"
+        yield result
+
+
+def timed(fn, args_list):
+    """(median, p99) seconds of fn(*args) over ``args_list``."""
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.99))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=100_000, help="stored charts (default 100000)")
+    parser.add_argument("--queries", type=int, default=2000, help="timed lookups per operation")
+    parser.add_argument("--db", help="database path (default: a temporary file)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = os.path.join(tmp.name, "history.sqlite")
+    history = ChartHistory(args.db)
+    births = make_corpus(200, args.seed)
+
+    start = time.perf_counter()
+    stored = history.put_many(synthetic_results(births, args.n, args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"stored {stored} charts in {elapsed:.1f} s ({stored / elapsed:,.0f}/s), "
+          f"{len(history)} in the database, {os.path.getsize(args.db) / 2**20:.1f} MiB")
+
+    rng = random.Random(args.seed + 1)
+    ids = [(rng.randint(1, len(history)),) for _ in range(args.queries)]
+    keys = [(history.load(i).key,) for (i,) in ids]
+    prefixes = [(rng.choice(FIRST_NAMES)[:rng.randint(1, 4)],) for _ in range(args.queries)]
+    reopen = [(key.name, key.dob, key.tob, key.place) for (key,) in keys]
+
+    def stub(city):
+        raise AssertionError("history miss")
+
+    memo = ChartMemo(max_entries=1, store=history)
+    rows = [
+        ("get(key)", history.get, keys),
+        ("load(id)", history.load, ids),
+        ("search(prefix)", history.search, prefixes),
+        ("recent()", history.recent, [()] * args.queries),
+        ("compute_chart, stored", lambda *a: compute_chart(*a, stub, memo=memo), reopen),
+    ]
+    fresh = [(b.name, b.dob, b.tob, b.city, lambda city, b=b: (b.lat, b.lon, b.utc_offset, b.tz))
+             for b in births]
+    rows.append(("compute_chart, computed", compute_chart, fresh))
+
+    print(f"\n{'operation':<26}{'p50 us':>10}{'p99 us':>10}")
+    for name, fn, args_list in rows:
+        p50, p99 = timed(fn, args_list)
+        print(f"{name:<26}{p50 * 1e6:>10.0f}{p99 * 1e6:>10.0f}")
+    print(f"\nmemo: {memo.stats}")
+
+    history.close()
+    if tmp is not None:
+        tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
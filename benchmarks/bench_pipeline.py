@@ -0,0 +1,272 @@
+"""
+Hot paths of the chart pipeline over a fixed corpus of random births
+(1900-2100), fully offline: city lookup is stubbed and PDFs are drawn to
+memory.
+
+    python benchmarks/bench_pipeline.py                      # report
+    python benchmarks/bench_pipeline.py --save base.json     # ... and save a baseline
+    python benchmarks/bench_pipeline.py --compare base.json  # ... and diff against it
+
+For each benchmark: ops/s (best of --repeat timed passes), Swiss Ephemeris
+and Chebyshev-table calls per op (from a separate counting pass), and the
+peak traced allocation of one pass over the corpus. --compare exits 1 if
+any benchmark got more than --tolerance slower or makes more ephemeris
+calls; the call counts are exact, so they are the steadier signal on a
+busy machine.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import swisseph as swe
+
+from birthchart import chebyshev
+from birthchart.chart import compute_chart, get_sign_and_abs, julian_day_ut, sidereal_positions
+from birthchart.panchanga import (
+    compute_nakshatra, compute_tithi, current_karana_yoga_end, get_tithi_transitions,
+)
+
+CITIES = [
+    ("Hyderabad", 17.3850, 78.4867, "Asia/Kolkata"),
+    ("Vijayawada", 16.5062, 80.6480, "Asia/Kolkata"),
+    ("New York", 40.7128, -74.0060, "America/New_York"),
+    ("London", 51.5074, -0.1278, "Europe/London"),
+    ("Sydney", -33.8688, 151.2093, "Australia/Sydney"),
+]
+
+MIN_PASS_SECONDS = 0.2
+
+# Swiss Ephemeris entry points the pipeline uses; counted in the counting pass
+EPHEMERIS_CALLS = ("calc_ut", "calc", "get_ayanamsa", "get_ayanamsa_ut", "houses", "houses_ex", "rise_trans")
+
+
+class Birth:
+    """One corpus entry with everything the benchmarks need precomputed."""
+
+    __slots__ = ("name", "dob", "tob", "city", "lat", "lon", "tz", "utc_offset", "jd_ut", "positions", "local")
+
+    def __init__(self, local, city, lat, lon, tz):
+        from zoneinfo import ZoneInfo
+
+        self.name = "Bench"
+        self.local = local
+        self.dob = local.strftime("%Y-%m-%d")
+        self.tob = local.strftime("%H:%M:%S")
+        self.city, self.lat, self.lon, self.tz = city, lat, lon, tz
+        self.utc_offset = local.replace(tzinfo=ZoneInfo(tz)).utcoffset().total_seconds() / 3600
+        self.jd_ut = julian_day_ut(self.dob, self.tob, self.utc_offset)
+        self.positions = sidereal_positions(self.jd_ut, lat, lon)
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime(1900, 1, 2)
+    span = int((datetime(2100, 12, 30) - start).total_seconds())
+    return [Birth(start + timedelta(seconds=rng.randrange(span)), *rng.choice(CITIES)) for _ in range(n)]
+
+
+# --- Benchmarks: each takes one Birth ---
+
+def bench_get_sign_and_abs(b):
+    for lon in b.positions.values():
+        get_sign_and_abs(lon)
+
+
+def bench_compute_nakshatra(b):
+    compute_nakshatra(b.positions["Moon"], b.jd_ut, b.utc_offset)
+
+
+def bench_compute_tithi(b):
+    t = b.local
+    compute_tithi(b.positions["Moon"], b.positions["Sun"], t.year, t.month, t.day,
+                  t.hour, t.minute, t.second, b.utc_offset)
+
+
+def bench_get_tithi_transitions(b):
+    t = b.local
+    get_tithi_transitions(t.year, t.month, t.day, t.hour, t.minute, t.second, b.utc_offset)
+
+
+def bench_current_karana_yoga_end(b):
+    current_karana_yoga_end(None, b.positions, b.jd_ut)
+
+
+def bench_generate_birth_chart(b):
+    # The whole compute_chart pipeline with the city lookup stubbed
+    lookup = lambda city: (b.lat, b.lon, b.utc_offset, b.tz)
+    compute_chart(b.name, b.dob, b.tob, b.city, lookup)
+
+
+def bench_draw_south_indian_chart(b):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    from birthchart import pdf
+
+    c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+    pdf.draw_south_indian_chart(c, pdf.CHART_X, pdf.CHART_Y, pdf.CHART_SIZE, b.positions, b.dob, b.tob)
+    c.showPage()
+    c.save()
+
+
+# name -> (function, share of the corpus it runs over, so the slow ones stay quick)
+BENCHMARKS = {
+    "get_sign_and_abs": (bench_get_sign_and_abs, 1.0),
+    "compute_nakshatra": (bench_compute_nakshatra, 1.0),
+    "compute_tithi": (bench_compute_tithi, 1.0),
+    "get_tithi_transitions": (bench_get_tithi_transitions, 0.25),
+    "current_karana_yoga_end": (bench_current_karana_yoga_end, 1.0),
+    "generate_birth_chart": (bench_generate_birth_chart, 0.5),
+    "draw_south_indian_chart": (bench_draw_south_indian_chart, 0.25),
+}
+
+
+class _CallCounter:
+    """Swap counting wrappers into swisseph and the Chebyshev tables for one pass."""
+
+    def __init__(self):
+        self.ephemeris = 0
+        self.chebyshev = 0
+        self._saved = []
+
+    def _wrap(self, owner, attr, field):
+        original = getattr(owner, attr)
+
+        def counted(*args, **kwargs):
+            setattr(self, field, getattr(self, field) + 1)
+            return original(*args, **kwargs)
+
+        self._saved.append((owner, attr, original))
+        setattr(owner, attr, counted)
+
+    def __enter__(self):
+        for attr in EPHEMERIS_CALLS:
+            if hasattr(swe, attr):
+                self._wrap(swe, attr, "ephemeris")
+        self._wrap(chebyshev.ChebyshevEphemeris, "position", "chebyshev")
+        return self
+
+    def __exit__(self, *exc):
+        for owner, attr, original in reversed(self._saved):
+            setattr(owner, attr, original)
+        self._saved.clear()
+
+
+def run_benchmark(fn, births, repeat):
+    fn(births[0])       # warm imports and caches before timing
+    best = None
+    for _ in range(repeat):
+        # Each timed pass loops over the corpus until MIN_PASS_SECONDS, so short benchmarks aren't all noise
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            for b in births:
+                fn(b)
+            ops += len(births)
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_PASS_SECONDS:
+                break
+        per_op = elapsed / ops
+        best = per_op if best is None else min(best, per_op)
+
+    with _CallCounter() as calls:
+        for b in births:
+            fn(b)
+
+    tracemalloc.start()
+    for b in births:
+        fn(b)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = len(births)
+    return {
+        "ops": n,
+        "ops_per_second": 1 / best,
+        "us_per_op": best * 1e6,
+        "ephemeris_calls_per_op": calls.ephemeris / n,
+        "chebyshev_calls_per_op": calls.chebyshev / n,
+        "peak_kib": peak / 1024,
+    }
+
+
+def environment(args):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "swisseph": swe.version,
+        "chebyshev_tables": chebyshev.default_ephemeris() is not None,
+        "corpus": args.n,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "time": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change against ``baseline``; returns the names that got more
+    than ``tolerance`` slower or make more ephemeris calls per op.
+    """
+    slower = []
+    print(f"\n{'vs baseline':<26}{'ops/s':>10}{'ephemeris':>11}{'peak':>9}")
+    for name, now in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<26}{'(new)':>10}")
+            continue
+        speed = now["ops_per_second"] / before["ops_per_second"] - 1
+        calls = now["ephemeris_calls_per_op"] - before["ephemeris_calls_per_op"]
+        peak = now["peak_kib"] / before["peak_kib"] - 1 if before["peak_kib"] else 0.0
+        flag = "  SLOWER" if speed < -tolerance else "  MORE CALLS" if calls > 0.05 else ""
+        print(f"{name:<26}{speed:>+10.1%}{calls:>+11.1f}{peak:>+9.0%}{flag}")
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=400, help="corpus size (default 400)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes; the best counts")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="repeatable")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown (default 0.10)")
+    args = parser.parse_args(argv)
+
+    births = make_corpus(args.n, args.seed)
+    results = {}
+    print(f"{'benchmark':<26}{'ops/s':>12}{'us/op':>10}{'ephemeris':>11}{'chebyshev':>11}{'peak KiB':>10}")
+    for name, (fn, share) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        r = results[name] = run_benchmark(fn, births[:max(1, int(len(births) * share))], args.repeat)
+        print(f"{name:<26}{r['ops_per_second']:>12,.0f}{r['us_per_op']:>10.1f}"
+              f"{r['ephemeris_calls_per_op']:>11.1f}{r['chebyshev_calls_per_op']:>11.1f}{r['peak_kib']:>10.0f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"environment": environment(args), "results": results}, fh, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline["environment"].get("corpus") != args.n or baseline["environment"].get("seed") != args.seed:
+            print("note: baseline used a different corpus (-n/--seed); numbers are not comparable")
+        return 1 if compare(results, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Load test for the chart service: starts it with a stubbed city lookup (no
+network) and drives it from concurrent keep-alive connections.
+
+    python benchmarks/load_service.py                          # 2000 requests, 32 connections
+    python benchmarks/load_service.py --unique 50 --pdf 0.2 --workers 4
+    python benchmarks/load_service.py --url http://127.0.0.1:8765   # an already running service
+
+Requests are drawn from --unique distinct charts (a fixed set of random
+births), so with fewer unique charts than requests most are answered from
+the cache or joined to a computation already running. --pdf and
+--panchanga are the shares of /chart.pdf and /panchanga requests, the rest
+are /chart. Reports requests/s, latency percentiles, the X-Cache mix
+(miss / coalesced / hit) and the service's /stats. Exits 1 if any request
+failed.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import CITIES, make_corpus
+
+STUB_PLACES = {city: (lat, lon, tz) for city, lat, lon, tz in CITIES}
+
+
+def stub_lookup(city):
+    """Offline stand-in for geocode.lookup_city; module level so worker processes can unpickle it."""
+    from birthchart.geocode import utc_offset_now
+
+    lat, lon, tz = STUB_PLACES[" ".join(city.split()).title()]
+    return lat, lon, utc_offset_now(tz), tz
+
+
+async def _serve_until_terminated(service, ports):
+    from birthchart.service import serve
+
+    # terminate() sends SIGTERM: cancel the server so asyncio.run() returns normally
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await serve(service, "127.0.0.1", 0, ready=ports.put)
+    except asyncio.CancelledError:
+        pass
+
+
+def _serve(workers, cache_entries, ports):
+    from birthchart.service import ChartService
+
+    service = ChartService(workers, lookup=stub_lookup, cache_entries=cache_entries)
+    try:
+        asyncio.run(_serve_until_terminated(service, ports))
+    finally:
+        service.close()
+
+
+def make_targets(args):
+    """The request paths, in the order they're sent."""
+    rng = random.Random(args.seed)
+    births = make_corpus(args.unique, args.seed)
+    targets = []
+    for _ in range(args.requests):
+        b = rng.choice(births)
+        roll = rng.random()
+        if roll < args.panchanga:
+            query = {"date": b.dob, "days": 7, "city": b.city}
+            targets.append("/panchanga?" + urlencode(query))
+        else:
+            query = {"name": b.name, "dob": b.dob, "tob": b.tob, "city": b.city}
+            path = "/chart.pdf" if roll < args.panchanga + args.pdf else "/chart"
+            targets.append(path + "?" + urlencode(query))
+    return targets
+
+
+async def _request(reader, writer, host, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ")[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, headers.get("x-cache", ""), body
+
+
+async def drive(host, port, targets, concurrency):
+    """Send ``targets`` over ``concurrency`` connections; returns ([(seconds, status, x-cache)], wall seconds)."""
+    queue = list(reversed(targets))
+    results = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                target = queue.pop()
+                start = time.perf_counter()
+                status, how, _ = await _request(reader, writer, host, target)
+                results.append((time.perf_counter() - start, status, how))
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return json.loads((await _request(reader, writer, host, "/stats"))[2])
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32, help="client connections (default 32)")
+    parser.add_argument("--unique", type=int, default=200, help="distinct charts requested (default 200)")
+    parser.add_argument("--pdf", type=float, default=0.1, help="share of /chart.pdf requests (default 0.1)")
+    parser.add_argument("--panchanga", type=float, default=0.1, help="share of /panchanga requests (default 0.1)")
+    parser.add_argument("--workers", type=int, help="service worker processes (default: CPU count)")
+    parser.add_argument("--cache-entries", type=int, default=1024)
+    parser.add_argument("--url", help="test a running service instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    targets = make_targets(args)
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        ports = multiprocessing.Queue()
+        server = multiprocessing.Process(target=_serve, args=(args.workers, args.cache_entries, ports))
+        server.start()
+        host, port = "127.0.0.1", ports.get(timeout=60)
+    try:
+        results, wall = asyncio.run(drive(host, port, targets, args.concurrency))
+        stats = asyncio.run(fetch_stats(host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    latencies = sorted(seconds for seconds, _, _ in results)
+    failed = sum(status != 200 for _, status, _ in results)
+    mix = {how: sum(h == how for _, _, h in results) for how in ("miss", "coalesced", "hit")}
+    print(f"{len(results)} requests over {args.concurrency} connections in {wall:.2f} s: "
+          f"{len(results) / wall:,.0f} req/s, {failed} failed")
+    print("latency ms: " + ", ".join(f"p{int(q * 100)} {percentile(latencies, q) * 1000:.1f}"
+                                     for q in (0.5, 0.9, 0.99)) + f", max {latencies[-1] * 1000:.1f}")
+    print("x-cache: " + ", ".join(f"{how} {n}" for how, n in mix.items()))
+    print("service: " + ", ".join(f"{name} {value}" for name, value in stats.items()))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
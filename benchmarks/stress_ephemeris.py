@@ -0,0 +1,135 @@
+"""
+Concurrency stress test for EphemerisContext: many threads computing
+charts at once, each chart with one of several ayanamsas.
+
+    python benchmarks/stress_ephemeris.py                   # 8 threads, 5 ayanamsas
+    python benchmarks/stress_ephemeris.py --threads 32 --rounds 5 --unguarded
+
+Every (ayanamsa, birth) chart is first computed on one thread as the
+reference. The same charts are then computed again in shuffled order on a
+thread pool, and each result's packed record (every longitude, index and
+end time) must equal the reference byte for byte. Exits 1 on any mismatch.
+
+--unguarded also runs the two patterns EphemerisContext replaces and
+counts the Moon longitudes they get wrong: swe.set_sid_mode() once on the
+main thread with the work on other threads (wrong where the library keeps
+the mode per thread, as the PyPI wheels do), and swe.set_sid_mode() before
+each call on every thread (wrong where the mode is process-wide). It runs
+last because it leaves the library in an arbitrary sidereal mode.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import swisseph as swe
+
+from bench_pipeline import make_corpus
+from birthchart.chart import compute_chart
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode
+
+AYANAMSAS = ("lahiri", "raman", "krishnamurti", "fagan_bradley", "yukteshwar")
+
+
+def chart_record(birth, context):
+    lookup = lambda city: (birth.lat, birth.lon, birth.utc_offset, birth.tz)
+    return compute_chart(birth.name, birth.dob, birth.tob, birth.city, lookup, ephemeris=context).pack()
+
+
+def run_guarded(tasks, reference, threads):
+    """Recompute ``tasks`` on ``threads`` threads; returns (mismatches, seconds)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        records = list(pool.map(lambda task: chart_record(task[1], task[2]), tasks))
+    elapsed = time.perf_counter() - start
+    mismatches = sum(record != reference[key] for (key, _, _), record in zip(tasks, records))
+    return mismatches, elapsed
+
+
+def run_unguarded(births, modes, threads, rounds):
+    """
+    The set_sid_mode() patterns; returns {pattern: (wrong longitudes, samples)}.
+    Expected values come from EphemerisContext, so call this before the
+    library's mode is disturbed.
+    """
+    flags = swe.FLG_SWIEPH | swe.FLG_SIDEREAL
+    expected = {(mode, b.jd_ut): EphemerisContext(mode).sidereal_lon(b.jd_ut, swe.MOON)
+                for mode in modes for b in births}
+    counts = {}
+    lock = threading.Lock()
+
+    def once(mode):
+        return sum(swe.calc_ut(b.jd_ut, swe.MOON, flags)[0][0] != expected[mode, b.jd_ut]
+                   for _ in range(rounds) for b in births)
+
+    def per_call(mode):
+        bad = 0
+        for _ in range(rounds):
+            for b in births:
+                swe.set_sid_mode(mode, 0, 0)
+                time.sleep(0)       # let another thread in between, as any real work would
+                bad += swe.calc_ut(b.jd_ut, swe.MOON, flags)[0][0] != expected[mode, b.jd_ut]
+        return bad
+
+    def run(pattern, worker, thread_modes):
+        total = [0]
+
+        def target(mode):
+            bad = worker(mode)
+            with lock:
+                total[0] += bad
+
+        workers = [threading.Thread(target=target, args=(mode,)) for mode in thread_modes]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        counts[pattern] = (total[0], len(thread_modes) * rounds * len(births))
+
+    swe.set_sid_mode(modes[0], 0, 0)
+    run("set once on the main thread", once, [modes[0]] * threads)
+    run("set before each call", per_call, [modes[i % len(modes)] for i in range(threads)])
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=100, help="births (default 100)")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="times each chart is recomputed")
+    parser.add_argument("--ayanamsa", action="append", help=f"repeatable (default: {', '.join(AYANAMSAS)})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unguarded", action="store_true", help="also run the set_sid_mode() patterns")
+    args = parser.parse_args(argv)
+
+    births = make_corpus(args.n, args.seed)
+    contexts = {name: EphemerisContext(ayanamsa_mode(name)) for name in args.ayanamsa or AYANAMSAS}
+
+    start = time.perf_counter()
+    reference = {(name, i): chart_record(b, ctx)
+                 for name, ctx in contexts.items() for i, b in enumerate(births)}
+    serial = time.perf_counter() - start
+    print(f"reference: {len(reference)} charts on one thread in {serial:.2f} s "
+          f"({len(reference) / serial:.0f}/s)")
+
+    tasks = [((name, i), b, ctx) for _ in range(args.rounds)
+             for name, ctx in contexts.items() for i, b in enumerate(births)]
+    random.Random(args.seed).shuffle(tasks)
+    mismatches, elapsed = run_guarded(tasks, reference, args.threads)
+    print(f"contexts:  {len(tasks)} charts on {args.threads} threads in {elapsed:.2f} s "
+          f"({len(tasks) / elapsed:.0f}/s), {mismatches} differ from the reference")
+
+    if args.unguarded:
+        modes = [ctx.ayanamsa for ctx in contexts.values()]
+        for pattern, (wrong, samples) in run_unguarded(births, modes, args.threads, args.rounds).items():
+            print(f"unguarded, {pattern}: {wrong} of {samples} Moon longitudes wrong ({wrong / samples:.1%})")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
 import os
+import time
+
+# Startup timing starts here, before Kivy and the chart core are imported.
+_STARTUP_T0 = time.perf_counter()
+
 import datetime as dt
-import pytz
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import swisseph as swe
 
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.logger import Logger
 from kivy.core.window import Window
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.boxlayout import BoxLayout
@@ -14,106 +23,36 @@ from kivy.uix.spinner import Spinner
 from kivy.graphics import Color, Rectangle
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.dropdown import DropDown
-from kivy.uix.button import Button
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.properties import ObjectProperty
 import traceback
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-
-from reportlab.platypus import Table, TableStyle, Paragraph
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-import requests
-from timezonefinder import TimezoneFinder
+from bisect import bisect_left
 from datetime import datetime
 import math
 from math import *
 from datetime import timedelta
-from zoneinfo import ZoneInfo
-from datetime import timezone
-
-
-SIGNS = {
-    0:"Ar", 1:"Ta", 2:"Ge", 3:"Cn",
-    4:"Le", 5:"Vi", 6:"Li", 7:"Sc",
-    8:"Sg", 9:"Cp", 10:"Aq", 11:"Pi"
-}
-planet_abbr = {
-    "Sun":"Su","Moon":"Mo","Mars":"Ma","Mercury":"Me",
-    "Jupiter":"Ju","Venus":"Ve","Saturn":"Sa",
-    "Rahu":"Ra","Ketu":"Ke","Ascendant":"Asc"
-}
-
-TELUGU_YEAR_NAMES = [
-    "Prabhava", "Vibhava", "Sukla", "Pramodoota", "Prajotpatti", "Angeerasa", "Sreemukha", "Bhava", "Yuva", 
-    "Dhata", "Isvara", "Bahudhaanya", "Pramadhi", "Vikrama", "Vr̥uṣha", "Chitrabhanu", "Svabhaanu", "Taaraṇa", 
-    "Paarthiva", "Vyaya", "Sarvajittu", "Sarvadhari", "Virodhi", "Vikr̥uti", "Khara", "Nandana", "Vijaya", "Jaya",
-    "Manmadha", "Durmukhi", "Hevaḷambi", "Viḷambi", "Vikaari", "Saarvari", "Plava", "Subhakr̥ut", "Sobhakr̥ut",
-    "Krodhi", "Viswaavasu", "Paraabhava", "Plavanga", "Keelaka", "Saumya", "Saadharaṇa", "Virodhikr̥ut", "Pareedhavi",
-    "Pramaadeecha", "Ananda", "Raakṣhasa", "Nala", "Pingaḷa", "Kaaḷayukti", "Siddharthi", "Raudri", "Durmati", "Dundubhi",
-    "Rudhirodgari", "Raktaakṣhi", "Krodhana", "Akṣaya"
-]
-
-SIGN_RANGES = {
-    "Ar": (0.0, 29.9999),    # Aries
-    "Ta": (30.0, 59.9999),   # Taurus
-    "Ge": (60.0, 89.9999),   # Gemini
-    "Cn": (90.0, 119.9999),  # Cancer
-    "Le": (120.0, 149.9999), # Leo
-    "Vi": (150.0, 179.9999), # Virgo
-    "Li": (180.0, 209.9999), # Libra
-    "Sc": (210.0, 239.9999), # Scorpio
-    "Sg": (240.0, 269.9999), # Sagittarius
-    "Cp": (270.0, 299.9999), # Capricorn
-    "Aq": (300.0, 329.9999), # Aquarius
-    "Pi": (330.0, 359.9999)  # Pisces
-}
-
-TITHI_NAMES = [
-    "Pratipada", "Dwitiya", "Tritiya", "Chaturthi", "Panchami", "Shashti",
-    "Saptami", "Ashtami", "Navami", "Dashami", "Ekadashi", "Dwadashi",
-    "Trayodashi", "Chaturdashi", "Purnima",
-    "Pratipada (Krishna)", "Dwitiya (Krishna)", "Tritiya (Krishna)", "Chaturthi (Krishna)",
-    "Panchami (Krishna)", "Shashti (Krishna)", "Saptami (Krishna)", "Ashtami (Krishna)",
-    "Navami (Krishna)", "Dashami (Krishna)", "Ekadashi (Krishna)", "Dwadashi (Krishna)",
-    "Trayodashi (Krishna)", "Chaturdashi (Krishna)", "Amavasya"
-]
-
-NAKSHATRA_NAMES = [
-    "Ashwini","Bharani","Krittika","Rohini","Mrigashira","Ardra","Punarvasu","Pushya",
-    "Ashlesha","Magha","Purva Phalguni","Uttara Phalguni","Hasta","Chitra","Swati","Vishakha",
-    "Anuradha","Jyeshtha","Mula","Purva Ashadha","Uttara Ashadha","Shravana","Dhanishta",
-    "Shatabhisha","Purva Bhadrapada","Uttara Bhadrapada","Revati"
-]
-
-YOGA_NAMES = [
-    "Vishkumbha","Preeti","Ayushman","Saubhagya","Shobhana","Atiganda","Sukarma","Dhriti",
-    "Shoola","Ganda","Vriddhi","Dhruva","Vyaghata","Harshana","Vajra","Siddhi","Vyatipata",
-    "Variyana","Parigha","Shiva","Siddha","Sadhya","Shubha","Shukla","Brahma","Indra","Vaidhriti"
-]
-
-KARANA_NAMES = [
-    "Bava","Balava","Kaulava","Taitila","Garaja","Vanija","Vishti",
-    "Shakuni","Chatushpada","Nagava","Kimstughna"
-]
-
-ZODIAC = ["Ar","Ta","Ge","Cn","Le","Vi","Li","Sc","Sg","Cp","Aq","Pi"]
-
-KARANA_SEQUENCE = (
-    ["Kimstughna"]
-    + ["Bava", "Balava", "Kaulava", "Taitila", "Garaja", "Vanija", "Vishti"] * 8
-    + ["Shakuni", "Chatushpada", "Naga"]
+
+# reportlab (PDF export), requests/timezonefinder (online geocoding) and pytz
+# are imported on first use and pre-warmed after the first frame; see on_start.
+from birthchart import chart as chart_core
+from birthchart import dasha, ephemeris, geocode, instrument, panchanga
+from birthchart.geocode import CitySuggester
+from birthchart.chart import (
+    SIGN_RANGES, SIGNS, WEEKDAY_NAMES, ZODIAC, Cancelled, ChartMemo, compute_chart, julian_day_ut, planet_abbr, planet_map,
+    sidereal_positions as compute_sidereal_positions,
 )
-flags = swe.FLG_SWIEPH | swe.FLG_SPEED
-planet_map = {
-                "Sun": "Su", "Moon": "Mo", "Mercury": "Me", "Venus": "Ve",
-                "Mars": "Ma", "Jupiter": "Ju", "Saturn": "Sa",
-                "Rahu": "Ra", "Ketu": "Ke", "Ascendant": "Asc"
-}
+from birthchart.panchanga import (
+    KARANA_NAMES, KARANA_SEQUENCE, NAKSHATRA_NAMES, TELUGU_YEAR_NAMES, TITHI_NAMES, YOGA_NAMES,
+)
+from birthchart.warmup import DEFAULT_STEPS as PREWARM_STEPS, start_prewarm
+
+IMPORT_SECONDS = time.perf_counter() - _STARTUP_T0
 
-WEEKDAY_NAMES = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+# PANCHANGA_STARTUP_TIMING=1 logs import/build/first-frame/prewarm timings;
+# set it to a file path to also append them there as one JSON line per run.
+STARTUP_TIMING = os.environ.get("PANCHANGA_STARTUP_TIMING", "")
 
-SIGNS = ["Aries","Taurus","Gemini","Cancer","Leo","Virgo",
-         "Libra","Scorpio","Sagittarius","Capricorn","Aquarius","Pisces"]
 
 class StyledDropDown(DropDown):
     def __init__(self, **kwargs):
@@ -132,50 +71,278 @@ class StyledDropDown(DropDown):
             widget.color = (0, 0, 0, 1)
         return super().add_widget(widget, index)
 
+class SuggestionRow(Button):
+    """One suggestion row; the RecycleView reuses it for whichever value scrolls into view."""
+    owner = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.background_normal = ""
+        self.background_color = (0.95, 0.95, 1, 1)
+        self.color = (0, 0, 0, 1)
+        self.font_size = 18
+
+    def on_release(self):
+        if self.owner is not None:
+            self.owner.select_value(self.text)
+
+class SuggestionDropDown(DropDown):
+    """
+    DropDown holding one RecycleView: only enough SuggestionRow widgets to
+    fill ``visible_rows`` are ever created, and new results just replace
+    the RecycleView data.
+    """
+    row_height = 32
+    visible_rows = 8
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.do_scroll_y = False    # the RecycleView scrolls, not the DropDown
+        self.container.spacing = 0
+        self.container.padding = [0, 0, 0, 0]
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, self.row_height),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.list = RecycleView(size_hint_y=None, height=0)
+        self.list.add_widget(layout)
+        self.list.viewclass = SuggestionRow     # set after the layout manager, or no rows are built
+        self.add_widget(self.list)
+
+    def set_values(self, values, owner):
+        self.list.data = [{"text": v, "owner": owner} for v in values]
+        self.list.height = min(len(values), self.visible_rows) * self.row_height
+        self.list.scroll_y = 1
+
 class AutoCompleteTextInput(TextInput):
+    max_results = 50    # matches handed to the dropdown per keystroke
+
     def __init__(self, values, **kwargs):
         super().__init__(**kwargs)
         self.values = values
-        self.dropdown = DropDown()
+        self.index = sorted(values)
+        self.dropdown = SuggestionDropDown()
         self.bind(text=self.on_text)
 
+    def matches(self, prefix):
+        """Up to max_results values starting with ``prefix``, by bisecting the sorted index."""
+        lo = bisect_left(self.index, prefix)
+        hi = bisect_left(self.index, prefix + "\U0010ffff", lo)
+        return self.index[lo:min(hi, lo + self.max_results)]
+
     def on_text(self, instance, value):
-        # Clear old suggestions
-        self.dropdown.clear_widgets()
+        self.show_suggestions(self.matches(value) if value else [])
 
-        if not value:
-            # If text is empty, close dropdown
+    def show_suggestions(self, values):
+        if not values:
+            # If there is nothing to suggest, close dropdown
             self.dropdown.dismiss()
             return
 
-        # Add matching suggestions
-        for v in self.values:
-            if v.startswith(value):
-                btn = Button(
-                    text=v,
-                    size_hint_y=None,
-                    height=32,
-                    background_normal="",
-                    background_color=(0.95, 0.95, 1, 1),
-                    color=(0, 0, 0, 1),
-                    font_size=18
-                )
-                btn.bind(on_release=lambda btn: self.select_value(btn.text))
-                self.dropdown.add_widget(btn)
-
-        # Only open if there are suggestions, widget is focused, and dropdown not already open
-        if self.dropdown.children and self.focus:
-            self.dropdown.dismiss()   # ensure closed before reopening
+        self.dropdown.set_values(values, self)
+
+        # Only open if widget is focused and dropdown not already open
+        if self.focus and self.dropdown.attach_to is None:
             self.dropdown.open(self)
 
     def select_value(self, val):
         self.text = val
         self.dropdown.dismiss()
 
+class CityInput(AutoCompleteTextInput):
+    """
+    City field with live suggestions from a CitySuggester: gazetteer
+    matches on every keystroke, geocode cache matches from a background
+    search right after, Nominatim matches once typing pauses for
+    ``debounce`` seconds. A newer keystroke cancels the pending or running
+    online query and the results of superseded queries are dropped.
+    """
+    debounce = 0.25
+
+    def __init__(self, suggester=None, **kwargs):
+        super().__init__(values=[], **kwargs)
+        self.suggester = suggester
+        self.suggestions = {}       # label -> Suggestion currently shown
+        self.query_id = 0
+        self._pending = None        # debounce ClockEvent
+        self._cancel = None         # cancel Event of the running online query
+        self._selecting = False
+        self._executor = None
+
+    def on_text(self, instance, value):
+        if self._selecting or self.suggester is None:
+            return
+        self.cancel_query()
+        if not value.strip():
+            self.show_city_suggestions([])
+            return
+        # Gazetteer matches at once; the geocode cache is SQLite, so it is searched on the executor
+        self.show_city_suggestions(self.suggester.quick(value))
+        query_id = self.query_id
+
+        def finished(future):
+            Clock.schedule_once(lambda _dt: self.on_local(query_id, value, future))
+
+        self.submit(self.suggester.local, value).add_done_callback(finished)
+
+    def on_local(self, query_id, text, future):
+        if query_id != self.query_id or future.exception() is not None:
+            return      # superseded, or no cache: keep the gazetteer suggestions
+        local = future.result()
+        self.show_city_suggestions(local)
+        if self.suggester.needs_online(text, local):
+            self._pending = Clock.schedule_once(lambda _dt: self.start_online(query_id, text), self.debounce)
+
+    def cancel_query(self):
+        self.query_id += 1
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
+
+    def start_online(self, query_id, text):
+        self._pending = None
+        cancel = self._cancel = threading.Event()
+
+        def finished(future):
+            Clock.schedule_once(lambda _dt: self.on_online(query_id, future))
+
+        self.submit(self.suggester.online, text, cancel).add_done_callback(finished)
+
+    def on_online(self, query_id, future):
+        if query_id != self.query_id or future.exception() is not None:
+            return      # superseded, or offline: keep the local suggestions
+        self._cancel = None
+        self.show_city_suggestions(future.result())
+
+    def show_city_suggestions(self, suggestions):
+        self.suggestions = {s.label: s for s in suggestions}
+        self.show_suggestions(list(self.suggestions))
+
+    def select_value(self, val):
+        self._selecting = True
+        try:
+            super().select_value(val)
+        finally:
+            self._selecting = False
+        self.cancel_query()
+        suggestion = self.suggestions.get(val)
+        if suggestion is not None and suggestion.tz is None:
+            # Cache the picked online result so Generate resolves it offline
+            self.submit(self.suggester.choose, suggestion)
+
+    def submit(self, fn, *args):
+        if self._executor is None:
+            # Two threads: a cache search doesn't wait behind a running Nominatim request
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suggest")
+        return self._executor.submit(fn, *args)
+
+    def set_text(self, text):
+        """Fill the field without suggesting or geocoding."""
+        self._selecting = True
+        try:
+            self.text = text
+        finally:
+            self._selecting = False
+        self.cancel_query()
+
+    def close(self):
+        self.cancel_query()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+class HistoryNameInput(AutoCompleteTextInput):
+    """
+    Name field suggesting saved charts whose name starts with the text
+    (an indexed search of the chart history); picking one calls
+    ``on_pick(entry)`` with its history.HistoryEntry. Like CityInput, the
+    search runs on a background thread once typing pauses for
+    ``debounce`` seconds, and results of a superseded query are dropped.
+    """
+    debounce = 0.15
+
+    def __init__(self, history=None, on_pick=None, **kwargs):
+        super().__init__(values=[], **kwargs)
+        self.history = history      # callable returning the ChartHistory; may open it
+        self.on_pick = on_pick
+        self.entries = {}           # label -> HistoryEntry currently shown
+        self.query_id = 0
+        self._pending = None        # debounce ClockEvent
+        self._selecting = False
+        self._executor = None
+
+    def on_text(self, instance, value):
+        if self._selecting or self.history is None:
+            return
+        self.cancel_query()
+        if not value.strip():
+            self.show_entries([])
+            return
+        query_id = self.query_id
+        self._pending = Clock.schedule_once(lambda _dt: self.start_search(query_id, value), self.debounce)
+
+    def cancel_query(self):
+        self.query_id += 1
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    def start_search(self, query_id, text):
+        self._pending = None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+
+        def finished(future):
+            Clock.schedule_once(lambda _dt: self.on_search(query_id, future))
+
+        self._executor.submit(lambda: self.history().search(text)).add_done_callback(finished)
+
+    def on_search(self, query_id, future):
+        if query_id != self.query_id or future.exception() is not None:
+            return      # superseded, or no history: leave the field as it is
+        self.show_entries(future.result())
+
+    def show_entries(self, entries):
+        self.entries = {f"{e.name} · {e.dob} {e.tob[:5]} · {e.place}": e for e in entries}
+        self.show_suggestions(list(self.entries))
+
+    def select_value(self, val):
+        entry = self.entries.get(val)
+        self._selecting = True
+        try:
+            super().select_value(entry.name if entry is not None else val)
+        finally:
+            self._selecting = False
+        self.cancel_query()
+        if entry is not None and self.on_pick is not None:
+            self.on_pick(entry)
+
+    def close(self):
+        self.cancel_query()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
 class PanchangaApp(App):
     def __init__(self, **kwargs):
             super().__init__(**kwargs)
             self.chart_data = None
+            self.chart_memo = ChartMemo()     # shared by Generate and Save PDF
+            self.last_trace = None            # instrument.Trace of the last Generate / Save PDF
+            self.debug_expanded = False
+            self.geo_cache = None
+            self.history = None               # ChartHistory, opened on first use
+            self.startup_timings = {"imports": IMPORT_SECONDS}
+            self.geo_cache_lock = threading.Lock()
+            self.history_lock = threading.Lock()
+            # Background jobs: only the latest job (self.job_id) may update the UI
+            self.executor = None
+            self.job_id = 0
+            self.job_cancel = None
 
     def validate_dob_inputs(self):
         inputs = {
@@ -193,6 +360,7 @@ class PanchangaApp(App):
                 raise ValueError(f"Please select a valid {label}.")
         
     def build(self):
+        build_start = time.perf_counter()
         Window.size = (414, 896)
 
         root = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -217,7 +385,8 @@ class PanchangaApp(App):
             input_grid.add_widget(widget)
 
         # Inputs
-        self.name_input = TextInput(
+        self.name_input = HistoryNameInput(
+            history=self.get_history, on_pick=self.open_history_entry,
             hint_text="Name", size_hint=(input_width, None), height=input_height,
             background_normal="", background_color=(0.95, 0.95, 1, 1),
             foreground_color=(0, 0, 0, 1)
@@ -262,7 +431,8 @@ class PanchangaApp(App):
         self.year_input.text = str(dt.datetime.now().year)
         add_input("Year:", self.year_input)
 
-        self.city_input = TextInput(
+        self.city_input = CityInput(
+            suggester=CitySuggester(self.get_geo_cache),
             hint_text="City", size_hint=(input_width, None), height=input_height,
             background_normal="", background_color=(0.95, 0.95, 1, 1),
             foreground_color=(0, 0, 0, 1)
@@ -382,17 +552,85 @@ class PanchangaApp(App):
         scroll.add_widget(self.output_label)
         root.add_widget(scroll)
 
+        # Debug panel: the last run's stage timings; tap to expand
+        self.debug_panel = Button(
+            text="", font_size=12, size_hint_y=None, height=0, opacity=0,
+            halign="left", valign="top", padding=(10, 4),
+            background_normal="", background_down="",
+            background_color=(0.9, 0.9, 0.95, 1), color=(0.2, 0.2, 0.2, 1)
+        )
+        self.debug_panel.bind(on_press=self.toggle_debug_panel)
+        self.debug_panel.bind(
+            width=lambda instance, value: setattr(instance, 'text_size', (value - 20, None)),
+            texture_size=lambda instance, value: setattr(instance, 'height', value[1] + 8 if instance.text else 0)
+        )
+        root.add_widget(self.debug_panel)
+        instrument.add_listener(self.on_trace)
+
+        self.startup_timings["build"] = time.perf_counter() - build_start
         return root
+
+    def on_start(self):
+        # Runs after the next frame, so the window is on screen before the warm-up starts
+        Clock.schedule_once(self.on_first_frame, 0)
+
+    def on_first_frame(self, *_):
+        self.startup_timings["first_frame"] = time.perf_counter() - _STARTUP_T0
+        # The history and geocode cache are opened on the warm-up thread too; a failure there
+        # only loses that store
+        start_prewarm((("history", self.attach_history), ("geocache", self.get_geo_cache)) + PREWARM_STEPS,
+                      callback=self.on_prewarmed)
+
+    def attach_history(self):
+        """Put the chart history behind the memo, so charts from earlier sessions skip the pipeline."""
+        self.chart_memo.store = self.get_history()
+
+    def on_prewarmed(self, timings):
+        """Called on the warm-up thread once PDF/geocoding modules are loaded."""
+        self.startup_timings["prewarm"] = timings
+        if STARTUP_TIMING:
+            self.report_startup_timings()
+
+    def report_startup_timings(self):
+        t = self.startup_timings
+        ms = lambda seconds: "failed" if seconds is None else f"{seconds * 1000:.0f} ms"
+        Logger.info(
+            "Startup: imports %s, build %s, first frame %s (since first import)",
+            ms(t["imports"]), ms(t.get("build")), ms(t.get("first_frame")))
+        Logger.info("Startup: prewarm " + ", ".join(
+            f"{name} {ms(seconds)}" for name, seconds in t.get("prewarm", {}).items()))
+        if STARTUP_TIMING not in ("1", "true", "yes"):
+            with open(STARTUP_TIMING, "a") as fh:
+                fh.write(json.dumps(dict(t, time=time.time())) + "\n")
     
+    def on_trace(self, trace):
+        """instrument listener; called on the worker thread that ran the trace."""
+        Clock.schedule_once(lambda _dt: self.show_trace(trace))
+
+    def show_trace(self, trace):
+        self.last_trace = trace
+        self.debug_panel.opacity = 1
+        self.render_debug_panel()
+
+    def toggle_debug_panel(self, *_):
+        self.debug_expanded = not self.debug_expanded
+        self.render_debug_panel()
+
+    def render_debug_panel(self):
+        trace = self.last_trace
+        if trace is None:
+            return
+        if not self.debug_expanded:
+            self.debug_panel.text = f"⏱ {trace.name} {trace.seconds * 1000:.1f} ms  (tap for details)"
+            return
+        lines = [f"⏱ {trace.name}: {trace.seconds * 1000:.1f} ms total"]
+        lines.extend(f"   {name:<12} {seconds * 1000:8.2f} ms" for name, seconds in trace.spans.items())
+        lines.extend(f"   {name:<12} {n:8d}" for name, n in trace.counters.items())
+        self.debug_panel.text = "\n".join(lines)
+
     def on_save_pdf(self, *_):
         """Save the generated chart output into a PDF file with improved formatting."""
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.pdfgen import canvas
-            from reportlab.platypus import Table, TableStyle
-            from reportlab.lib import colors
-            import pytz, datetime as dt, swisseph as swe
-
             # Helper: safely get text from spinner or text input
             def get_text(attr_candidates, label):
                 for attr in attr_candidates:
@@ -412,142 +650,83 @@ class PanchangaApp(App):
 
             dob = f"{year:04d}-{month:02d}-{day:02d}"
             tob = f"{hour:02d}:{minute:02d}:{second:02d}"
-
-            # Lookup city and timezone
-            lat, lon, utc_offset, tz_string = self.lookup_city(city)
-            self.tz = pytz.timezone(tz_string)
-
-            # Datetime objects
-            dob_obj = dt.datetime.strptime(dob, "%Y-%m-%d").date()
-            tob_obj = dt.datetime.strptime(tob, "%H:%M:%S").time()
-            dt_obj = dt.datetime.combine(dob_obj, tob_obj)
-
-            # Swiss Ephemeris setup
-            jd_local = swe.julday(
-                dt_obj.year, dt_obj.month, dt_obj.day,
-                dt_obj.hour + dt_obj.minute / 60 + dt_obj.second / 3600,
-                swe.GREG_CAL
-            )
-            jd_ut = jd_local - (utc_offset / 24.0)
-            swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
-
-            def calc_lon(body):
-                return swe.calc_ut(jd_ut, body, swe.FLG_SWIEPH | swe.FLG_SIDEREAL)[0][0]
-
-            # Planetary positions
-            rahu = calc_lon(swe.MEAN_NODE) % 360
-            sidereal_positions = {
-                "Sun":      calc_lon(swe.SUN)     % 360,
-                "Moon":     calc_lon(swe.MOON)    % 360,
-                "Mars":     calc_lon(swe.MARS)    % 360,
-                "Mercury":  calc_lon(swe.MERCURY) % 360,
-                "Jupiter":  calc_lon(swe.JUPITER) % 360,
-                "Venus":    calc_lon(swe.VENUS)   % 360,
-                "Saturn":   calc_lon(swe.SATURN)  % 360,
-                "Rahu":     rahu,
-                "Ketu":     (rahu + 180) % 360,
-            }
-
-            # Houses and Ascendant
-            houses, ascmc = swe.houses(jd_ut, lat, lon, b'P')
-            asc_tropical = ascmc[0]
-            ayan = swe.get_ayanamsa(jd_ut)
-            asc_sidereal = (asc_tropical - ayan) % 360
-            sidereal_positions["Ascendant"] = asc_sidereal
-
-            chart = self.generate_birth_chart(
-                name, dob, tob, city, lat, lon, utc_offset,
-                jd_ut, sidereal_positions
-            )
-
-            # Telugu year cleanup
-            telugu_year = chart.get("TELUGU_YEAR", "").replace("(", "").replace(")", "").replace("☒", "").strip()
-
-            # PDF file
-            filename = f"{name}_birth_chart.pdf"
-            c = canvas.Canvas(filename, pagesize=A4)
-            width, height = A4
-
-            # Top title
-            title = f"Birth Chart for {name}".upper()
-            c.setFont("Helvetica-Bold", 16)  # larger title font
-            c.drawCentredString(width / 2, height - 50, title)
-
-            # Section 1: Birth Data – Panchangam Details
-            y = height - 90
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, y, "BIRTH DATA – PANCHANGAM DETAILS")
-            y -= 25
-
-            c.setFont("Courier", 11)  # larger font for details
-            info_fields = [
-                ("NAME", name),
-                ("DATE", dob),
-                ("TIME", tob),
-                ("PLACE", city),
-                ("WEEKDAY", dt_obj.strftime('%A')),
-                ("LAT", f"{lat}"),
-                ("LONG", f"{lon}"),
-                ("TELUGU_YEAR", telugu_year),
-                ("TITHI", chart.get("TITHI", "")),
-                ("TITHI_END", chart.get("TITHI_END", "")),
-                ("NAKSHATRA", chart.get("NAKSHATRA", "")),
-                ("NAK_END", chart.get("NAK_END", "")),
-                ("KARANA", chart.get("KARANA", "")),
-                ("KARANA_END", chart.get("KARANA_END", "")),
-                ("YOGA", chart.get("YOGA", "")),
-                ("YOGA_END", chart.get("YOGA_END", "")),
-            ]
-            for lbl, val in info_fields:
-                c.drawString(50, y, f"{lbl:<13} : {val}")
-                y -= 18  # slightly more spacing
-
-            # Section 2: Rāśi Chakra Diagram
-            chart_x = 330
-            chart_y = height - 310
-            self.draw_south_indian_chart(c, chart_x, chart_y, 220, sidereal_positions, dob, tob)  # slightly larger chart
-
-            # Section 3: Planet Positions
-            y -= 40
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, y, "PLANET POSITIONS")
-            y -= 30
-
-            data = [["Planet", "Longitude", "ABS.Longitude", "Sign"]]
-            for planet in ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Rahu", "Ketu", "Ascendant"]:
-                prefix = planet[:2] if planet != "Ascendant" else "Asc"
-                data.append([
-                    planet,
-                    chart.get(f"LONG_{prefix}", ""),
-                    chart.get(f"ABS_{prefix}", ""),
-                    chart.get(f"SIGN_{prefix}", ""),
-                ])
-
-            table = Table(data, colWidths=[100, 120, 120, 80])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-                ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-                ('FONTNAME',(0,0),(-1,0),'Helvetica-Bold'),   # header row only
-                ('FONTNAME', (0,1), (-1,-1), 'Courier'),      # body rows only
-                ('FONTSIZE', (0,0), (-1,-1), 12),
-                ('LEFTPADDING',(0,0),(-1,-1),6),
-                ('RIGHTPADDING',(0,0),(-1,-1),6),
-            ]))
-
-            table3_width, table3_height = table.wrap(0, 0)
-            x_center = (width - table3_width) / 2
-            table.drawOn(c, x_center, y - table3_height)
-
-            c.save()
-            self.output_label.text += f"\n\nPDF saved as {filename}"
-
         except Exception as e:
             self.output_label.text += f"\n\nError saving PDF: {e}"
+            return
+
+        def save(progress, cancel):
+            from birthchart import pdf
+
+            with instrument.trace("save_pdf"):
+                result = compute_chart(name, dob, tob, city, self.lookup_city, progress, cancel,
+                                       memo=self.chart_memo)
+                progress("Writing PDF...")
+                return pdf.write_chart_pdf(result)
+
+        def saved(filename):
+            self.output_label.text = base_text + f"\n\nPDF saved as {filename}"
+
+        def failed(e):
+            self.output_label.text = base_text + f"\n\nError saving PDF: {e}"
+
+        base_text = self.output_label.text
+        self.run_in_background(save, saved, failed, base_text)
    
+    def run_in_background(self, work, on_done, on_error, base_text=""):
+        """
+        Run ``work(progress, cancel)`` on the worker pool. Progress messages
+        are shown below ``base_text``; ``on_done(result)`` or ``on_error(exc)``
+        run on the UI thread. Starting a job cancels the previous one, and
+        anything a superseded job posts is dropped.
+        """
+        self.cancel_job()
+        job_id = self.job_id
+        cancel = self.job_cancel = threading.Event()
+
+        def progress(message):
+            Clock.schedule_once(lambda _dt: self.on_job_progress(job_id, base_text, message))
+
+        def finished(future):
+            Clock.schedule_once(lambda _dt: self.on_job_done(job_id, future, on_done, on_error))
+
+        if self.executor is None:
+            # Two workers so a job stuck on the network doesn't hold up the next one
+            self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chart")
+        self.executor.submit(work, progress, cancel).add_done_callback(finished)
+
+    def cancel_job(self):
+        """Cancel the running job (if any) and drop whatever it still posts."""
+        if self.job_cancel is not None:
+            self.job_cancel.set()
+            self.job_cancel = None
+        self.job_id += 1
+
+    def on_job_progress(self, job_id, base_text, message):
+        if job_id == self.job_id:
+            self.output_label.text = (base_text + "\n\n" if base_text else "") + f"⏳ {message}"
+
+    def on_job_done(self, job_id, future, on_done, on_error):
+        if job_id != self.job_id:
+            return      # superseded by a newer job or Reset
+        self.job_cancel = None
+        exc = future.exception()
+        if isinstance(exc, Cancelled):
+            return
+        if exc is not None:
+            on_error(exc)
+        else:
+            on_done(future.result())
+
+    def on_stop(self):
+        self.cancel_job()
+        self.city_input.close()
+        self.name_input.close()
+        instrument.remove_listener(self.on_trace)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
     def on_reset(self, *args):
+        self.cancel_job()
         now = dt.datetime.now()
 
         # Reset spinners
@@ -604,62 +783,47 @@ class PanchangaApp(App):
             name = self.name_input.text.strip()
             city = self.city_input.text.strip()
 
-            # Lookup city
-            lat, lon, utc_offset, tz_string = self.lookup_city(city)
-            tz = pytz.timezone(tz_string)
-            self.tz = tz
-
-            # Datetime objects
-            dob_obj = dt.datetime.strptime(dob, "%Y-%m-%d").date()
-            tob_obj = dt.datetime.strptime(tob, "%H:%M:%S").time()
-            dt_obj = dt.datetime.combine(dob_obj, tob_obj)
-
-            jd_local = swe.julday(
-                dt_obj.year, dt_obj.month, dt_obj.day,
-                dt_obj.hour + dt_obj.minute/60 + dt_obj.second/3600,
-                swe.GREG_CAL
-            )
-            jd_ut = jd_local - (utc_offset / 24.0)
-            swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
-
-            def calc_lon(body):
-                return swe.calc_ut(jd_ut, body, swe.FLG_SWIEPH | swe.FLG_SIDEREAL)[0][0]
-
-            # Planetary longitudes
-            sun_lon = calc_lon(swe.SUN)
-            moon_lon = calc_lon(swe.MOON)
-            mars_lon = calc_lon(swe.MARS)
-            mercury_lon = calc_lon(swe.MERCURY)
-            jupiter_lon = calc_lon(swe.JUPITER)
-            venus_lon = calc_lon(swe.VENUS)
-            saturn_lon = calc_lon(swe.SATURN)
-            rahu_lon = calc_lon(swe.MEAN_NODE)
-            ketu_lon = (rahu_lon + 180) % 360
-
-            houses, ascmc = swe.houses(jd_ut, lat, lon, b'P')
-            asc_tropical = ascmc[0]
-            ayan = swe.get_ayanamsa(jd_ut)
-            asc_sidereal = (asc_tropical - ayan) % 360
-
-            sidereal_positions = {
-                "Sun": sun_lon % 360,
-                "Moon": moon_lon % 360,
-                "Mars": mars_lon % 360,
-                "Mercury": mercury_lon % 360,
-                "Jupiter": jupiter_lon % 360,
-                "Venus": venus_lon % 360,
-                "Saturn": saturn_lon % 360,
-                "Rahu": rahu_lon % 360,
-                "Ketu": ketu_lon % 360,
-                "Ascendant": asc_sidereal
-            }
-
-            # Generate chart silently (no PPTX prompt)
-            chart = self.generate_birth_chart(
-                name, dob, tob, city, lat, lon, utc_offset,
-                jd_ut, sidereal_positions
-            )
+        except Exception as e:
+            import traceback
+            self.output_label.color = (0, 0, 0, 1)
+            self.output_label.text += f"\n\nError generating chart: {e}\n{traceback.format_exc()}"
+            return
+
+        def generate(progress, cancel):
+            return compute_chart(name, dob, tob, city, self.lookup_city, progress, cancel,
+                                 memo=self.chart_memo)
+
+        def failed(e):
+            import traceback
+            self.output_label.color = (0, 0, 0, 1)
+            self.output_label.text = (f"Error generating chart: {e}\n"
+                                      + "".join(traceback.format_exception(e)))
+
+        self.output_label.color = (0, 0, 0, 1)
+        self.run_in_background(generate, self.show_chart, failed)
 
+    def open_history_entry(self, entry):
+        """Fill the inputs from a saved chart and show it straight from the history."""
+        year, month, day = entry.dob.split("-")
+        hour, minute, second = entry.tob.split(":")
+        self.day_spinner.text = str(int(day))
+        self.month_spinner.text = str(int(month))
+        self.year_input.text = year
+        self.hour_spinner.text, self.minute_spinner.text, self.second_spinner.text = hour, minute, second
+        self.city_input.set_text(entry.place)
+
+        def load(progress, cancel):
+            return self.get_history().load(entry.id)
+
+        def failed(e):
+            self.output_label.text = f"Error opening saved chart: {e}"
+
+        self.output_label.color = (0, 0, 0, 1)
+        self.run_in_background(load, self.show_chart, failed)
+
+    def show_chart(self, result):
+        """Render a compute_chart() ChartResult into the output area."""
+        try:
             # Font fallback (monospaced for alignment)
             mono_path_candidates = [
                 r"C:\Windows\Fonts\consola.ttf",
@@ -677,32 +841,11 @@ class PanchangaApp(App):
             def fmt_info(label, value):
                 return f"{label:<16} : {value}"
 
-            info_fields = [
-                ("NAME", name),
-                ("DATE", dob),
-                ("TIME", tob),
-                ("PLACE", city),
-                ("WEEKDAY", dt_obj.strftime('%A')),
-                ("LAT", f"{lat}"),
-                ("LONG", f"{lon}"),
-                ("TELUGU_YEAR", chart.get("TELUGU_YEAR", "")),
-                ("TITHI", chart.get("TITHI", "")),
-                ("TITHI_END", chart.get("TITHI_END", "")),
-                ("NAKSHATRA", chart.get("NAKSHATRA", "")),
-                ("NAK_END", chart.get("NAK_END", "")),
-                ("KARANA", chart.get("KARANA", "")),
-                ("KARANA_END", chart.get("KARANA_END", "")),
-                ("YOGA", chart.get("YOGA", "")),
-                ("YOGA_END", chart.get("YOGA_END", ""))
-            ]
-
-            planets = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Rahu", "Ketu", "Ascendant"]
+            # Strings are only formatted here, from the result's raw values
+            info_fields = [(label, result.info(label)) for label in chart_core.INFO_LABELS]
 
             def fmt_planet_line(planet):
-                prefix = planet[:2] if planet != "Ascendant" else "Asc"
-                long_val = chart.get(f"LONG_{prefix}", "")
-                abs_val  = chart.get(f"ABS_{prefix}", "")
-                sign_val = chart.get(f"SIGN_{prefix}", "")
+                long_val, abs_val, sign_val = result.planet(planet)
                 return f"{planet:<12}{long_val:<20}{abs_val:<15}{sign_val:<5}"
 
             output_lines = []
@@ -715,21 +858,46 @@ class PanchangaApp(App):
             output_lines.append(line_sep_56)
             output_lines.append(f"{'Planet':<12}{'Longitude':<20}{'ABS.Longitude':<15}{'Sign':<5}")
             output_lines.append(line_sep_56)
-            output_lines.extend(fmt_planet_line(p) for p in planets)
+            output_lines.extend(fmt_planet_line(p) for p in chart_core.PLANET_ROWS)
             output_lines.append(line_sep_56)
+            output_lines.append("")
+            output_lines.extend(self.dasha_lines(result, line_sep_56))
 
             # Display in widget (black text on uniform background)
             self.output_label.color = (0, 0, 0, 1)
             self.output_label.text = "\n".join(output_lines)
 
             # Save chart data for PPTX generation
-            self.chart_data = chart
+            self.chart_data = result
 
         except Exception as e:
             import traceback
             self.output_label.color = (0, 0, 0, 1)
             self.output_label.text += f"\n\nError generating chart: {e}\n{traceback.format_exc()}"
     
+    def dasha_lines(self, result, line_sep):
+        """Vimshottari section of the preview: balance at birth, the periods running now, the mahadashas."""
+        moon = result.longitude("Moon")
+        local_date = lambda jd: panchanga.jd_to_datetime(jd + result.utc_offset / 24.0).strftime("%Y-%m-%d")
+
+        lord, days = dasha.balance(moon)
+        years, days = divmod(days, dasha.YEAR_DAYS)
+        months, days = divmod(days, dasha.YEAR_DAYS / 12)
+        lines = ["VIMSHOTTARI DASHA", line_sep,
+                 f"{'Balance at birth':<16} : {lord} {int(years)}y {int(months)}m {int(days)}d"]
+        jd_now = panchanga.datetime_to_jd(dt.datetime.now(dt.timezone.utc))
+        if jd_now >= result.jd_ut:
+            for level, period in zip(dasha.LEVELS, dasha.current(moon, result.jd_ut, jd_now, 3)):
+                lines.append(f"{level:<16} : {period.lords[-1]:<9}"
+                             f"{local_date(period.start)} - {local_date(period.end)}")
+        lines.append(line_sep)
+        lines.append(f"{'Mahadasha':<12}{'Start':<14}End")
+        lines.append(line_sep)
+        lines.extend(f"{period.lords[0]:<12}{local_date(period.start):<14}{local_date(period.end)}"
+                     for period in dasha.periods(moon, result.jd_ut))
+        lines.append(line_sep)
+        return lines
+
     def on_exit(self, *_):
         """Gracefully stop the app when Exit button is pressed."""
         from kivy.app import App
@@ -758,8 +926,9 @@ class PanchangaApp(App):
         )
 
         # Step 3: Compute UTC sunrise and sunset
-        sunrise_result = swe.rise_trans(jd_ut, swe.SUN, lon, lat, rsmi=swe.CALC_RISE)
-        sunset_result  = swe.rise_trans(jd_ut, swe.SUN, lon, lat, rsmi=swe.CALC_SET)
+        with ephemeris.default_context().session():   # chart jobs run on other threads
+            sunrise_result = swe.rise_trans(jd_ut, swe.SUN, lon, lat, rsmi=swe.CALC_RISE)
+            sunset_result  = swe.rise_trans(jd_ut, swe.SUN, lon, lat, rsmi=swe.CALC_SET)
 
         sunrise_utc = sunrise_result[1][0]
         sunset_utc  = sunset_result[1][0]
@@ -778,462 +947,62 @@ class PanchangaApp(App):
 
     def draw_south_indian_chart(self, c, x, y, size, sidereal_positions, dob, tob):
         """Draw South Indian 4x4 Rāśi Chakra with merged cells and spaced planets."""
-        cell = size / 4
-
-        # Draw horizontal lines
-        for i in range(5):
-            c.line(x, y + i*cell, x + size, y + i*cell)
-
-        # Draw vertical lines, skipping merged middle block
-        for j in range(5):
-            if j == 2:
-                # draw only top and bottom segments, leave the middle open
-                c.line(x + j*cell, y + 3*cell, x + j*cell, y + size)   # top two cells
-                c.line(x + j*cell, y, x + j*cell, y + cell)            # bottom cell
-            else:
-                c.line(x + j*cell, y, x + j*cell, y + size)
-
-        # Fixed rāśi positions
-        rasi_order = {
-            "Pi": (0,0), "Ar": (0,1), "Ta": (0,2), "Ge": (0,3),
-            "Aq": (1,0), "Cn": (1,3),
-            "Cp": (2,0), "Le": (2,3),
-            "Sg": (3,0), "Sc": (3,1), "Li": (3,2), "Vi": (3,3)
-        }
-        rasi_names = ["Ar","Ta","Ge","Cn","Le","Vi","Li","Sc","Sg","Cp","Aq","Pi"]
-
-        # Prepare planet stacking per rāśi
-        rasi_planets = {rasi: [] for rasi in rasi_order}
-        for planet, lon in sidereal_positions.items():
-            if planet == "Ascendant":
-                continue  # skip Ascendant here, handle separately
-            rasi_index = int(lon // 30)
-            rasi = rasi_names[rasi_index]
-            if rasi in rasi_planets:
-                abbr = planet_abbr.get(planet, planet[:2])
-                rasi_planets[rasi].append(abbr)
-
-        # Draw rāśi labels (smaller, gray font)
-        c.setFont("Helvetica", 9)
-        c.setFillColorRGB(0.5, 0.5, 0.5)  # gray color
-        for rasi, (row,col) in rasi_order.items():
-            rx = x + col*cell
-            ry = y + (3-row)*cell
-            c.drawString(rx+2, ry+cell-12, rasi)
-        c.setFillColorRGB(0, 0, 0)        # reset to black for planets and other text
-
-
-        # Draw stacked planets with dynamic font sizing
-        for rasi, planets in rasi_planets.items():
-            if rasi in rasi_order and planets:
-                row, col = rasi_order[rasi]
-                rx = x + col*cell
-                ry = y + (3-row)*cell
-
-                count = len(planets)
-                if count >= 6:
-                    font_size, line_gap = 9, 10
-                elif count >= 4:
-                    font_size, line_gap = 10, 11
-                else:
-                    font_size, line_gap = 11, 12
-
-                c.setFont("Courier", font_size)
-                # center the stack vertically
-                offset = (count-1) * line_gap / 2
-                for i, planet in enumerate(planets):
-                    c.drawCentredString(rx + cell/2, ry + cell/2 - offset + i*line_gap, planet)
-
-        # Draw Ascendant separately as cusp marker
-        asc_lon = sidereal_positions.get("Ascendant", 0)
-        asc_rasi = rasi_names[int(asc_lon // 30)]
-        if asc_rasi in rasi_order:
-            row, col = rasi_order[asc_rasi]
-            rx = x + col*cell
-            ry = y + (3-row)*cell
-            count = len(rasi_planets[asc_rasi])
-
-            # dynamic font sizing based on crowd
-            if count >= 6:
-                font_size, line_gap = 9, 10
-            elif count >= 4:
-                font_size, line_gap = 10, 11
-            else:
-                font_size, line_gap = 11, 12
-
-            c.setFont("Courier", font_size)
-
-            if count == 0:
-                asc_y = ry + cell/2
-            else:
-                offset = (count-1) * line_gap / 2
-                asc_y = ry + cell/2 - offset - line_gap  # one line above the stack
-
-            c.drawCentredString(rx + cell/2, asc_y, "Asc")
-
-        # Merged cell: RASI CHAKRA
-        rx = x + cell
-        ry = y + 2*cell
-        c.setFont("Helvetica-Bold", 11)
-        c.drawCentredString(rx + cell, ry + cell/2, "RASI CHAKRA")
-
-        # Merged cell: DOB / TOB
-        rx = x + cell
-        ry = y + cell
-        c.setFont("Courier-Bold", 11)
-        c.drawCentredString(rx + cell, ry + cell/2 + 6, f"DOB: {dob}")
-        c.drawCentredString(rx + cell, ry + cell/2 - 6, f"TOB: {tob}")
+        from birthchart import pdf
+        pdf.draw_south_indian_chart(c, x, y, size, sidereal_positions, dob, tob)
 
     def generate_birth_chart(self, name, dob, tob, city, lat, lon, utc_offset,jd_ut, sidereal_positions):
-        # Convert DOB and TOB into datetime objects
-        dob_obj = datetime.strptime(dob, "%Y-%m-%d").date()
-        tob_obj = datetime.strptime(tob, "%H:%M:%S").time()
-        dt_obj  = datetime.combine(dob_obj, tob_obj)
-        t0 = datetime.combine(dob_obj, tob_obj)   # this is your reference datetime
-        # Weekday
-        weekday = dt_obj.strftime("%A")
-        chart_dict = {}
-
-        # Telugu year (placeholder – replace with your actual logic)
-        telugu_year = self.get_telugu_year(dob_obj.year)
-
-        # Panchanga calculations using sidereal values
-        sun_sidereal  = sidereal_positions["Sun"]
-        moon_sidereal = sidereal_positions["Moon"]
-
-        # Tithi
-        tithi_name, tithi_end, _, _ = self.compute_tithi(
-            moon_sidereal, sun_sidereal,
-            dob_obj.year, dob_obj.month, dob_obj.day,
-            tob_obj.hour, tob_obj.minute, tob_obj.second,
-            utc_offset
+        return chart_core.generate_birth_chart(
+            name, dob, tob, city, lat, lon, utc_offset, jd_ut, sidereal_positions, self.tz
         )
-        
-
-        nak_name, nak_pada, nak_end = self.compute_nakshatra(moon_sidereal, jd_ut, utc_offset)
-        # print("DEBUG Nakshatra raw result:", (nak_name, nak_pada, nak_end))
-        nak_full = f"{nak_name} (Pada {nak_pada})"
-
-
-        #print("sidereal_positions keys :", sidereal_positions.keys())
-        # Karana
-        karana = self.compute_karana(moon_sidereal, sun_sidereal)
-        # print(f"DEBUG Karana: {karana}")
-        # Yoga
-        yoga_name = self.compute_yoga(moon_sidereal, sun_sidereal)
-        # print(f"DEBUG Yoga: {yoga_name}")
-        kar_yog = self.current_karana_yoga_end(t0, sidereal_positions)
-        #print("DEBUG kar_yog dict:", kar_yog)
-
-        # Convert to IST and format
-        self.karana_end_local = kar_yog["karana_end"].astimezone(self.tz)
-        self.karana_end_str = self.karana_end_local.strftime("%d-%b-%Y %I:%M %p IST")
-
-        self.yoga_end_local = kar_yog["yoga_end"].astimezone(self.tz)
-        self.yoga_end_str = self.yoga_end_local.strftime("%d-%b-%Y %I:%M %p IST")
-        if self.yoga_end_local.date() > t0.date():
-            self.yoga_end_str += " (continues to next day)"
-
-        chart_dict.update({
-            "NAME": name,
-            "DATE": dob,
-            "TIME": tob,
-            "PLACE": city,
-            "WEEKDAY": weekday,
-            "LAT": lat,
-            "LONG": lon,
-            "TELUGU_YEAR": telugu_year,
-            "TITHI": tithi_name,
-            "TITHI_END": tithi_end,
-            "NAKSHATRA": nak_full,
-            "NAK_END": nak_end,
-            "KARANA": karana,
-            "KARANA_END": self.karana_end_str,
-            "YOGA": yoga_name,
-            "YOGA_END": self.yoga_end_str,
-            "PLANETS": sidereal_positions
-        })
-
-
-        # 🔎 Final debug preview
-        print("\n📋 Panchanga Preview")
-        print("====================================")
-        for key, val in chart_dict.items():
-            if key in ("chart_data", "PLANETS"):   # skip both
-                continue
-            print(f"{key:12s}: {val}")
-        print("====================================")
-        
-        for planet, lon in chart_dict["PLANETS"].items():
-            dms_str, abs_lon, sign = self.get_sign_and_abs(lon)
-            suffix = planet_map[planet]   # e.g. "Su", "Mo", "Asc"
-
-            chart_dict[f"LONG_{suffix}"] = dms_str          # Column 2 → D:M:S string
-            chart_dict[f"ABS_{suffix}"]  = f"{abs_lon:.4f}" # Column 3 → raw float longitude
-            chart_dict[f"SIGN_{suffix}"] = sign             # Column 4 → zodiac sign abbreviation
-        print("\nPLANET POSITIONS")
-        print("========================================================")
-        for planet, suffix in planet_map.items():
-            print(f"{planet:10s} | LONG={chart_dict.get(f'LONG_{suffix}', '')} "
-                f"| ABS={chart_dict.get(f'ABS_{suffix}', '')} "
-                f"| SIGN={chart_dict.get(f'SIGN_{suffix}', '')}")
-        print("=========================================================")
-
-        return chart_dict
  
-    def get_sidereal_positions(self, jd_ut, flags):
-        
-        positions = {}
-
-        for name, planet in PLANETS.items():
-            planet_pos, ret = swe.calc_ut(jd_ut, swe.MOON, flags)
-            abs_lon = planet_pos[0] % 360   # Moon’s normalized longitude
-            ayanamsa = swe.get_ayanamsa(jd_ut)
-            lon = (planet_pos[0] - ayanamsa) % 360
-            positions[name] = lon   # assign directly to dict
-        return positions
-
     def lookup_city(self, city_name):
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {"q": city_name, "format": "json", "limit": 1}
-        response = requests.get(url, params=params, headers={"User-Agent": "birth-chart-app"})
-        data = response.json()
-        if not data:
-            raise ValueError("City not found")
-
-        lat = float(data[0]["lat"])
-        lon = float(data[0]["lon"])
-
-        tf = TimezoneFinder()
-        tz_string = tf.timezone_at(lat=lat, lng=lon)
-        if tz_string is None:
-            tz_string = tf.closest_timezone_at(lat=lat, lng=lon) or "Etc/GMT"
+        import pytz
 
+        lat, lon, utc_offset, tz_string = geocode.lookup_city(city_name, self.get_geo_cache)
         self.tz = pytz.timezone(tz_string)
-        utc_offset = self.tz.utcoffset(dt.datetime.now()).total_seconds() / 3600
-
         return lat, lon, utc_offset, tz_string
 
+    def get_geo_cache(self):
+        """Geocode cache shared by all lookups, stored under the app's data dir."""
+        with self.geo_cache_lock:   # lookups run on the worker threads
+            if self.geo_cache is None:
+                from birthchart.geocache import GeoCache
+                self.geo_cache = GeoCache(os.path.join(self.user_data_dir, "geocache.sqlite"))
+        return self.geo_cache
+
+    def get_history(self):
+        """Saved charts, stored under the app's data dir."""
+        with self.history_lock:
+            if self.history is None:
+                from birthchart.history import ChartHistory
+                self.history = ChartHistory(os.path.join(self.user_data_dir, "history.sqlite"))
+        return self.history
+
     def get_telugu_year(self,gregorian_year):
-        base_year = 1927  # Prabhava
-        index = (gregorian_year - base_year) % 60
-        return TELUGU_YEAR_NAMES[index]
+        return panchanga.get_telugu_year(gregorian_year)
     
-    def compute_tithi(self, moon_sidereal, sun_sidereal, year, month, day, hour, minute, second, utc_offset):
-        # Current tithi name
-        tithi_angle = (moon_sidereal - sun_sidereal) % 360
-        tithi_index = int(tithi_angle // 12)
-        tithi_name = TITHI_NAMES[tithi_index]
-
-        # Use transitions to find end time and next tithi
-        transitions = self.get_tithi_transitions(year, month, day, hour, minute, second, utc_offset)
-        # Find the first transition where tithi changes
-        current = None
-        next_tithi_name = None
-        tithi_end_time = None
-        for i in range(1, len(transitions)):
-            if transitions[i]["tithi"] != transitions[i-1]["tithi"]:
-                current = transitions[i-1]["tithi"]
-                next_tithi_name = transitions[i]["tithi"]
-                tithi_end_time = transitions[i]["datetime"]
-                break
-
-        # Build message
-        if tithi_end_time and next_tithi_name:
-            tithi_end_message = f"{tithi_name} ends at {tithi_end_time.strftime('%Y-%m-%d %H:%M')}, then {next_tithi_name} begins"
-        else:
-            tithi_end_message = f"{tithi_name} continues all day"
-
-        return tithi_name, tithi_end_time, next_tithi_name, tithi_end_message
+    def compute_tithi(self, moon_sidereal, sun_sidereal, year, month, day, hour, minute, second, utc_offset,
+                      exact=True):
+        return panchanga.compute_tithi(moon_sidereal, sun_sidereal, year, month, day,
+                                       hour, minute, second, utc_offset, exact=exact)
 
     def compute_nakshatra(self, abs_lon, jd_ut, utc_offset):
-        
-        nak_index = int(abs_lon // (360/27))   # which Nakshatra
-        nak_name = NAKSHATRA_NAMES[nak_index]
-        pada_idx = int((abs_lon % (360/27)) // (360/108)) + 1
-        nak_full = f"{nak_name} ({pada_idx})"
-
-        jd_temp = jd_ut
-        nak_end = None
-        while True:
-            jd_temp += 0.01  # step ~15 minutes
-            moon_pos, _ = swe.calc_ut(jd_temp, swe.MOON, flags)
-            ayanamsa = swe.get_ayanamsa(jd_temp)
-            moon_sid = (moon_pos[0] - ayanamsa) % 360
-
-            new_nak_index = int(moon_sid // (360/27))
-            new_pada_idx = int((moon_sid % (360/27)) // (360/108)) + 1
-
-            if new_nak_index != nak_index or new_pada_idx != pada_idx:
-                year, month, day, hour_float = swe.revjul(jd_temp, swe.GREG_CAL)
-                hour = int(hour_float)
-                minute = int((hour_float % 1) * 60)
-                nak_end = datetime(year, month, day, hour, minute)
-                break
-
-        return nak_name, pada_idx, nak_end
+        return panchanga.compute_nakshatra(abs_lon, jd_ut, utc_offset)
 
     def compute_karana(self,moon_sidereal, sun_sidereal):
-        tithi_angle = (moon_sidereal - sun_sidereal) % 360
-        karana_index = int(tithi_angle // 6)
-
-        # KARANA_SEQUENCE = (
-        #     ["Bava", "Balava", "Kaulava", "Taitila", "Garaja", "Vanija", "Vishti"] * 8
-        #     + ["Shakuni", "Chatushpada", "Naga", "Kimstughna"]
-        # )
-        
-        KARANA_SEQUENCE = (
-        ["Kimstughna"]
-        + ["Bava", "Balava", "Kaulava", "Taitila", "Garaja", "Vanija", "Vishti"] * 8
-        + ["Shakuni", "Chatushpada", "Naga"]
-        )
-
-        karana = KARANA_SEQUENCE[karana_index]
-
-        # 🧾 Debug prints
-        # print("\n🔍 Karana Debug")
-        # print(f"🌙 Moon sidereal: {moon_sidereal:.6f}")
-        # print(f"🌞 Sun sidereal: {sun_sidereal:.6f}")
-        # print(f"📐 Tithi angle (Moon - Sun): {tithi_angle:.6f}")
-        # print(f"🔢 Karana index: {karana_index}")
-        # print(f"🪔 Karana resolved: {karana}")
-
-        return karana
+        return panchanga.compute_karana(moon_sidereal, sun_sidereal)
 
     def compute_yoga(self, moon_sidereal, sun_sidereal):
-        yoga_index = int((moon_sidereal + sun_sidereal) % 360 // (360 / 27))
-        return YOGA_NAMES[yoga_index]
-
-    def current_karana_yoga_end(self,t0, sidereal_positions):
-        """
-        Compute current Karana/Yoga names and their end times.
-        t0: datetime (UTC, tz-aware)
-        sidereal_positions: dict with keys including "Sun" and "Moon"
-            Values are sidereal longitudes in degrees.
-        """
-
-        # --- Current angles and rates ---
-        Ls = sidereal_positions["Sun"]   # Sun longitude
-        Lm = sidereal_positions["Moon"]  # Moon longitude
-
-        dLs = 0.9856    # Sun mean daily motion (deg/day)
-        dLm = 13.176    # Moon mean daily motion (deg/day)
-
-        Delta = (Lm - Ls) % 360.0        # Moon - Sun
-        Y     = (Lm + Ls) % 360.0        # Moon + Sun
-        rate_delta = dLm - dLs
-        rate_yoga  = dLm + dLs
-
-        # --- Next boundaries ---
-        karana_step = 6.0
-        yoga_step   = 13.3333333333  # 13°20'
-        next_karana = math.ceil(Delta / karana_step) * karana_step
-        next_yoga   = math.ceil(Y / yoga_step) * yoga_step
-
-        # --- Initial estimates ---
-        d_angle_k = (next_karana - Delta) % 360.0
-        d_angle_y = (next_yoga - Y) % 360.0
-        dt_k_est  = d_angle_k / max(rate_delta, 1e-6)
-        dt_y_est  = d_angle_y / max(rate_yoga, 1e-6)
-
-        # --- Refinement helper ---
-        def refine(lo, hi, boundary, mode="karana"):
-            for _ in range(12):
-                tm = lo + (hi - lo) / 2
-                delta_days = (tm - t0).total_seconds() / 86400.0
-                Ls_m = Ls + dLs * delta_days
-                Lm_m = Lm + dLm * delta_days
-                val = (Lm_m - Ls_m) % 360.0 if mode == "karana" else (Lm_m + Ls_m) % 360.0
-                if val < boundary:
-                    lo = tm
-                else:
-                    hi = tm
-            return hi.replace(tzinfo=timezone.utc)  # attach tzinfo once here
-
-        # --- Refine both ---
-        t_k_end = refine(t0, t0 + timedelta(days=dt_k_est), next_karana, mode="karana")
-        t_y_end = refine(t0, t0 + timedelta(days=dt_y_est), next_yoga, mode="yoga")
-
-        # --- Karana name mapping ---
-        karana_names_cycle = ["Bava", "Balava", "Kaulava", "Taitila",
-                            "Garaja", "Vanija", "Vishti"]
-        fixed_start = ["Kimstughna"]
-        fixed_end   = ["Sakuni", "Chatushpada", "Nagavamsa"]
-
-        half_tithi_index = int(Delta // 6)  # 0–59
-        if half_tithi_index == 0:
-            karana_name = fixed_start[0]
-        elif half_tithi_index >= 57:
-            karana_name = fixed_end[half_tithi_index - 57]
-        else:
-            karana_name = karana_names_cycle[(half_tithi_index - 1) % 7]
-
-        # --- Yoga name mapping ---
-        yoga_names = [
-            "Vishkambha", "Priti", "Ayushman", "Saubhagya", "Shobhana",
-            "Atiganda", "Sukarma", "Dhriti", "Shoola", "Ganda",
-            "Vriddhi", "Dhruva", "Vyaghata", "Harshana", "Vajra",
-            "Siddhi", "Vyatipata", "Variyan", "Parigha", "Shiva",
-            "Siddha", "Sadhya", "Shubha", "Shukla", "Brahma",
-            "Indra", "Vaidhriti"
-        ]
-        yoga_index = int(Y // yoga_step) % 27
-        yoga_name = yoga_names[yoga_index]
+        return panchanga.compute_yoga(moon_sidereal, sun_sidereal)
 
-        return {
-            "karana_name": karana_name,
-            "karana_end": t_k_end,
-            "yoga_name": yoga_name,
-            "yoga_end": t_y_end,
-            "karana_boundary": next_karana,
-            "yoga_boundary": next_yoga
-        }
+    def current_karana_yoga_end(self,t0, sidereal_positions, jd_ut=None):
+        return panchanga.current_karana_yoga_end(t0, sidereal_positions, jd_ut)
 
     def get_tithi_transitions(self, year, month, day, hour, minute, second, utc_offset, steps=24):
-        """Compute Tithi transitions for the given day."""
-        jd_start = swe.julday(year, month, day, hour + minute/60 + second/3600)
-        transitions = []
-        for i in range(steps):
-            jd = jd_start + i/24.0  # step in hours
-            moon_lon = swe.calc_ut(jd, swe.MOON)[0][0]
-            sun_lon  = swe.calc_ut(jd, swe.SUN)[0][0]
-            ayanamsa = swe.get_ayanamsa(jd)
-            moon_sid = (moon_lon - ayanamsa) % 360
-            sun_sid  = (sun_lon - ayanamsa) % 360
-            sep = (moon_sid - sun_sid) % 360
-            tithi_index = int(sep // 12) % len(TITHI_NAMES)
-            tithi_name  = TITHI_NAMES[tithi_index]
-            dt = swe.revjul(jd, swe.GREG_CAL)
-            dt_obj = datetime(dt[0], dt[1], dt[2], int((dt[3])%24), int((dt[3]%1)*60))
-            transitions.append({"tithi": tithi_name, "datetime": dt_obj})
-        return transitions
-    
-    def get_sign_and_abs(self,lon: float):
-        """
-        Given a planet's longitude (0–360), return:
-        - dms_str: degrees, minutes, seconds within its sign (e.g. '21°14\'32.34"')
-        - abs_lon: absolute longitude float (e.g. 171.1234)
-        - sign: zodiac sign abbreviation (e.g. 'Vi')
-        """
-        # Absolute longitude float
-        abs_lon = lon
-
-        # Degrees within the sign
-        deg = int(lon % 30)
-        # Minutes within the degree
-        mins = int((lon * 60) % 60)
-        # Seconds within the minute (fractional)
-        secs = (lon * 3600) % 60
-
-        # Format D:M:S string
-        dms_str = f"{deg}°{mins:02d}'{secs:05.2f}\""
-
-        # Zodiac sign abbreviation
-        sign_index = int(lon // 30)
-        sign = ZODIAC[sign_index]
-
-        return dms_str, abs_lon, sign
+        return panchanga.get_tithi_transitions(year, month, day, hour, minute, second, utc_offset, steps)
 
+    def get_sign_and_abs(self,lon: float):
+        return chart_core.get_sign_and_abs(lon)
 
 if __name__ == "__main__":
 
@@ -0,0 +1 @@
+"""Chart computation helpers used by the Panchanga app."""
@@ -0,0 +1,219 @@
+"""
+Panchanga calendar: tithi, nakshatra, yoga and karana with their start and
+end times for every day of a year at one place.
+
+    python -m birthchart.almanac 2026 Hyderabad --csv 2026.csv --pdf 2026.pdf
+
+Each limb is walked forward once over the whole range: the end of one
+nakshatra is the start of the next, and the next boundary is solved from
+the previous one with that crossing's rate as the first guess, so every
+boundary is solved exactly once. Tithi boundaries are every second karana
+boundary and are taken from the karana walk instead of being solved again.
+All walks sample one SunMoonCache, so every boundary comes from the same
+sidereal positions the charts use.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+from collections import deque, namedtuple
+from datetime import date, datetime, timedelta
+
+import swisseph as swe
+
+from birthchart.chart import WEEKDAY_NAMES
+from birthchart.ephemeris import default_context
+from birthchart.panchanga import (
+    KARANA_SEQUENCE, KARANA_SPAN, NAKSHATRA_NAMES, NAKSHATRA_SPAN, TITHI_NAMES, YOGA_NAMES, YOGA_SPAN,
+    SunMoonCache, datetime_to_jd, jd_to_datetime, solve_crossing,
+)
+
+LOOKBACK = 2.0      # days before the first midnight the walks start; longer than any limb
+
+# One limb occurrence; start and end are local (tz-aware) datetimes
+Span = namedtuple("Span", "index name start end")
+CalendarDay = namedtuple("CalendarDay", "date weekday sunrise sunset tithi nakshatra yoga karana")
+LIMBS = ("tithi", "nakshatra", "yoga", "karana")
+
+CSV_HEADER = ["date", "weekday", "sunrise", "sunset", "limb", "name", "start", "end"]
+
+
+def walk_boundaries(sample, span, jd_start):
+    """
+    Yield (index, start_jd, end_jd) for consecutive limbs of ``span``
+    degrees of an increasing angle, sample(jd) -> (angle, rate), beginning
+    with the first limb that starts after ``jd_start``.
+    """
+    count = round(360 / span)
+    angle, rate = sample(jd_start)
+    k = int(angle // span) + 1      # number of the next boundary
+    start, rate, _ = solve_crossing(sample, jd_start, angle, k * span % 360, rate)
+    while True:
+        end, rate, _ = solve_crossing(sample, start, k * span % 360, (k + 1) * span % 360, rate)
+        yield k % count, start, end
+        k += 1
+        start = end
+
+
+def tithis_from_karanas(karanas):
+    """Pair the karana walk into tithis: karanas 2i and 2i + 1 make tithi i."""
+    start = None
+    for index, k_start, k_end in karanas:
+        if index % 2 == 0:
+            start = k_start
+        elif start is not None:
+            yield index // 2, start, k_end
+
+
+class _LimbTrack:
+    """Spans of one limb pulled from its walk as the days advance."""
+
+    def __init__(self, walk, names, to_local):
+        self.walk = walk
+        self.names = names
+        self.to_local = to_local
+        self.pending = deque()
+
+    def between(self, jd_from, jd_to):
+        """The limbs overlapping [jd_from, jd_to), as Spans."""
+        while not self.pending or self.pending[-1][2] < jd_to:
+            self.pending.append(next(self.walk))
+        while self.pending[0][2] <= jd_from:
+            self.pending.popleft()
+        return tuple(Span(index, self.names[index], self.to_local(start), self.to_local(end))
+                     for index, start, end in self.pending if start < jd_to)
+
+
+def _sun_event(ctx, jd_ut, lat, lon, event):
+    result, times = ctx.rise_trans(jd_ut, swe.SUN, event, (lon, lat, 0.0))
+    return times[0] if result == 0 else None    # None: the Sun does not rise/set that day
+
+
+def panchanga_calendar(first_day, last_day, lat, lon, tz_string, ephemeris=None):
+    """
+    Yield a CalendarDay for each local date from ``first_day`` to
+    ``last_day`` inclusive. Each limb field is a tuple of the Spans that
+    overlap that civil day (midnight to midnight), in order; sunrise and
+    sunset are local datetimes, or None where the Sun doesn't rise or set.
+    ``ephemeris`` is an EphemerisContext (default Lahiri).
+    """
+    import pytz
+
+    ctx = ephemeris if ephemeris is not None else default_context()
+    tz = pytz.timezone(tz_string)
+
+    def midnight(day):
+        return datetime_to_jd(tz.localize(datetime(day.year, day.month, day.day)))
+
+    def to_local(jd):
+        return pytz.utc.localize(jd_to_datetime(jd)).astimezone(tz)
+
+    cache = SunMoonCache(ctx)
+    jd_start = midnight(first_day) - LOOKBACK
+    karanas, karana_pairs = itertools.tee(walk_boundaries(cache.elongation, KARANA_SPAN, jd_start))
+    tracks = (
+        _LimbTrack(tithis_from_karanas(karana_pairs), TITHI_NAMES, to_local),
+        _LimbTrack(walk_boundaries(cache.moon, NAKSHATRA_SPAN, jd_start), NAKSHATRA_NAMES, to_local),
+        _LimbTrack(walk_boundaries(cache.yoga_angle, YOGA_SPAN, jd_start), YOGA_NAMES, to_local),
+        _LimbTrack(karanas, KARANA_SEQUENCE, to_local),
+    )
+
+    day = first_day
+    jd_from = midnight(day)
+    while day <= last_day:
+        jd_to = midnight(day + timedelta(days=1))
+        sunrise = _sun_event(ctx, jd_from, lat, lon, swe.CALC_RISE)
+        sunset = _sun_event(ctx, jd_from, lat, lon, swe.CALC_SET)
+        yield CalendarDay(
+            day, WEEKDAY_NAMES[day.weekday()],
+            to_local(sunrise) if sunrise is not None else None,
+            to_local(sunset) if sunset is not None else None,
+            *(track.between(jd_from, jd_to) for track in tracks))
+        day += timedelta(days=1)
+        jd_from = jd_to
+
+
+def year_calendar(year, lat, lon, tz_string, ephemeris=None):
+    """panchanga_calendar() for 1 January to 31 December of ``year``."""
+    return panchanga_calendar(date(year, 1, 1), date(year, 12, 31), lat, lon, tz_string, ephemeris)
+
+
+def _time(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value is not None else ""
+
+
+def csv_rows(days):
+    """One row per limb occurrence per day, under CSV_HEADER."""
+    for day in days:
+        head = [day.date.isoformat(), day.weekday, _time(day.sunrise), _time(day.sunset)]
+        for limb in LIMBS:
+            for span in getattr(day, limb):
+                yield head + [limb, span.name, _time(span.start), _time(span.end)]
+
+
+def day_json(day):
+    out = {"date": day.date.isoformat(), "weekday": day.weekday,
+           "sunrise": _time(day.sunrise), "sunset": _time(day.sunset)}
+    for limb in LIMBS:
+        out[limb] = [{"name": s.name, "start": _time(s.start), "end": _time(s.end)}
+                     for s in getattr(day, limb)]
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m birthchart.almanac", description=__doc__.split("\n\n")[0])
+    parser.add_argument("year", type=int)
+    parser.add_argument("city", help="place name (looked up unless --lat/--lon/--tz are given)")
+    parser.add_argument("--lat", type=float)
+    parser.add_argument("--lon", type=float)
+    parser.add_argument("--tz", help="IANA time zone, e.g. Asia/Kolkata")
+    parser.add_argument("--csv", help="write CSV rows here ('-' for stdout)")
+    parser.add_argument("--jsonl", help="write one JSON object per day here ('-' for stdout)")
+    parser.add_argument("--pdf", help="write a page per month here")
+    args = parser.parse_args(argv)
+
+    if args.lat is not None and args.lon is not None and args.tz:
+        lat, lon, tz_string = args.lat, args.lon, args.tz
+    else:
+        from birthchart import geocode
+
+        lat, lon, tz_string = geocode.resolve_city(args.city)
+    if not (args.csv or args.jsonl or args.pdf):
+        args.csv = "-"
+
+    def open_output(path):
+        return sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+
+    # The year is walked once; each day goes to every requested output as it is produced
+    csv_fh = open_output(args.csv) if args.csv else None
+    jsonl_fh = open_output(args.jsonl) if args.jsonl else None
+    book = None
+    if args.pdf:
+        from birthchart.pdf import CalendarPdfWriter
+
+        book = CalendarPdfWriter(args.pdf, f"Panchanga {args.year} – {args.city}")
+    try:
+        rows = None
+        if csv_fh is not None:
+            rows = csv.writer(csv_fh)
+            rows.writerow(CSV_HEADER)
+        for day in year_calendar(args.year, lat, lon, tz_string):
+            if rows is not None:
+                rows.writerows(csv_rows([day]))
+            if jsonl_fh is not None:
+                jsonl_fh.write(json.dumps(day_json(day), ensure_ascii=False) + "\n")
+            if book is not None:
+                book.add(day)
+    finally:
+        if book is not None:
+            book.close()
+        for fh in (csv_fh, jsonl_fh):
+            if fh is not None and fh is not sys.stdout:
+                fh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Vectorized chart computation for bulk jobs.
+
+    from birthchart.batch import compute_charts
+    result = compute_charts([(datetime(1985, 7, 14, 10, 25, 30), 17.385, 78.4867, "Asia/Kolkata"), ...])
+    result["nakshatra"]      # int8 array, one entry per record
+
+Datetimes are local wall-clock times in the record's IANA timezone and
+are converted with the offset in force at that instant. Graha longitudes
+come from the Chebyshev tables in one NumPy pass per body when they are
+built (Swiss Ephemeris per record otherwise); only the ascendant needs a
+Swiss Ephemeris call per record. The sign, nakshatra, tithi, yoga and
+karana classification is done on whole arrays.
+
+Requires numpy.
+"""
+
+from datetime import timezone
+
+import numpy as np
+import swisseph as swe
+
+from birthchart.chart import utc_offset_at
+from birthchart.chebyshev import default_ephemeris
+from birthchart.ephemeris import default_context
+
+PLANETS = ("Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu", "Ascendant")
+
+_SWE_BODIES = {
+    "Sun": swe.SUN, "Moon": swe.MOON, "Mars": swe.MARS, "Mercury": swe.MERCURY,
+    "Jupiter": swe.JUPITER, "Venus": swe.VENUS, "Saturn": swe.SATURN, "Rahu": swe.MEAN_NODE,
+}
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = 360.0 / 108
+
+_UNIX_EPOCH_JD = 2440587.5
+
+
+def julian_days(datetimes, tzs):
+    """
+    UT Julian days for local naive datetimes in the given IANA zones, with
+    the offset chart.utc_offset_at() gives, as compute_chart() uses.
+    """
+    stamps = np.empty(len(datetimes), dtype=np.float64)
+    for i, (local, tz) in enumerate(zip(datetimes, tzs)):
+        if local.tzinfo is None:
+            stamps[i] = local.replace(tzinfo=timezone.utc).timestamp() - utc_offset_at(tz, local) * 3600.0
+        else:
+            stamps[i] = local.timestamp()
+    return stamps / 86400.0 + _UNIX_EPOCH_JD
+
+
+def sidereal_longitudes(jd_ut, lats, lons, ephemeris=None):
+    """
+    (n, 10) array of sidereal longitudes in PLANETS order, for the ayanamsa
+    of ``ephemeris`` (an EphemerisContext, default Lahiri).
+    """
+    ctx = ephemeris if ephemeris is not None else default_context()
+    flags = ctx.flags | swe.FLG_SIDEREAL
+    n = len(jd_ut)
+    out = np.empty((n, len(PLANETS)), dtype=np.float64)
+    eph = default_ephemeris()
+    if eph is not None and eph.sid_mode != ctx.ayanamsa:
+        eph = None
+    lo, hi = float(jd_ut.min()), float(jd_ut.max())
+
+    # One session for the per-record loops rather than a lock round trip per call
+    with ctx.session():
+        for col, name in enumerate(PLANETS[:8]):
+            body = _SWE_BODIES[name]
+            if eph is not None and eph.covers(lo, body) and eph.covers(hi, body):
+                out[:, col] = eph.longitudes(jd_ut, body)
+            else:
+                out[:, col] = [swe.calc_ut(jd, body, flags)[0][0] for jd in jd_ut.tolist()]
+        out[:, 8] = out[:, 7] + 180.0
+
+        for i, (jd, lat, lon) in enumerate(zip(jd_ut.tolist(), lats, lons)):
+            _, ascmc = swe.houses(jd, lat, lon, b'P')
+            out[i, 9] = ascmc[0] - swe.get_ayanamsa(jd)
+    return out % 360.0
+
+
+def classify(longitudes):
+    """
+    Sign, nakshatra, pada, tithi, yoga and karana indices from an (n, 10)
+    longitude array, as a dict of small-integer arrays. ``karana`` is the
+    half-tithi index 0-59 (the app maps it through KARANA_SEQUENCE).
+    """
+    sun = longitudes[:, 0]
+    moon = longitudes[:, 1]
+    elong = (moon - sun) % 360.0
+    return {
+        "signs": (longitudes // 30.0).astype(np.int8),
+        "nakshatra": (moon // NAKSHATRA_SPAN).astype(np.int8),
+        "pada": ((moon % NAKSHATRA_SPAN) // PADA_SPAN + 1).astype(np.int8),
+        "tithi": (elong // 12.0).astype(np.int8),
+        "yoga": (((moon + sun) % 360.0) // NAKSHATRA_SPAN).astype(np.int8),
+        "karana": (elong // 6.0).astype(np.int8),
+    }
+
+
+def compute_charts(records, ephemeris=None):
+    """
+    Compute many charts at once. ``records`` is a sequence of
+    (local datetime, lat, lon, tz_string). Returns a dict of NumPy arrays:
+    ``jd_ut``, ``longitudes`` (n x 10, PLANETS order) and the indices
+    from classify(). ``ephemeris`` is an EphemerisContext (default Lahiri).
+    """
+    if not len(records):
+        raise ValueError("No records given")
+    datetimes, lats, lons, tzs = zip(*records)
+    jd_ut = julian_days(datetimes, tzs)
+    longitudes = sidereal_longitudes(jd_ut, lats, lons, ephemeris)
+    result = {"jd_ut": jd_ut, "longitudes": longitudes}
+    result.update(classify(longitudes))
+    return result
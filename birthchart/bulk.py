@@ -0,0 +1,267 @@
+"""
+Charts (and optionally PDFs) for a file of birth records, over a process pool.
+
+    python -m birthchart.bulk records.csv -o charts.jsonl [--pdf-dir pdfs | --pdf-book charts.pdf]
+                              [--results charts.bin]
+
+Records are CSV (header row) or JSONL with ``name``, ``dob`` (YYYY-MM-DD),
+``tob`` (HH:MM:SS) and ``city``; optional ``id`` (defaults to the record's
+position in the file) and ``lat``/``lon``/``tz`` to skip geocoding. Each
+result is one JSON line holding the generate_birth_chart fields, or
+``{"id": ..., "error": ...}``. ``--pdf-dir`` writes one PDF per record from
+the workers; ``--pdf-book`` streams every chart of this run into one
+multi-page PDF (or volumes of ``--pages-per-file`` pages) from the parent.
+``--results`` stores this run's charts as packed ChartResult records
+(chart.read_results() loads them back), about 190 bytes each.
+
+The output file is the checkpoint: it is flushed as results arrive, and a
+rerun with ``--resume`` skips every id that already has a chart in it. A
+torn last line from a crash and the error lines are dropped first, so
+records that failed (a network error while geocoding, say) are retried
+and each id ends up with one line. At most ``--in-flight`` records are queued at a
+time, so memory stays flat however large the input is.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from birthchart import instrument
+from birthchart.chart import AYANAMSA, RESULTS_MAGIC, ChartResult, compute_chart
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode
+
+LOG_EVERY = 1000      # records between progress lines
+
+_worker = {}    # per-process state set up by _init_worker
+
+
+def read_records(path):
+    """Yield (id, record dict) from a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith((".jsonl", ".ndjson", ".json")):
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            rows = csv.DictReader(fh)
+        for i, row in enumerate(rows, 1):
+            record_id = str(row.get("id") or i)
+            yield record_id, row
+
+
+def completed_ids(out_path):
+    """
+    Ids with a chart in ``out_path``, for a resumed run. A torn final line
+    from a crash is truncated and error lines are dropped, so those records
+    are computed again and their new line takes the old one's place.
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    good = 0
+    failed = False
+    with open(out_path, "rb") as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+                record_id = str(entry["id"])
+            except (ValueError, KeyError):
+                break
+            if "error" in entry:
+                failed = True
+            else:
+                done.add(record_id)
+            good += len(line)
+    if failed:
+        _drop_errors(out_path, good)
+    elif good != os.path.getsize(out_path):
+        with open(out_path, "r+b") as fh:
+            fh.truncate(good)
+    return done
+
+
+def _drop_errors(out_path, size):
+    """Rewrite the first ``size`` bytes of ``out_path`` without its error lines, atomically."""
+    tmp = out_path + ".tmp"
+    with open(out_path, "rb") as src, open(tmp, "wb") as dst:
+        for line in src:
+            if size <= 0:
+                break
+            size -= len(line)
+            if "error" not in json.loads(line):
+                dst.write(line)
+    os.replace(tmp, out_path)
+
+
+def _init_worker(ephe_path, pdf_dir, geocache_path, return_chart=False, ayanamsa=AYANAMSA):
+    """Per-process setup: ephemeris context, data files, geocode cache."""
+    from birthchart.chebyshev import default_ephemeris
+    from birthchart.gazetteer import default_gazetteer
+    from birthchart.geocache import GeoCache
+
+    _worker["ephemeris"] = EphemerisContext(ayanamsa, ephe_path=ephe_path or None)
+    default_ephemeris()
+    default_gazetteer()
+    _worker["cache"] = GeoCache(geocache_path)
+    _worker["pdf_dir"] = pdf_dir
+    _worker["return_chart"] = return_chart
+
+
+def _lookup(row):
+    from birthchart import geocode
+
+    if row.get("lat") not in (None, "") and row.get("tz"):
+        tz = row["tz"]
+        return lambda city: (float(row["lat"]), float(row["lon"]), geocode.utc_offset_now(tz), tz)
+    return lambda city: geocode.lookup_city(city, _worker["cache"])
+
+
+def _pdf_name(record_id, name):
+    return re.sub(r"[^\w.-]+", "_", f"{record_id}_{name}").strip("_") + "_birth_chart.pdf"
+
+
+def process_record(record_id, row):
+    """Worker entry point: (id, JSON line, seconds, ok, packed ChartResult if the parent wants it)."""
+    start = time.perf_counter()
+    chart = None
+    try:
+        with instrument.trace("record"):
+            result = compute_chart(row["name"], row["dob"], row["tob"], row["city"], _lookup(row),
+                                   ephemeris=_worker["ephemeris"])
+            if _worker.get("pdf_dir"):
+                from birthchart import pdf
+
+                path = os.path.join(_worker["pdf_dir"], _pdf_name(record_id, row["name"]))
+                pdf_path = pdf.write_chart_pdf(result, path)
+        line = {"id": record_id}
+        line.update(result.as_json())
+        if _worker.get("pdf_dir"):
+            line["pdf"] = pdf_path
+        if _worker.get("return_chart"):
+            chart = result.pack()
+    except Exception as e:
+        line = {"id": record_id, "error": f"{type(e).__name__}: {e}"}
+    ok = "error" not in line
+    return record_id, json.dumps(line, ensure_ascii=False), time.perf_counter() - start, ok, chart
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run(source, out_path, workers=None, in_flight=None, pdf_dir=None, ephe_path=None,
+        geocache_path=None, resume=False, log=sys.stderr, pdf_book=None, pages_per_file=None,
+        results_path=None, ayanamsa=AYANAMSA):
+    """
+    Process ``source`` into ``out_path``; returns the summary dict.
+    ``pdf_book`` and ``results_path`` hold only this run's charts, so they
+    can't be combined with ``resume``.
+    """
+    if resume and (pdf_book or results_path):
+        raise ValueError("resume can't be combined with pdf_book or results_path")
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or workers * 4
+    done = completed_ids(out_path) if resume else set()
+    if pdf_dir:
+        os.makedirs(pdf_dir, exist_ok=True)
+
+    book = None
+    if pdf_book:
+        from birthchart.pdf import ChartPdfWriter
+
+        book = ChartPdfWriter(pdf_book, pages_per_file)
+    results = None
+    if results_path:
+        results = open(results_path, "wb")
+        results.write(RESULTS_MAGIC)
+
+    timings = []
+    errors = 0
+    next_log = LOG_EVERY
+    records = ((rid, row) for rid, row in read_records(source) if rid not in done)
+    start = time.perf_counter()
+    with open(out_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(ephe_path, pdf_dir, geocache_path,
+                                          book is not None or results is not None, ayanamsa)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < in_flight:
+                item = next(records, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(process_record, *item))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                _, line, seconds, ok, chart = future.result()
+                out.write(line + "\n")
+                timings.append(seconds)
+                errors += not ok
+                if chart is not None and results is not None:
+                    results.write(chart)
+                if chart is not None and book is not None:
+                    book.add(ChartResult.unpack(chart))
+            out.flush()
+            if log is not None and len(timings) >= next_log:
+                next_log += LOG_EVERY
+                print(f"{len(timings)} records, {len(timings) / (time.perf_counter() - start):.0f}/s",
+                      file=log)
+
+    if book is not None:
+        book.close()
+    if results is not None:
+        results.close()
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "records": len(timings),
+        "skipped": len(done),
+        "errors": errors,
+        "seconds": elapsed,
+        "records_per_second": len(timings) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(timings, 0.50) * 1000,
+        "p99_ms": _percentile(timings, 0.99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m birthchart.bulk", description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help="CSV or JSONL birth records")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results (also the checkpoint)")
+    parser.add_argument("--pdf-dir", help="also write one PDF per record here")
+    parser.add_argument("--pdf-book", help="also write this run's charts into one multi-page PDF")
+    parser.add_argument("--pages-per-file", type=int, help="split --pdf-book into numbered files")
+    parser.add_argument("--results", help="also write this run's charts as packed binary records")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--in-flight", type=int, help="max queued records (default: 4 per worker)")
+    parser.add_argument("--ephe-path", help="Swiss Ephemeris data directory")
+    parser.add_argument("--ayanamsa", default="lahiri", help="e.g. lahiri, raman, krishnamurti (default lahiri)")
+    parser.add_argument("--geocache", help="SQLite geocode cache shared by the workers")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip ids that have a chart in the output; failed ones are retried")
+    args = parser.parse_args(argv)
+    if args.resume and (args.pdf_book or args.results):
+        parser.error("--resume can't be combined with --pdf-book or --results, "
+                     "which would be rewritten with only the resumed records")
+
+    summary = run(args.source, args.output, args.workers, args.in_flight, args.pdf_dir,
+                  args.ephe_path, args.geocache, args.resume,
+                  pdf_book=args.pdf_book, pages_per_file=args.pages_per_file, results_path=args.results,
+                  ayanamsa=ayanamsa_mode(args.ayanamsa))
+    print(f"{summary['records']} records ({summary['errors']} errors, {summary['skipped']} skipped) "
+          f"in {summary['seconds']:.1f} s: {summary['records_per_second']:.0f} records/s, "
+          f"p50 {summary['p50_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms per record")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
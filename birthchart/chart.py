@@ -0,0 +1,500 @@
+"""
+Birth chart computation: sidereal positions and the ChartResult shown by
+the app and written to the PDF. Nothing here imports Kivy, reportlab or
+the network stack.
+"""
+
+import functools
+import logging
+import struct
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+import swisseph as swe
+
+from birthchart import instrument
+from birthchart.chebyshev import calc_lon
+from birthchart.ephemeris import default_context
+from birthchart.gazetteer import normalize_name
+from birthchart.panchanga import (
+    KARANA_SEQUENCE, NAKSHATRA_NAMES, TITHI_NAMES, YOGA_NAMES,
+    PanchangaEngine, get_telugu_year, jd_to_datetime,
+)
+
+ZODIAC = ["Ar","Ta","Ge","Cn","Le","Vi","Li","Sc","Sg","Cp","Aq","Pi"]
+
+SIGNS = ["Aries","Taurus","Gemini","Cancer","Leo","Virgo",
+         "Libra","Scorpio","Sagittarius","Capricorn","Aquarius","Pisces"]
+
+SIGN_RANGES = {
+    "Ar": (0.0, 29.9999),    # Aries
+    "Ta": (30.0, 59.9999),   # Taurus
+    "Ge": (60.0, 89.9999),   # Gemini
+    "Cn": (90.0, 119.9999),  # Cancer
+    "Le": (120.0, 149.9999), # Leo
+    "Vi": (150.0, 179.9999), # Virgo
+    "Li": (180.0, 209.9999), # Libra
+    "Sc": (210.0, 239.9999), # Scorpio
+    "Sg": (240.0, 269.9999), # Sagittarius
+    "Cp": (270.0, 299.9999), # Capricorn
+    "Aq": (300.0, 329.9999), # Aquarius
+    "Pi": (330.0, 359.9999)  # Pisces
+}
+
+log = logging.getLogger(__name__)
+
+WEEKDAY_NAMES = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+
+planet_abbr = {
+    "Sun":"Su","Moon":"Mo","Mars":"Ma","Mercury":"Me",
+    "Jupiter":"Ju","Venus":"Ve","Saturn":"Sa",
+    "Rahu":"Ra","Ketu":"Ke","Ascendant":"Asc"
+}
+planet_map = {
+                "Sun": "Su", "Moon": "Mo", "Mercury": "Me", "Venus": "Ve",
+                "Mars": "Ma", "Jupiter": "Ju", "Saturn": "Sa",
+                "Rahu": "Ra", "Ketu": "Ke", "Ascendant": "Asc"
+}
+
+# Display order for the planet table
+PLANET_ROWS = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Rahu", "Ketu", "Ascendant"]
+
+# Order of ChartResult.longitudes, which is the order sidereal_positions() returns
+POSITION_ORDER = ("Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu", "Ascendant")
+
+AYANAMSA = swe.SIDM_LAHIRI
+
+# Normalized inputs of a chart: two requests with equal keys give the same chart
+ChartKey = namedtuple("ChartKey", "name dob tob place ayanamsa")
+
+
+def julian_day_ut(dob, tob, utc_offset):
+    """UT Julian day for local "YYYY-MM-DD" / "HH:MM:SS" strings."""
+    dt_obj = datetime.combine(datetime.strptime(dob, "%Y-%m-%d").date(),
+                              datetime.strptime(tob, "%H:%M:%S").time())
+    jd_local = swe.julday(
+        dt_obj.year, dt_obj.month, dt_obj.day,
+        dt_obj.hour + dt_obj.minute / 60 + dt_obj.second / 3600,
+        swe.GREG_CAL
+    )
+    return jd_local - (utc_offset / 24.0)
+
+
+def sidereal_positions(jd_ut, lat, lon, ephemeris=None):
+    """
+    Sidereal longitudes of the grahas and the ascendant, for the ayanamsa
+    of ``ephemeris`` (an EphemerisContext, default Lahiri).
+    """
+    ctx = ephemeris if ephemeris is not None else default_context()
+
+    with instrument.span("planets"):
+        rahu = calc_lon(jd_ut, swe.MEAN_NODE, ctx) % 360
+        positions = {
+            "Sun":      calc_lon(jd_ut, swe.SUN, ctx)     % 360,
+            "Moon":     calc_lon(jd_ut, swe.MOON, ctx)    % 360,
+            "Mars":     calc_lon(jd_ut, swe.MARS, ctx)    % 360,
+            "Mercury":  calc_lon(jd_ut, swe.MERCURY, ctx) % 360,
+            "Jupiter":  calc_lon(jd_ut, swe.JUPITER, ctx) % 360,
+            "Venus":    calc_lon(jd_ut, swe.VENUS, ctx)   % 360,
+            "Saturn":   calc_lon(jd_ut, swe.SATURN, ctx)  % 360,
+            "Rahu":     rahu,
+            "Ketu":     (rahu + 180) % 360,
+        }
+
+    # Houses and Ascendant
+    with instrument.span("houses"):
+        positions["Ascendant"] = ctx.ascendant(jd_ut, lat, lon, b'P')
+        instrument.count("ephemeris", 2)
+    return positions
+
+
+def get_sign_and_abs(lon: float):
+    """
+    Given a planet's longitude (0–360), return:
+    - dms_str: degrees, minutes, seconds within its sign (e.g. '21°14\'32.34"')
+    - abs_lon: absolute longitude float (e.g. 171.1234)
+    - sign: zodiac sign abbreviation (e.g. 'Vi')
+    """
+    # Absolute longitude float
+    abs_lon = lon
+
+    # Degrees within the sign
+    deg = int(lon % 30)
+    # Minutes within the degree
+    mins = int((lon * 60) % 60)
+    # Seconds within the minute (fractional)
+    secs = (lon * 3600) % 60
+
+    # Format D:M:S string
+    dms_str = f"{deg}°{mins:02d}'{secs:05.2f}\""
+
+    # Zodiac sign abbreviation
+    sign_index = int(lon // 30)
+    sign = ZODIAC[sign_index]
+
+    return dms_str, abs_lon, sign
+
+
+@functools.lru_cache(maxsize=None)
+def _timezone(tz_string):
+    import pytz
+
+    return pytz.timezone(tz_string)
+
+
+def utc_offset_at(tz_string, local):
+    """
+    Hours east of UT in the zone ``tz_string`` at the naive local datetime
+    ``local``: the offset in force then, with DST and any historical change
+    of the zone's offset. A time repeated when clocks go back takes the
+    first (summer) offset. Uses zoneinfo, whose rules, unlike pytz's,
+    continue past 2037 and keep seconds of local mean time.
+    """
+    from zoneinfo import ZoneInfo
+
+    return local.replace(tzinfo=ZoneInfo(tz_string)).utcoffset().total_seconds() / 3600
+
+
+def _end_string(jd, tz_string):
+    """A UT end time as the app shows it: local, "14-Jul-1985 03:12 PM IST"."""
+    local = jd_to_datetime(jd).replace(tzinfo=timezone.utc).astimezone(_timezone(tz_string))
+    return local, local.strftime("%d-%b-%Y %I:%M %p IST")
+
+
+def _yoga_end(r):
+    local, text = _end_string(r.yoga_end, r.tz_string)
+    if local.date() > datetime.strptime(r.dob, "%Y-%m-%d").date():
+        text += " (continues to next day)"
+    return text
+
+
+# Chart dict label -> display value of a ChartResult, in the dict's order
+_INFO = {
+    "NAME": lambda r: r.name,
+    "DATE": lambda r: r.dob,
+    "TIME": lambda r: r.tob,
+    "PLACE": lambda r: r.place,
+    "WEEKDAY": lambda r: datetime.strptime(r.dob, "%Y-%m-%d").strftime("%A"),
+    "LAT": lambda r: r.lat,
+    "LONG": lambda r: r.lon,
+    "TELUGU_YEAR": lambda r: get_telugu_year(int(r.dob[:4])),
+    "TITHI": lambda r: TITHI_NAMES[r.tithi],
+    "TITHI_END": lambda r: jd_to_datetime(r.tithi_end + r.utc_offset / 24.0),
+    "NAKSHATRA": lambda r: f"{NAKSHATRA_NAMES[r.nakshatra]} (Pada {r.pada})",
+    "NAK_END": lambda r: jd_to_datetime(r.pada_end),
+    "KARANA": lambda r: KARANA_SEQUENCE[r.karana],
+    "KARANA_END": lambda r: _end_string(r.karana_end, r.tz_string)[1],
+    "YOGA": lambda r: YOGA_NAMES[r.yoga],
+    "YOGA_END": _yoga_end,
+}
+INFO_LABELS = tuple(_INFO)
+
+# lat lon utc_offset jd_ut, 10 longitudes, 4 end times, tithi nakshatra pada karana yoga ayanamsa,
+# year month day hour minute second, then the byte lengths of name, place and tz
+_RECORD = struct.Struct("<4d10d4d6BH5B3H")
+RESULTS_MAGIC = b"BCR1"
+
+
+class ChartResult:
+    """
+    One computed chart as raw numbers: longitudes (POSITION_ORDER) in an
+    array of doubles, tithi/nakshatra/pada/karana/yoga as indices, and
+    their end times as UT Julian days. Display strings are only made when
+    asked for, by info(), planet() or the legacy ``chart`` dict.
+    ``ayanamsa`` is the swe.SIDM_* mode the longitudes were computed in.
+    """
+
+    __slots__ = ("name", "dob", "tob", "place", "lat", "lon", "utc_offset", "tz_string", "jd_ut",
+                 "longitudes", "tithi", "tithi_end", "nakshatra", "pada", "pada_end",
+                 "karana", "karana_end", "yoga", "yoga_end", "ayanamsa", "_key", "_chart")
+
+    def __init__(self, name, dob, tob, place, lat, lon, utc_offset, tz_string, jd_ut, longitudes,
+                 tithi, tithi_end, nakshatra, pada, pada_end, karana, karana_end, yoga, yoga_end,
+                 key=None, ayanamsa=AYANAMSA):
+        self.name, self.dob, self.tob, self.place = name, dob, tob, place
+        self.lat, self.lon, self.utc_offset, self.tz_string, self.jd_ut = lat, lon, utc_offset, tz_string, jd_ut
+        self.longitudes = longitudes
+        self.tithi, self.tithi_end = tithi, tithi_end
+        self.nakshatra, self.pada, self.pada_end = nakshatra, pada, pada_end
+        self.karana, self.karana_end = karana, karana_end
+        self.yoga, self.yoga_end = yoga, yoga_end
+        self.ayanamsa = ayanamsa
+        self._key = key
+        self._chart = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = chart_key(self.name, self.dob, self.tob, self.place, self.ayanamsa)
+        return self._key
+
+    @property
+    def positions(self):
+        """Read-only {planet: sidereal longitude}."""
+        return MappingProxyType(dict(zip(POSITION_ORDER, self.longitudes)))
+
+    def longitude(self, planet):
+        return self.longitudes[POSITION_ORDER.index(planet)]
+
+    def info(self, label):
+        """Display value for a chart dict label (INFO_LABELS), e.g. info("KARANA_END")."""
+        return _INFO[label](self)
+
+    def planet(self, planet):
+        """(D:M:S within the sign, absolute longitude to 4 places, sign abbreviation) for one row."""
+        dms_str, abs_lon, sign = get_sign_and_abs(self.longitude(planet))
+        return dms_str, f"{abs_lon:.4f}", sign
+
+    def as_dict(self):
+        """The generate_birth_chart dict: INFO_LABELS, PLANETS and LONG_/ABS_/SIGN_ per planet."""
+        chart = {label: fn(self) for label, fn in _INFO.items()}
+        chart["PLANETS"] = self.positions
+        for planet in POSITION_ORDER:
+            suffix = planet_map[planet]   # e.g. "Su", "Mo", "Asc"
+            chart[f"LONG_{suffix}"], chart[f"ABS_{suffix}"], chart[f"SIGN_{suffix}"] = self.planet(planet)
+        return chart
+
+    def as_json(self):
+        """
+        as_dict() with lowercase keys, datetimes as "YYYY-MM-DD HH:MM:SS"
+        and a plain PLANETS dict, plus tz, utc_offset, jd_ut and ayanamsa.
+        """
+        out = {}
+        for key, value in self.chart.items():
+            if key == "PLANETS":
+                value = dict(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat(sep=" ")
+            out[key.lower()] = value
+        out["tz"] = self.tz_string
+        out["utc_offset"] = self.utc_offset
+        out["jd_ut"] = self.jd_ut
+        out["ayanamsa"] = self.ayanamsa
+        return out
+
+    @property
+    def chart(self):
+        """as_dict() as a read-only mapping, built on first use."""
+        if self._chart is None:
+            self._chart = MappingProxyType(self.as_dict())
+        return self._chart
+
+    def pack(self):
+        """This result as a compact binary record (about 200 bytes); see unpack()."""
+        name, place, tz = (s.encode("utf-8") for s in (self.name, self.place, self.tz_string))
+        year, month, day = (int(x) for x in self.dob.split("-"))
+        hour, minute, second = (int(x) for x in self.tob.split(":"))
+        return _RECORD.pack(
+            self.lat, self.lon, self.utc_offset, self.jd_ut, *self.longitudes,
+            self.tithi_end, self.pada_end, self.karana_end, self.yoga_end,
+            self.tithi, self.nakshatra, self.pada, self.karana, self.yoga, self.ayanamsa,
+            year, month, day, hour, minute, second, len(name), len(place), len(tz),
+        ) + name + place + tz
+
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        """(ChartResult, offset after it) for the record at ``offset`` of ``buffer``."""
+        v = _RECORD.unpack_from(buffer, offset)
+        offset += _RECORD.size
+        strings = []
+        for length in v[30:33]:
+            strings.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+            offset += length
+        name, place, tz_string = strings
+        result = cls(name, "%04d-%02d-%02d" % v[24:27], "%02d:%02d:%02d" % v[27:30], place,
+                     v[0], v[1], v[2], tz_string, v[3], array("d", v[4:14]),
+                     v[18], v[14], v[19], v[20], v[15], v[21], v[16], v[22], v[17], ayanamsa=v[23])
+        return result, offset
+
+    @classmethod
+    def unpack(cls, data):
+        return cls.unpack_from(data)[0]
+
+    def __repr__(self):
+        return f"<ChartResult {self.name!r} {self.dob} {self.tob} {self.place!r}>"
+
+
+def write_results(fh, results):
+    """Write ChartResults to the binary file ``fh`` as one stream; returns how many."""
+    fh.write(RESULTS_MAGIC)
+    n = 0
+    for result in results:
+        fh.write(result.pack())
+        n += 1
+    return n
+
+
+def read_results(fh):
+    """Yield the ChartResults of a write_results() stream from the binary file ``fh``."""
+    if fh.read(len(RESULTS_MAGIC)) != RESULTS_MAGIC:
+        raise ValueError("not a chart results file")
+    while True:
+        head = fh.read(_RECORD.size)
+        if not head:
+            return
+        if len(head) < _RECORD.size:
+            raise ValueError("truncated chart results file")
+        tail = fh.read(sum(_RECORD.unpack(head)[30:33]))
+        yield ChartResult.unpack(head + tail)
+
+
+def solve_chart(name, dob, tob, city, lat, lon, utc_offset, jd_ut, positions, tz_string, key=None,
+                ephemeris=None):
+    """
+    ChartResult for one birth from its sidereal ``positions``, which were
+    computed with ``ephemeris`` (an EphemerisContext, default Lahiri).
+    Each panchanga limb and its end time come from the same solve, so a
+    chart never shows one limb next to another's end time.
+    """
+    ctx = ephemeris if ephemeris is not None else default_context()
+    engine = PanchangaEngine(jd_ut, ctx)      # all limbs and end times share one engine
+
+    with instrument.span("tithi"):
+        tithi = engine.tithi()
+    with instrument.span("nakshatra"):
+        nak = engine.nakshatra()
+    with instrument.span("karana_yoga"):
+        ky = engine.karana_yoga()
+
+    return ChartResult(
+        name, dob, tob, city, lat, lon, utc_offset, tz_string, jd_ut,
+        array("d", (positions[planet] for planet in POSITION_ORDER)),
+        tithi.tithi, tithi.end,
+        nak.nakshatra, nak.pada, nak.pada_end,
+        ky.karana, ky.karana_end,
+        ky.yoga, ky.yoga_end, key, ctx.ayanamsa,
+    )
+
+
+def generate_birth_chart(name, dob, tob, city, lat, lon, utc_offset, jd_ut, sidereal_positions, tz):
+    """
+    Chart dict for one birth. ``tz`` is the place's timezone (a tzinfo or
+    IANA name) used for the karana/yoga end times.
+    """
+    tz_string = tz if isinstance(tz, str) else getattr(tz, "zone", None) or str(tz)
+    chart_dict = solve_chart(name, dob, tob, city, lat, lon, utc_offset, jd_ut,
+                             sidereal_positions, tz_string).as_dict()
+    chart_dict["PLANETS"] = sidereal_positions
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Chart %s", {key: val for key, val in chart_dict.items() if key != "PLANETS"})
+    return chart_dict
+
+
+def chart_key(name, dob, tob, city, ayanamsa=AYANAMSA):
+    """ChartKey for raw inputs: whitespace, date/time padding and place spelling folded."""
+    dob = datetime.strptime(dob.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    tob = datetime.strptime(tob.strip(), "%H:%M:%S").strftime("%H:%M:%S")
+    return ChartKey(" ".join(name.split()), dob, tob, normalize_name(city), ayanamsa)
+
+
+class ChartMemo:
+    """
+    Small thread-safe LRU of ChartResult by ChartKey, optionally in front
+    of a persistent ``store`` with the same get(key) / put(result) (a
+    history.ChartHistory): misses are looked up there and every put is
+    written through.
+    """
+
+    def __init__(self, max_entries=32, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "store_hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+        result = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["store_hits"] += 1
+            self._remember(result)
+        return result
+
+    def put(self, result):
+        with self._lock:
+            self._remember(result)
+        if self.store is not None:
+            self.store.put(result)
+
+    def _remember(self, result):
+        self._entries[result.key] = result
+        self._entries.move_to_end(result.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class Cancelled(Exception):
+    """Raised by compute_chart() at a stage boundary once ``cancel`` is set."""
+
+
+def compute_chart(name, dob, tob, city, lookup=None, progress=None, cancel=None, memo=None,
+                  ephemeris=None):
+    """
+    Full pipeline for one birth: geocode ``city``, compute positions and
+    panchanga, and return a ChartResult. ``lookup`` defaults to geocode.lookup_city and must
+    return (lat, lon, utc_offset, tz_string). The birth time is converted with the offset
+    ``tz_string`` had at that time (utc_offset_at(), as batch.compute_charts() does); the
+    lookup's utc_offset is only used when there is no tz_string.
+
+    ``progress(message)`` is called before each stage and ``cancel`` (a
+    threading.Event) is checked between stages, raising Cancelled. With a
+    ChartMemo, inputs seen before (or in its history store) are answered
+    from it without any lookup or ephemeris call. Stage times and ephemeris calls are recorded in an
+    instrument trace (the caller's, if one is active).
+
+    ``ephemeris`` is the EphemerisContext (ayanamsa, flags, ephemeris
+    path) to compute with, default Lahiri; calls from several threads with
+    different contexts don't affect each other.
+    """
+    with instrument.trace("chart"):
+        return _compute_chart(name, dob, tob, city, lookup, progress, cancel, memo, ephemeris)
+
+
+def _compute_chart(name, dob, tob, city, lookup, progress, cancel, memo, ephemeris):
+    ctx = ephemeris if ephemeris is not None else default_context()
+    key = chart_key(name, dob, tob, city, ctx.ayanamsa)
+    if memo is not None:
+        result = memo.get(key)
+        if result is not None:
+            instrument.count("memo_hit")
+            return result
+    if lookup is None:
+        from birthchart.geocode import lookup_city as lookup
+
+    def stage(message):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(message)
+        if progress is not None:
+            progress(message)
+
+    stage(f"Looking up {city}...")
+    lat, lon, utc_offset, tz_string = lookup(city)
+    if tz_string:
+        # The offset in force at the birth rather than the zone's current one the lookup gives
+        with instrument.span("tz"):
+            utc_offset = utc_offset_at(tz_string, datetime.strptime(f"{dob} {tob}", "%Y-%m-%d %H:%M:%S"))
+    stage("Computing planetary positions...")
+    with instrument.span("julday"):
+        jd_ut = julian_day_ut(dob, tob, utc_offset)
+    positions = sidereal_positions(jd_ut, lat, lon, ctx)
+    stage("Computing panchanga...")
+    result = solve_chart(name, dob, tob, city, lat, lon, utc_offset, jd_ut, positions, tz_string, key, ctx)
+    if memo is not None:
+        memo.put(result)
+    return result
@@ -0,0 +1,218 @@
+"""
+Vimshottari dasha periods from the Moon's sidereal longitude at birth.
+
+    python -m birthchart.dasha 1985-07-14 10:25:30 Hyderabad                # mahadashas and antardashas
+    python -m birthchart.dasha 1985-07-14 10:25:30 Hyderabad --at 2026-03-01 --depth 3
+
+The 120-year cycle is divided among the nine lords in a fixed order, each
+period subdivided the same way starting from its own lord, down to
+pratyantardasha (depth 3) and beyond. The birth nakshatra's lord rules
+the first mahadasha, and the part of the nakshatra the Moon has already
+crossed is the part of that mahadasha elapsed at birth.
+
+Nothing is materialized: periods() yields the periods of one depth in
+order, skipping whole subtrees outside the requested window, and current()
+walks down one level at a time to the period containing an instant, so
+finding the current pratyantardasha is a few dozen comparisons rather
+than a pass over 729 of them. current_dashas() does the same for whole
+NumPy arrays of charts (e.g. compute_charts() output).
+
+    moon, jd_birth = result.longitude("Moon"), result.jd_ut
+    for period in periods(moon, jd_birth, depth=2): ...     # Period(lords, start, end), UT Julian days
+    maha, antar, pratyantar = current(moon, jd_birth, jd_now)
+"""
+
+import argparse
+import sys
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from birthchart.panchanga import NAKSHATRA_NAMES, NAKSHATRA_SPAN, datetime_to_jd, jd_to_datetime
+
+# Dasha order starting from Ashwini's lord; nakshatra i is ruled by LORDS[i % 9]
+LORDS = ("Ketu", "Venus", "Sun", "Moon", "Mars", "Rahu", "Jupiter", "Saturn", "Mercury")
+YEARS = (7, 20, 6, 10, 7, 18, 16, 19, 17)
+CYCLE_YEARS = 120
+
+YEAR_DAYS = 365.25      # days per dasha year
+LEVELS = ("Mahadasha", "Antardasha", "Pratyantardasha", "Sookshma", "Prana")
+
+# lords[0] is the mahadasha lord, lords[-1] this period's; start/end are UT Julian days
+Period = namedtuple("Period", "lords start end")
+
+# _CUMULATIVE[l][k]: the share of a period that has passed when its k-th subperiod starts,
+# for a period of lord l (whose subperiods run l, l+1, ... in LORDS order)
+_CUMULATIVE = []
+for _lord in range(9):
+    _shares = [0.0]
+    for _k in range(9):
+        _shares.append(_shares[-1] + YEARS[(_lord + _k) % 9] / CYCLE_YEARS)
+    _CUMULATIVE.append(tuple(_shares))
+_CUMULATIVE = tuple(_CUMULATIVE)
+
+
+def birth_lord(moon_lon):
+    """Index into LORDS of the mahadasha running at birth."""
+    return int(moon_lon % 360.0 // NAKSHATRA_SPAN) % 27 % 9
+
+
+def balance(moon_lon, year_days=YEAR_DAYS):
+    """(lord, days of its mahadasha left at birth)."""
+    lord = birth_lord(moon_lon)
+    left = 1.0 - (moon_lon % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    return LORDS[lord], left * YEARS[lord] * year_days
+
+
+def cycle_start(moon_lon, jd_birth, year_days=YEAR_DAYS):
+    """(lord index, UT Julian day) of the start of the mahadasha running at birth."""
+    lord = birth_lord(moon_lon)
+    elapsed = (moon_lon % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    return lord, jd_birth - elapsed * YEARS[lord] * year_days
+
+
+def periods(moon_lon, jd_birth, depth=1, start=None, end=None, year_days=YEAR_DAYS):
+    """
+    Yield the Periods of ``depth`` (1 mahadasha, 2 antardasha, 3
+    pratyantardasha, up to len(LEVELS)) that overlap ``start``..``end``
+    (UT Julian days), in order. Without ``start``, from birth to the end of
+    the 120-year cycle that begins with the birth mahadasha (the first
+    period usually began before birth); with ``start`` and no ``end``,
+    without end.
+    """
+    if not 1 <= depth <= len(LEVELS):
+        raise ValueError(f"depth must be 1-{len(LEVELS)}")
+    lord, jd = cycle_start(moon_lon, jd_birth, year_days)
+    total = CYCLE_YEARS * year_days
+    if start is None:
+        start, end = jd_birth, jd + total if end is None else end
+    elif start > jd:
+        jd += (start - jd) // total * total     # the cycle containing start
+    end = float("inf") if end is None else end
+    while jd < end:
+        # Every cycle starts again with the birth mahadasha's lord
+        yield from _subperiods((), lord, jd, total, depth, start, end)
+        jd += total
+
+
+def _subperiods(lords, lord, jd, length, levels, start, end):
+    shares = _CUMULATIVE[lord]
+    for k in range(9):
+        sub_start = jd + shares[k] * length
+        if sub_start >= end:
+            return
+        sub_length = (shares[k + 1] - shares[k]) * length
+        if sub_start + sub_length <= start:
+            continue
+        sub = (lord + k) % 9
+        sub_lords = lords + (LORDS[sub],)
+        if levels == 1:
+            yield Period(sub_lords, sub_start, sub_start + sub_length)
+        else:
+            yield from _subperiods(sub_lords, sub, sub_start, sub_length, levels - 1, start, end)
+
+
+def current(moon_lon, jd_birth, jd, depth=3, year_days=YEAR_DAYS):
+    """
+    The Periods containing ``jd``, one per level from the mahadasha down
+    to ``depth``. Each level picks one of nine subperiods, so this is
+    O(depth). Raises ValueError before the birth mahadasha began.
+    """
+    if not 1 <= depth <= len(LEVELS):
+        raise ValueError(f"depth must be 1-{len(LEVELS)}")
+    lord, jd_start = cycle_start(moon_lon, jd_birth, year_days)
+    length = CYCLE_YEARS * year_days
+    if jd < jd_start:
+        raise ValueError("before the first mahadasha")
+    jd_start += (jd - jd_start) // length * length
+    lords = ()
+    found = []
+    for _ in range(depth):
+        shares = _CUMULATIVE[lord]
+        # k: how many of the eight inner boundaries the instant has passed
+        k = bisect_right(shares, (jd - jd_start) / length, 1, 9) - 1
+        jd_start, length = jd_start + shares[k] * length, (shares[k + 1] - shares[k]) * length
+        lord = (lord + k) % 9
+        lords += (LORDS[lord],)
+        found.append(Period(lords, jd_start, jd_start + length))
+    return tuple(found)
+
+
+def current_dashas(moon_lons, jd_births, jd, depth=3, year_days=YEAR_DAYS):
+    """
+    current() for many charts at once. ``moon_lons`` and ``jd_births`` are
+    arrays (one entry per chart), ``jd`` one instant or an array. Returns
+    a dict of (n, depth) arrays: ``lords`` (indices into LORDS), ``start``
+    and ``end`` (UT Julian days), column 0 being the mahadasha.
+
+    Requires numpy.
+    """
+    import numpy as np
+
+    if not 1 <= depth <= len(LEVELS):
+        raise ValueError(f"depth must be 1-{len(LEVELS)}")
+    moon = np.asarray(moon_lons, dtype=np.float64)
+    jd = np.broadcast_to(np.asarray(jd, dtype=np.float64), moon.shape)
+    shares = np.array(_CUMULATIVE)
+    years = np.array(YEARS, dtype=np.float64)
+
+    lord = (moon % 360.0 // NAKSHATRA_SPAN).astype(np.int64) % 27 % 9
+    elapsed = (moon % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    jd_start = np.asarray(jd_births, dtype=np.float64) - elapsed * years[lord] * year_days
+    length = np.full(moon.shape, CYCLE_YEARS * year_days)
+    if (jd < jd_start).any():
+        raise ValueError("before the first mahadasha")
+    jd_start = jd_start + (jd - jd_start) // length * length
+
+    out = {"lords": np.empty(moon.shape + (depth,), dtype=np.int8),
+           "start": np.empty(moon.shape + (depth,)),
+           "end": np.empty(moon.shape + (depth,))}
+    for level in range(depth):
+        lord_shares = shares[lord]                  # (n, 10)
+        fraction = (jd - jd_start) / length
+        k = (fraction[..., None] >= lord_shares[..., 1:9]).sum(axis=-1)
+        first = np.take_along_axis(lord_shares, k[..., None], axis=-1)[..., 0]
+        after = np.take_along_axis(lord_shares, k[..., None] + 1, axis=-1)[..., 0]
+        jd_start, length = jd_start + first * length, (after - first) * length
+        lord = (lord + k) % 9
+        out["lords"][..., level] = lord
+        out["start"][..., level] = jd_start
+        out["end"][..., level] = jd_start + length
+    return out
+
+
+def describe(period, utc_offset=0.0, width=28):
+    """One line for a Period, with local dates: "Jupiter / Saturn     2024-05-02  2026-11-13"."""
+    start, end = (jd_to_datetime(jd + utc_offset / 24.0) for jd in (period.start, period.end))
+    return f"{' / '.join(period.lords):<{width}}{start:%Y-%m-%d}  {end:%Y-%m-%d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m birthchart.dasha", description=__doc__.split("\n\n")[0])
+    parser.add_argument("dob", help="YYYY-MM-DD")
+    parser.add_argument("tob", help="HH:MM:SS")
+    parser.add_argument("city")
+    parser.add_argument("--depth", type=int, default=2, choices=range(1, len(LEVELS) + 1),
+                        help="1 mahadasha, 2 antardasha (default), 3 pratyantardasha, ...")
+    parser.add_argument("--at", help="YYYY-MM-DD: only print the periods running then")
+    args = parser.parse_args(argv)
+
+    from birthchart.chart import compute_chart
+
+    result = compute_chart("", args.dob, args.tob, args.city)
+    moon = result.longitude("Moon")
+    lord, days = balance(moon)
+    print(f"Moon in {NAKSHATRA_NAMES[result.nakshatra]}, balance of {lord} mahadasha "
+          f"{days / YEAR_DAYS:.2f} years")
+    if args.at:
+        jd = datetime_to_jd(datetime.strptime(args.at, "%Y-%m-%d")) - result.utc_offset / 24.0
+        for level, period in zip(LEVELS, current(moon, result.jd_ut, jd, args.depth)):
+            print(f"{level:<16}{describe(period, result.utc_offset, 10 * args.depth)}")
+    else:
+        for period in periods(moon, result.jd_ut, args.depth):
+            print(describe(period, result.utc_offset, max(28, 10 * args.depth)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Swiss Ephemeris access that is safe to share between threads.
+
+pyswisseph keeps the sidereal mode and the ephemeris path as C library
+state. Depending on how the library was built that state is either
+process-wide, so a swe.set_sid_mode() on one thread changes what every
+other thread's calc_ut() returns, or per thread (the PyPI wheels), so a
+mode set on the UI thread is never seen by a worker thread, which starts
+in the library default (Fagan/Bradley). Which one applies is probed once.
+
+An EphemerisContext carries its own ayanamsa, flags and ephemeris path.
+Its calls hold one process-wide lock and apply the context's settings
+first whenever the library state they run against was last set up for
+another context, so contexts with different ayanamsas can be used from
+any number of threads without seeing each other's settings.
+
+    raman = EphemerisContext(ayanamsa_mode("raman"))
+    lon, speed = raman.sidereal(jd_ut, swe.MOON)
+    with raman.session():          # several raw swe calls under one lock
+        houses, ascmc = swe.houses(jd_ut, lat, lon, b'P')
+        ayanamsa = swe.get_ayanamsa(jd_ut)
+
+Other processes have their own copy of the C state; a context per worker
+process needs no coordination at all. Code in this package does not call
+swe.set_sid_mode() or swe.set_ephe_path() directly.
+"""
+
+import threading
+
+import swisseph as swe
+
+_lock = threading.RLock()
+_applied = None     # what the library is set to: a _SharedState or a _ThreadState, once probed
+
+_default = None
+
+
+class _SharedState:
+    ayanamsa = ephe_path = None
+
+
+class _ThreadState(threading.local):
+    ayanamsa = ephe_path = None
+
+
+def _library_state():
+    """The record of the library's settings, per thread if the C state is thread-local. Needs _lock."""
+    global _applied
+    if _applied is None:
+        jd = 2451545.0
+        swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
+        before = swe.get_ayanamsa(jd)
+        probe = threading.Thread(target=swe.set_sid_mode, args=(swe.SIDM_RAMAN, 0, 0))
+        probe.start()
+        probe.join()
+        _applied = _ThreadState() if swe.get_ayanamsa(jd) == before else _SharedState()
+    return _applied
+
+
+class _Session:
+    __slots__ = ("context",)
+
+    def __init__(self, context):
+        self.context = context
+
+    def __enter__(self):
+        _lock.acquire()
+        try:
+            self.context._apply()
+        except BaseException:
+            _lock.release()
+            raise
+        return self.context
+
+    def __exit__(self, *exc):
+        _lock.release()
+        return False
+
+
+class EphemerisContext:
+    """
+    Ayanamsa (a swe.SIDM_* mode), base calc flags and ephemeris path for
+    Swiss Ephemeris calls. ``ephe_path`` None is the library's default.
+    """
+
+    __slots__ = ("ayanamsa", "flags", "ephe_path")
+
+    def __init__(self, ayanamsa=swe.SIDM_LAHIRI, flags=swe.FLG_SWIEPH, ephe_path=None):
+        self.ayanamsa = ayanamsa
+        self.flags = flags
+        self.ephe_path = ephe_path
+
+    def __repr__(self):
+        return f"EphemerisContext(ayanamsa={self.ayanamsa}, flags={self.flags}, ephe_path={self.ephe_path!r})"
+
+    def _apply(self):
+        # Called with _lock held
+        state = _library_state()
+        if state.ephe_path != self.ephe_path:
+            swe.set_ephe_path(self.ephe_path)
+            state.ephe_path, state.ayanamsa = self.ephe_path, None
+        if state.ayanamsa != self.ayanamsa:
+            swe.set_sid_mode(self.ayanamsa, 0, 0)
+            state.ayanamsa = self.ayanamsa
+
+    def session(self):
+        """Context manager holding the library, set up for this context, for raw swe calls."""
+        return _Session(self)
+
+    def calc_ut(self, jd_ut, body, flags=0):
+        """swe.calc_ut() with ``flags`` added to the context's own."""
+        with _lock:
+            self._apply()
+            return swe.calc_ut(jd_ut, body, self.flags | flags)
+
+    def sidereal(self, jd_ut, body):
+        """Sidereal longitude and speed (deg, deg/day) of ``body``."""
+        pos = self.calc_ut(jd_ut, body, swe.FLG_SIDEREAL | swe.FLG_SPEED)[0]
+        return pos[0] % 360.0, pos[3]
+
+    def sidereal_lon(self, jd_ut, body):
+        return self.calc_ut(jd_ut, body, swe.FLG_SIDEREAL)[0][0]
+
+    def get_ayanamsa(self, jd_ut):
+        with _lock:
+            self._apply()
+            return swe.get_ayanamsa(jd_ut)
+
+    def houses(self, jd_ut, lat, lon, hsys=b'P'):
+        """Tropical (cusps, ascmc), as swe.houses()."""
+        with _lock:
+            self._apply()
+            return swe.houses(jd_ut, lat, lon, hsys)
+
+    def ascendant(self, jd_ut, lat, lon, hsys=b'P'):
+        """Sidereal ascendant in degrees."""
+        with _lock:
+            self._apply()
+            ascmc = swe.houses(jd_ut, lat, lon, hsys)[1]
+            return (ascmc[0] - swe.get_ayanamsa(jd_ut)) % 360.0
+
+    def rise_trans(self, jd_ut, body, rsmi, geopos):
+        """swe.rise_trans() with the context's ephemeris flags; geopos is (lon, lat, altitude)."""
+        with _lock:
+            self._apply()
+            return swe.rise_trans(jd_ut, body, rsmi, geopos, flags=self.flags)
+
+
+def ayanamsa_mode(name):
+    """swe.SIDM_* value for a name ("lahiri", "raman", "krishnamurti", ...) or a number."""
+    if isinstance(name, int) or str(name).isdigit():
+        return int(name)
+    try:
+        return getattr(swe, "SIDM_" + name.strip().upper().replace("-", "_").replace(" ", "_"))
+    except AttributeError:
+        raise ValueError(f"unknown ayanamsa {name!r}") from None
+
+
+def default_context():
+    """The shared Lahiri context used when a caller doesn't pass one."""
+    global _default
+    if _default is None:
+        with _lock:
+            if _default is None:
+                _default = EphemerisContext()
+    return _default
@@ -0,0 +1,313 @@
+"""
+Offline city gazetteer.
+
+Cities are stored in a compact binary file (``data/cities.bin``) that is
+memory-mapped on first use. The file holds fixed-size city records, a
+string pool and a key table sorted by normalized name, so exact and prefix
+lookups are a binary search over the mapped bytes. Prefixes shared by more
+than TOP_THRESHOLD keys (short ones, on a GeoNames-sized build) also get
+their best TOP_RECORDS cities stored at build time, so no prefix lookup
+walks more than TOP_THRESHOLD keys.
+
+Build the file from the bundled CSV (or a GeoNames ``cities*.txt`` dump):
+
+    python -m birthchart.gazetteer build birthchart/data/cities.csv birthchart/data/cities.bin
+    python -m birthchart.gazetteer build --geonames cities15000.txt birthchart/data/cities.bin
+"""
+
+import bisect
+import csv
+import heapq
+import itertools
+import mmap
+import os
+import struct
+import sys
+import threading
+import unicodedata
+from collections import namedtuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_PATH = os.path.join(DATA_DIR, "cities.bin")
+
+MAGIC = b"GZT1"
+VERSION = 2
+
+TOP_THRESHOLD = 64      # prefixes matching more keys than this get a stored top list
+TOP_RECORDS = 32        # cities stored per such prefix, best first
+
+# magic, version, n_records, n_keys, n_tz, n_top, off_records, off_keys, off_tz, off_top, off_top_idx, off_strings
+_HEADER = struct.Struct("<4sH10I")
+# lat, lon, name_off, name_len, country, tz_idx
+_RECORD = struct.Struct("<ddIH2sH")
+# key_off, key_len, record_idx; in the top table: prefix_off, prefix_len, offset of its list
+_KEY = struct.Struct("<IHI")
+# str_off, str_len
+_STR = struct.Struct("<IH")
+# a top list: count, then that many record indices
+_U32 = struct.Struct("<I")
+
+City = namedtuple("City", "name country lat lon tz")
+
+
+def normalize_name(text):
+    """Fold case and accents, and reduce punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = "".join(ch if ch.isalnum() else " " for ch in text.casefold())
+    return " ".join(text.split())
+
+
+def prefix_end(prefix):
+    """
+    Exclusive upper bound of the strings starting with ``prefix`` (not
+    empty), for ``key >= prefix AND key < prefix_end(prefix)`` range scans.
+    Unlike prefix + U+FFFF it is also above keys that continue with a
+    character outside the BMP.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class _KeyView:
+    """Read-only sequence of the sorted key bytes, for use with bisect."""
+
+    def __init__(self, buf, offset, count, strings):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+        self._strings = strings
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        key_off, key_len, _ = _KEY.unpack_from(self._buf, self._offset + i * _KEY.size)
+        start = self._strings + key_off
+        return self._buf[start:start + key_len]
+
+    def record_index(self, i):
+        return _KEY.unpack_from(self._buf, self._offset + i * _KEY.size)[2]
+
+
+class Gazetteer:
+    """Memory-mapped city table with exact and prefix lookup."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as fh:
+            self._buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _HEADER.unpack_from(self._buf, 0)[:2]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a gazetteer file (version {VERSION})")
+        (_, _, self._n_records, n_keys, n_tz, n_top, self._off_records, off_keys, off_tz,
+         off_top, self._off_top_idx, self._off_strings) = _HEADER.unpack_from(self._buf, 0)
+        self._keys = _KeyView(self._buf, off_keys, n_keys, self._off_strings)
+        self._top = _KeyView(self._buf, off_top, n_top, self._off_strings)
+        self._tz_names = [self._string(*_STR.unpack_from(self._buf, off_tz + i * _STR.size))
+                          for i in range(n_tz)]
+
+    def __len__(self):
+        return self._n_records
+
+    def _string(self, off, length):
+        start = self._off_strings + off
+        return self._buf[start:start + length].decode("utf-8")
+
+    def _record(self, idx):
+        lat, lon, name_off, name_len, country, tz_idx = _RECORD.unpack_from(
+            self._buf, self._off_records + idx * _RECORD.size)
+        return City(self._string(name_off, name_len), country.decode("ascii"),
+                    lat, lon, self._tz_names[tz_idx])
+
+    def _key_range(self, key, prefix):
+        lo = bisect.bisect_left(self._keys, key)
+        if prefix:
+            # Every key starting with ``key`` sorts below key + 0xFF.
+            hi = bisect.bisect_left(self._keys, key + b"\xff", lo)
+        else:
+            hi = bisect.bisect_right(self._keys, key, lo)
+        return lo, hi
+
+    def find(self, name):
+        """Return every city whose name or alternate name equals ``name``."""
+        key = normalize_name(name).encode("utf-8")
+        if not key:
+            return []
+        lo, hi = self._key_range(key, prefix=False)
+        seen = sorted({self._keys.record_index(i) for i in range(lo, hi)})
+        return [self._record(idx) for idx in seen]
+
+    def lookup(self, query):
+        """
+        Resolve free text such as ``"Hyderabad"`` or ``"Hyderabad, PK"``.
+        A trailing two-letter part is treated as a country code. Returns the
+        best-ranked City or None.
+        """
+        parts = [p.strip() for p in query.split(",") if p.strip()]
+        if not parts:
+            return None
+        matches = self.find(query)
+        if not matches and len(parts) > 1:
+            matches = self.find(parts[0])
+            countries = {p.upper() for p in parts[1:] if len(p) == 2}
+            if countries:
+                matches = [c for c in matches if c.country in countries] or matches
+        return matches[0] if matches else None
+
+    def _top_records(self, key):
+        """The stored best record indices for prefix ``key``, or None if it has no top list."""
+        i = bisect.bisect_left(self._top, key)
+        if i == len(self._top) or self._top[i] != key:
+            return None
+        start = self._off_top_idx + self._top.record_index(i)
+        count = _U32.unpack_from(self._buf, start)[0]
+        return struct.unpack_from(f"<{count}I", self._buf, start + _U32.size)
+
+    def prefix(self, text, limit=10):
+        """
+        Return up to ``limit`` distinct cities with a name starting with
+        ``text``, best ranked (first in the build input) first.
+        """
+        key = normalize_name(text).encode("utf-8")
+        if not key:
+            return []
+        top = self._top_records(key)
+        if top is not None and (limit <= len(top) or len(top) < TOP_RECORDS):
+            return [self._record(idx) for idx in top[:limit]]
+        lo, hi = self._key_range(key, prefix=True)
+        seen = {self._keys.record_index(i) for i in range(lo, hi)}
+        return [self._record(idx) for idx in heapq.nsmallest(limit, seen)]
+
+    def close(self):
+        self._buf.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_gazetteer():
+    """Return the bundled gazetteer, mapping it on first use (None if missing)."""
+    global _default
+    if _default is None and os.path.exists(DEFAULT_PATH):
+        with _default_lock:
+            if _default is None:
+                _default = Gazetteer(DEFAULT_PATH)
+    return _default
+
+
+# --- Build step ---
+
+def read_csv(path):
+    """Yield (name, alternate_names, country, lat, lon, tz) rows from the bundled CSV."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            alt = [a for a in row["alternate_names"].split("|") if a]
+            yield row["name"], alt, row["country"], float(row["lat"]), float(row["lon"]), row["tz"]
+
+
+def read_geonames(path):
+    """Yield rows from a GeoNames ``cities*.txt`` dump, most populous first."""
+    rows = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            f = line.rstrip("\n").split("\t")
+            if len(f) < 18:
+                continue
+            alt = [a for a in f[3].split(",") if a]
+            if f[2] and f[2] != f[1]:
+                alt.insert(0, f[2])
+            population = int(f[14] or 0)
+            rows.append((population, (f[1], alt, f[8], float(f[4]), float(f[5]), f[17])))
+    rows.sort(key=lambda r: -r[0])
+    for _, row in rows:
+        yield row
+
+
+def build(rows, out_path):
+    """Write ``rows`` (in priority order) as a gazetteer file."""
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(text):
+        data = text.encode("utf-8")
+        if data not in string_offsets:
+            string_offsets[data] = len(strings)
+            strings.extend(data)
+        return string_offsets[data], len(data)
+
+    tz_index = {}
+    records = []
+    keys = []
+    for idx, (name, alt, country, lat, lon, tz) in enumerate(rows):
+        name_off, name_len = intern(name)
+        tz_idx = tz_index.setdefault(tz, len(tz_index))
+        records.append(_RECORD.pack(lat, lon, name_off, name_len,
+                                     country.encode("ascii")[:2].ljust(2), tz_idx))
+        for key in {normalize_name(n) for n in [name] + list(alt)}:
+            if key:
+                keys.append((key.encode("utf-8"), idx))
+    keys.sort()
+
+    key_table = bytearray()
+    for key, idx in keys:
+        key_off, key_len = intern(key.decode("utf-8"))
+        key_table += _KEY.pack(key_off, key_len, idx)
+    tz_table = bytearray()
+    for tz in sorted(tz_index, key=tz_index.get):
+        tz_table += _STR.pack(*intern(tz))
+    top_table, top_idx = bytearray(), bytearray()
+    for prefix, best in _top_lists(keys):
+        top_table += _KEY.pack(*intern(prefix), len(top_idx))
+        top_idx += _U32.pack(len(best)) + struct.pack(f"<{len(best)}I", *best)
+
+    off_records = _HEADER.size
+    off_keys = off_records + len(records) * _RECORD.size
+    off_tz = off_keys + len(key_table)
+    off_top = off_tz + len(tz_table)
+    off_top_idx = off_top + len(top_table)
+    off_strings = off_top_idx + len(top_idx)
+    with open(out_path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, VERSION, len(records), len(keys), len(tz_index),
+                              len(top_table) // _KEY.size, off_records, off_keys, off_tz, off_top,
+                              off_top_idx, off_strings))
+        fh.write(b"".join(records))
+        fh.write(key_table)
+        fh.write(tz_table)
+        fh.write(top_table)
+        fh.write(top_idx)
+        fh.write(strings)
+    return len(records), len(keys)
+
+
+def _top_lists(keys):
+    """
+    (prefix, best record indices) for every prefix of the sorted ``keys``
+    that more than TOP_THRESHOLD of them start with, in prefix order.
+    """
+    names = [key.decode("utf-8") for key, _ in keys]
+    found = []
+    length, spans = 1, [(0, len(keys))]
+    while spans:
+        wider = []
+        for lo, hi in spans:
+            groups = itertools.groupby(range(lo, hi), key=lambda i: names[i][:length])
+            for prefix, members in groups:
+                members = [i for i in members if len(names[i]) >= length]
+                if len(members) > TOP_THRESHOLD:
+                    best = heapq.nsmallest(TOP_RECORDS, {keys[i][1] for i in members})
+                    found.append((prefix, best))
+                    wider.append((members[0], members[-1] + 1))
+        spans, length = wider, length + 1
+    found.sort(key=lambda item: item[0].encode("utf-8"))
+    return found
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "build" or len(args) not in (3, 4):
+        print("usage: python -m birthchart.gazetteer build [--geonames] SOURCE OUT.bin")
+        sys.exit(2)
+    geonames = args[1] == "--geonames"
+    source, out = args[-2], args[-1]
+    n_records, n_keys = build(read_geonames(source) if geonames else read_csv(source), out)
+    print(f"Wrote {out}: {n_records} cities, {n_keys} keys")
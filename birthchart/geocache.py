@@ -0,0 +1,156 @@
+"""
+Two-tier geocode cache for city lookups.
+
+Results from the online geocoder are kept in an in-process LRU and in an
+SQLite table keyed by normalized city name, so a city that has been
+resolved once never needs the network (or the timezone polygons) again.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from birthchart.gazetteer import normalize_name, prefix_end
+
+DEFAULT_TTL = 180 * 86400       # seconds a stored entry stays valid
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_ENTRIES = 10000
+BUSY_TIMEOUT = 30.0             # seconds to wait for another process's write (bulk/service workers)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key      TEXT PRIMARY KEY,
+    name     TEXT,
+    lat      REAL NOT NULL,
+    lon      REAL NOT NULL,
+    tz       TEXT NOT NULL,
+    stored   REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS geocode_accessed ON geocode (accessed);
+"""
+
+
+class GeoCache:
+    """In-process LRU in front of an SQLite store of (lat, lon, tz_string)."""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, disk_entries=DEFAULT_DISK_ENTRIES):
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()        # key -> (lat, lon, tz, stored)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+            # Several worker processes share one file: readers must not block the writer
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.executescript(_SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(geocode)")}
+            if "name" not in columns:   # caches written before names were kept
+                self._db.execute("ALTER TABLE geocode ADD COLUMN name TEXT")
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, city_name):
+        """Return (lat, lon, tz_string) for ``city_name`` or None."""
+        key = normalize_name(city_name)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[3] < self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[:3]
+            if entry is not None:
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT lat, lon, tz, stored FROM geocode WHERE key = ? AND stored > ?",
+                    (key, now - self.ttl)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE geocode SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row)
+                    self.stats["disk_hits"] += 1
+                    return row[:3]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, city_name, lat, lon, tz_string):
+        key = normalize_name(city_name)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (lat, lon, tz_string, now))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocode (key, name, lat, lon, tz, stored, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, city_name.strip(), lat, lon, tz_string, now, now))
+                self._evict_disk(now)
+                self._db.commit()
+
+    def prefix(self, text, limit=10):
+        """
+        Up to ``limit`` stored (name, lat, lon, tz_string) whose key starts
+        with ``text``, from the SQLite store (a range scan on the key).
+        Doesn't count towards the hit/miss stats.
+        """
+        key = normalize_name(text)
+        if not key or self._db is None:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, name, lat, lon, tz FROM geocode "
+                "WHERE key >= ? AND key < ? AND stored > ? ORDER BY key LIMIT ?",
+                (key, prefix_end(key), time.time() - self.ttl, limit)).fetchall()
+        return [(name or key, lat, lon, tz) for key, name, lat, lon, tz in rows]
+
+    def _remember(self, key, entry):
+        self._memory[key] = tuple(entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now):
+        cur = self._db.execute("DELETE FROM geocode WHERE stored <= ?", (now - self.ttl,))
+        evicted = cur.rowcount
+        cur = self._db.execute(
+            "DELETE FROM geocode WHERE key IN ("
+            " SELECT key FROM geocode ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.disk_entries,))
+        evicted += cur.rowcount
+        self.stats["evictions"] += max(evicted, 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM geocode")
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_tz_finder = None
+_tz_lock = threading.Lock()
+
+
+def timezone_finder():
+    """Return the shared TimezoneFinder, loading its polygon data on first use."""
+    global _tz_finder
+    if _tz_finder is None:
+        with _tz_lock:
+            if _tz_finder is None:
+                from timezonefinder import TimezoneFinder
+                _tz_finder = TimezoneFinder()
+    return _tz_finder
@@ -0,0 +1,232 @@
+"""
+City name -> (lat, lon, utc_offset, tz_string).
+
+The bundled gazetteer answers most names; anything else goes through the
+geocode cache and, on a miss, Nominatim. ``requests`` is only imported
+for that last step, and pytz on the first lookup.
+
+CitySuggester serves type-ahead suggestions from the same sources, local
+ones first.
+"""
+
+import datetime as dt
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from birthchart import instrument
+from birthchart.gazetteer import default_gazetteer, normalize_name
+from birthchart.geocache import timezone_finder
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+REQUEST_TIMEOUT = 15     # seconds
+MIN_REQUEST_INTERVAL = 1.0      # Nominatim usage policy: at most one request a second
+
+# ``tz`` is None for online results until the suggestion is chosen
+Suggestion = namedtuple("Suggestion", "label lat lon tz")
+
+_session = None
+_session_lock = threading.Lock()
+_request_lock = threading.Lock()
+_last_request = 0.0
+
+
+def http_session():
+    """The shared keep-alive requests.Session used for every Nominatim call."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+
+                session = requests.Session()
+                session.headers["User-Agent"] = "birth-chart-app"
+                session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+                _session = session
+    return _session
+
+
+def nominatim_search(query, limit=1, cancel=None):
+    """
+    Raw Nominatim results for ``query``. Calls are spaced at least
+    MIN_REQUEST_INTERVAL apart; returns [] if ``cancel`` (a threading.Event)
+    is set while waiting for the slot.
+    """
+    global _last_request
+    with _request_lock:
+        # Reserve the next free slot, then wait for it outside the lock
+        now = time.monotonic()
+        slot = max(now, _last_request + MIN_REQUEST_INTERVAL)
+        _last_request = slot
+    if cancel is None:
+        time.sleep(slot - now)
+    elif cancel.wait(slot - now):
+        return []
+    instrument.count("nominatim")
+    params = {"q": query, "format": "json", "limit": limit, "addressdetails": 1}
+    response = http_session().get(NOMINATIM_URL, params=params, timeout=REQUEST_TIMEOUT)
+    return response.json()
+
+
+def timezone_at(lat, lon):
+    tf = timezone_finder()
+    tz_string = tf.timezone_at(lat=lat, lng=lon)
+    if tz_string is None:
+        tz_string = tf.closest_timezone_at(lat=lat, lng=lon) or "Etc/GMT"
+    return tz_string
+
+
+def lookup_city_online(city_name):
+    """Geocode via Nominatim and resolve the timezone from the coordinates."""
+    data = nominatim_search(city_name)
+    if not data:
+        raise ValueError("City not found")
+
+    lat = float(data[0]["lat"])
+    lon = float(data[0]["lon"])
+    return lat, lon, timezone_at(lat, lon)
+
+
+def resolve_city(city_name, cache=None):
+    """
+    (lat, lon, tz_string) from the gazetteer, then ``cache``, then the network.
+    ``cache`` is a GeoCache, or a callable returning one that is only called
+    on a gazetteer miss.
+    """
+    gazetteer = default_gazetteer()
+    city = gazetteer.lookup(city_name) if gazetteer else None
+    if city is not None:
+        return city.lat, city.lon, city.tz
+
+    if callable(cache):
+        cache = cache()
+    cached = cache.get(city_name) if cache is not None else None
+    if cached is not None:
+        return cached
+    lat, lon, tz_string = lookup_city_online(city_name)
+    if cache is not None:
+        cache.put(city_name, lat, lon, tz_string)
+    return lat, lon, tz_string
+
+
+def utc_offset_now(tz_string):
+    """The zone's current UTC offset in hours."""
+    with instrument.span("tz"):
+        import pytz
+
+        return pytz.timezone(tz_string).utcoffset(dt.datetime.now()).total_seconds() / 3600
+
+
+def lookup_city(city_name, cache=None):
+    """
+    Resolve ``city_name`` and return (lat, lon, utc_offset, tz_string).
+    utc_offset is the zone's current offset in hours; compute_chart()
+    converts a birth time with the offset tz_string had at that time.
+    """
+    with instrument.span("geocode"):
+        lat, lon, tz_string = resolve_city(city_name, cache)
+    return lat, lon, utc_offset_now(tz_string), tz_string
+
+
+class CitySuggester:
+    """
+    Type-ahead city suggestions. quick() answers from the gazetteer and is
+    cheap enough to call on the UI thread on every keystroke; local() adds
+    the geocode cache and online() Nominatim results for longer queries,
+    both on a worker thread. Finished queries are kept in a small LRU, so
+    retyping or backspacing needs no further lookups.
+    """
+
+    def __init__(self, cache=None, limit=8, min_online_chars=3, memo_entries=256):
+        self.cache = cache
+        self.limit = limit
+        self.min_online_chars = min_online_chars
+        self.memo_entries = memo_entries
+        self._memo = OrderedDict()      # normalized query -> [Suggestion]
+        self._lock = threading.Lock()
+
+    _key = staticmethod(normalize_name)
+
+    def _memo_get(self, key):
+        with self._lock:
+            result = self._memo.get(key)
+            if result is not None:
+                self._memo.move_to_end(key)
+            return result
+
+    def _memo_put(self, key, suggestions):
+        with self._lock:
+            self._memo[key] = suggestions
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_entries:
+                self._memo.popitem(last=False)
+
+    def quick(self, text):
+        """The memo's or the gazetteer's suggestions: mmap reads only, for the UI thread."""
+        key = self._key(text)
+        if not key:
+            return []
+        memo = self._memo_get(key)
+        if memo is not None:
+            return memo
+        suggestions = []
+        gazetteer = default_gazetteer()
+        for city in (gazetteer.prefix(text, self.limit) if gazetteer else ()):
+            self._add(suggestions, f"{city.name}, {city.country}", city.lat, city.lon, city.tz)
+        return suggestions
+
+    def local(self, text):
+        """
+        Suggestions without network access: quick(), then the geocode
+        cache. The cache is an SQLite query (opening the file on first
+        use), so call this off the UI thread.
+        """
+        key = self._key(text)
+        if not key or self._memo_get(key) is not None:
+            return self.quick(text)
+        suggestions = list(self.quick(text))
+        cache = self.cache() if callable(self.cache) else self.cache
+        for name, lat, lon, tz in (cache.prefix(text, self.limit) if cache is not None else ()):
+            self._add(suggestions, name, lat, lon, tz)
+        return suggestions
+
+    def _add(self, suggestions, label, lat, lon, tz):
+        if len(suggestions) < self.limit and all(self._key(s.label) != self._key(label) for s in suggestions):
+            suggestions.append(Suggestion(label, lat, lon, tz))
+
+    def needs_online(self, text, local):
+        """Whether online() could add anything to ``local``."""
+        key = self._key(text)
+        return (len(key) >= self.min_online_chars and len(local) < self.limit
+                and self._memo_get(key) is None)
+
+    def online(self, text, cancel=None):
+        """local() plus Nominatim matches; blocks, so call it off the UI thread."""
+        suggestions = list(self.local(text))
+        results = nominatim_search(text, self.limit, cancel)
+        if cancel is not None and cancel.is_set():
+            return suggestions
+        seen = {self._key(s.label) for s in suggestions}
+        for item in results:
+            address = item.get("address", {})
+            name = item.get("name") or item.get("display_name", "").split(",")[0]
+            country = address.get("country_code", "").upper()
+            label = f"{name}, {country}" if country else name
+            if self._key(label) not in seen and len(suggestions) < self.limit:
+                seen.add(self._key(label))
+                suggestions.append(Suggestion(label, float(item["lat"]), float(item["lon"]), None))
+        self._memo_put(self._key(text), suggestions)
+        return suggestions
+
+    def choose(self, suggestion):
+        """
+        Record a picked suggestion in the geocode cache (resolving its
+        timezone if it came from Nominatim), so Generate needs no network.
+        """
+        if suggestion.tz is not None:
+            return suggestion       # gazetteer or cache entry, already resolvable offline
+        suggestion = suggestion._replace(tz=timezone_at(suggestion.lat, suggestion.lon))
+        cache = self.cache() if callable(self.cache) else self.cache
+        if cache is not None:
+            cache.put(suggestion.label, suggestion.lat, suggestion.lon, suggestion.tz)
+        return suggestion
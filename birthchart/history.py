@@ -0,0 +1,167 @@
+"""
+SQLite history of computed charts.
+
+Each chart is stored once per ChartKey (name, birth date and time, place,
+ayanamsa) as its packed ChartResult record (ChartResult.pack(), about 200
+bytes with every longitude, panchanga index and end time), next to indexed
+name, date and place columns. Reopening a chart is a lookup on the key's
+unique index and an unpack, with no geocoding or ephemeris calls; name
+search is a range scan on the folded name, so both stay flat in the
+number of stored charts.
+
+    history = ChartHistory("history.sqlite")
+    history.put(result)
+    entries = history.search("rav")      # -> [HistoryEntry(id, name, dob, tob, place, ...)]
+    history.load(entries[0].id)          # -> ChartResult
+    history.get(chart_key(...))          # -> ChartResult or None
+
+ChartMemo(store=history) puts it behind the in-process memo, so
+compute_chart() answers any chart seen in an earlier session from disk.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from birthchart.chart import ChartResult
+from birthchart.gazetteer import normalize_name, prefix_end
+
+DEFAULT_SEARCH_LIMIT = 20
+
+HistoryEntry = namedtuple("HistoryEntry", "id name dob tob place ayanamsa saved")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chart (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL,
+    name_key  TEXT NOT NULL,
+    dob       TEXT NOT NULL,
+    tob       TEXT NOT NULL,
+    place     TEXT NOT NULL,
+    place_key TEXT NOT NULL,
+    ayanamsa  INTEGER NOT NULL,
+    record    BLOB NOT NULL,
+    saved     REAL NOT NULL,
+    UNIQUE (name, dob, tob, place_key, ayanamsa)
+);
+CREATE INDEX IF NOT EXISTS chart_name ON chart (name_key, dob);
+CREATE INDEX IF NOT EXISTS chart_dob ON chart (dob);
+CREATE INDEX IF NOT EXISTS chart_place ON chart (place_key, dob);
+CREATE INDEX IF NOT EXISTS chart_saved ON chart (saved);
+"""
+
+_ENTRY_COLUMNS = "id, name, dob, tob, place, ayanamsa, saved"
+
+
+class ChartHistory:
+    """Charts keyed by ChartKey, with name-prefix, date and place search."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def put(self, result):
+        """Store ``result`` (replacing any chart with the same key); returns its id."""
+        with self._lock:
+            entry_id = self._put(result, time.time())
+            self._db.commit()
+        return entry_id
+
+    def put_many(self, results):
+        """Store ChartResults in one transaction; returns how many."""
+        now = time.time()
+        n = 0
+        with self._lock:
+            for result in results:
+                self._put(result, now)
+                n += 1
+            self._db.commit()
+        return n
+
+    def _put(self, result, now):
+        key = result.key
+        row = self._db.execute(
+            "INSERT INTO chart (name, name_key, dob, tob, place, place_key, ayanamsa, record, saved) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name, dob, tob, place_key, ayanamsa) "
+            "DO UPDATE SET place = excluded.place, record = excluded.record, saved = excluded.saved "
+            "RETURNING id",
+            (key.name, normalize_name(key.name), key.dob, key.tob, result.place.strip(), key.place,
+             key.ayanamsa, result.pack(), now)).fetchone()
+        self.stats["stored"] += 1
+        return row[0]
+
+    def get(self, key):
+        """The stored ChartResult for a ChartKey, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT record FROM chart WHERE name = ? AND dob = ? AND tob = ? AND place_key = ? "
+                "AND ayanamsa = ?", tuple(key)).fetchone()
+            self.stats["hits" if row is not None else "misses"] += 1
+        return ChartResult.unpack(row[0]) if row is not None else None
+
+    def load(self, entry_id):
+        """The ChartResult stored under ``entry_id``; raises KeyError if there is none."""
+        with self._lock:
+            row = self._db.execute("SELECT record FROM chart WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            raise KeyError(entry_id)
+        return ChartResult.unpack(row[0])
+
+    def search(self, name="", dob=None, place=None, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Up to ``limit`` HistoryEntry whose folded name starts with ``name``,
+        optionally only those born on ``dob`` (YYYY-MM-DD) or in ``place``.
+        Ordered by name then birth date; with no criteria, the most
+        recently saved first.
+        """
+        where, args = [], []
+        prefix = normalize_name(name)
+        if prefix:
+            where.append("name_key >= ? AND name_key < ?")
+            args += [prefix, prefix_end(prefix)]
+        if dob:
+            where.append("dob = ?")
+            args.append(dob)
+        if place:
+            where.append("place_key = ?")
+            args.append(normalize_name(place))
+        order = "name_key, dob" if where else "saved DESC"
+        sql = f"SELECT {_ENTRY_COLUMNS} FROM chart"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._db.execute(f"{sql} ORDER BY {order} LIMIT ?", (*args, limit)).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def recent(self, limit=DEFAULT_SEARCH_LIMIT):
+        """The ``limit`` most recently saved entries."""
+        return self.search(limit=limit)
+
+    def delete(self, entry_id):
+        with self._lock:
+            self._db.execute("DELETE FROM chart WHERE id = ?", (entry_id,))
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chart").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM chart")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
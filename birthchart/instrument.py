@@ -0,0 +1,146 @@
+"""
+Stage timing and ephemeris-call counters for the chart pipeline.
+
+    with instrument.trace("chart") as run:
+        with instrument.span("geocode"):
+            ...
+        instrument.count("ephemeris")
+    run.spans, run.counters
+
+span() and count() record into the trace active in the current context
+(thread or asyncio task) and do nothing without one. trace() opens a new
+trace only if none is active, so compute_chart() inside the app's
+"save_pdf" trace adds to it rather than starting its own.
+
+When the outermost trace ends it is logged at DEBUG on the
+"birthchart.timing" logger and passed to every listener. Nothing else is
+written unless a JSON sink is set, with set_json_sink(path) or the
+BIRTHCHART_TIMING_JSON environment variable; it gets one line per trace.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+log = logging.getLogger("birthchart.timing")
+
+_current = ContextVar("birthchart_trace", default=None)
+_listeners = []
+_sink_lock = threading.Lock()
+_json_sink = os.environ.get("BIRTHCHART_TIMING_JSON") or None
+
+
+class Trace:
+    """Seconds per span name and counts per counter name for one run."""
+
+    __slots__ = ("name", "spans", "counters", "seconds", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = {}
+        self.counters = {}
+        self.seconds = None
+        self._start = time.perf_counter()
+
+    def as_dict(self):
+        return {"name": self.name, "seconds": self.seconds, "spans": dict(self.spans),
+                "counters": dict(self.counters)}
+
+    def summary(self):
+        """One line, e.g. "chart 12.3 ms: geocode 0.4 ms, planets 1.1 ms, ... | ephemeris 38"."""
+        spans = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.spans.items())
+        counters = ", ".join(f"{name} {n}" for name, n in self.counters.items())
+        total = f"{self.seconds * 1000:.1f} ms" if self.seconds is not None else "running"
+        return f"{self.name} {total}: " + " | ".join(part for part in (spans, counters) if part)
+
+
+class _Span:
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            spans = self.trace.spans
+            spans[self.name] = spans.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class _TraceScope:
+    __slots__ = ("name", "trace", "token")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        self.token = None
+        if self.trace is None:
+            self.trace = Trace(self.name)
+            self.token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc):
+        if self.token is not None:
+            _current.reset(self.token)
+            self.trace.seconds = time.perf_counter() - self.trace._start
+            _finish(self.trace)
+        return False
+
+
+def span(name):
+    """Context manager adding its wall time to ``name`` in the active trace."""
+    return _Span(name)
+
+
+def trace(name):
+    """Context manager yielding the active Trace, starting one named ``name`` if there is none."""
+    return _TraceScope(name)
+
+
+def count(name, n=1):
+    """Add ``n`` to counter ``name`` in the active trace."""
+    run = _current.get()
+    if run is not None:
+        run.counters[name] = run.counters.get(name, 0) + n
+
+
+def current():
+    """The active Trace, or None."""
+    return _current.get()
+
+
+def add_listener(fn):
+    """Call ``fn(trace)`` with every finished outermost trace, on the thread that ran it."""
+    _listeners.append(fn)
+
+
+def remove_listener(fn):
+    _listeners.remove(fn)
+
+
+def set_json_sink(path):
+    """Append each finished trace to ``path`` as a JSON line; None turns the sink off."""
+    global _json_sink
+    _json_sink = path
+
+
+def _finish(run):
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("%s", run.summary())
+    if _json_sink:
+        line = json.dumps(dict(run.as_dict(), time=time.time()))
+        with _sink_lock, open(_json_sink, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    for fn in list(_listeners):
+        fn(run)
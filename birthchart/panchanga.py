@@ -0,0 +1,471 @@
+"""
+Panchanga limbs (tithi, nakshatra, yoga, karana) and their end times.
+
+Each limb of the panchanga is a steadily increasing angle (Moon longitude
+for nakshatra, Moon - Sun for tithi, ...). The end of the current limb is
+the instant that angle reaches the next boundary, which we find with a
+Newton step on the body's speed, guarded by a bracket so a bad step falls
+back to bisection.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import swisseph as swe
+
+from birthchart import instrument
+from birthchart.ephemeris import default_context
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = 360.0 / 108
+TITHI_SPAN = 12.0
+KARANA_SPAN = 6.0
+YOGA_SPAN = 360.0 / 27
+MOON_MEAN_SPEED = 13.176     # deg/day, only used to seed the first guess
+SUN_MEAN_SPEED = 0.9856
+
+# Newton converges quadratically: once a step is this small the error left
+# after taking it is ~(accel / 2 speed) * step**2, well under 0.1 s.
+CONVERGED_STEP = 5e-3        # days
+MAX_ITERATIONS = 20
+
+NakshatraEnd = namedtuple("NakshatraEnd", "nakshatra pada pada_end nakshatra_end evaluations")
+TithiEnd = namedtuple("TithiEnd", "tithi end next_tithi evaluations")
+KaranaYogaEnd = namedtuple("KaranaYogaEnd", "karana karana_end yoga yoga_end evaluations")
+PanchangaResult = namedtuple(
+    "PanchangaResult",
+    "jd_ut tithi tithi_end next_tithi nakshatra pada pada_end nakshatra_end "
+    "karana karana_end yoga yoga_end evaluations")
+
+
+def moon_sidereal(jd_ut, ephemeris=None):
+    """Sidereal Moon longitude and speed (deg, deg/day) at ``jd_ut``."""
+    ctx = ephemeris if ephemeris is not None else default_context()
+    return ctx.sidereal(jd_ut, swe.MOON)
+
+
+def elongation(jd_ut, ephemeris=None):
+    """Moon - Sun sidereal elongation and its rate (deg, deg/day) at ``jd_ut``."""
+    ctx = ephemeris if ephemeris is not None else default_context()
+    moon, moon_speed = ctx.sidereal(jd_ut, swe.MOON)
+    sun, sun_speed = ctx.sidereal(jd_ut, swe.SUN)
+    return (moon - sun) % 360, moon_speed - sun_speed
+
+
+class SunMoonCache:
+    """
+    Memoized sidereal Sun/Moon samples keyed by Julian day, so boundary
+    solves that revisit an instant (or share a start point) do not call
+    the ephemeris again. ``evaluations`` counts real ephemeris samples.
+
+    Samples are FLG_SIDEREAL positions from ``ephemeris`` (an
+    EphemerisContext, default Lahiri), the same model as the chart's own
+    longitudes, so an end time is where the chart's limb changes.
+    """
+
+    def __init__(self, ephemeris=None):
+        self.ephemeris = ephemeris if ephemeris is not None else default_context()
+        self._samples = {}
+        self.evaluations = 0
+
+    def sample(self, jd_ut):
+        """(sun, moon, sun_speed, moon_speed) in sidereal degrees and deg/day."""
+        hit = self._samples.get(jd_ut)
+        if hit is None:
+            sun, sun_speed = self.ephemeris.sidereal(jd_ut, swe.SUN)
+            moon, moon_speed = self.ephemeris.sidereal(jd_ut, swe.MOON)
+            hit = (sun, moon, sun_speed, moon_speed)
+            self._samples[jd_ut] = hit
+            self.evaluations += 1
+            instrument.count("ephemeris", 2)
+        return hit
+
+    def moon(self, jd_ut):
+        _, moon, _, moon_speed = self.sample(jd_ut)
+        return moon, moon_speed
+
+    def elongation(self, jd_ut):
+        sun, moon, sun_speed, moon_speed = self.sample(jd_ut)
+        return (moon - sun) % 360, moon_speed - sun_speed
+
+    def yoga_angle(self, jd_ut):
+        sun, moon, sun_speed, moon_speed = self.sample(jd_ut)
+        return (moon + sun) % 360, moon_speed + sun_speed
+
+
+def _wrap180(angle):
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def solve_crossing(sample, jd_start, angle_start, target, rate):
+    """
+    Find the first instant after ``jd_start`` where an increasing angle
+    reaches ``target`` (degrees, mod 360).
+
+    sample(jd) -> (angle, rate) evaluates the angle and its speed in
+    deg/day; ``angle_start`` and ``rate`` describe the angle at jd_start.
+    Returns (jd, last_rate, evaluations).
+    """
+    remaining = (target - angle_start) % 360.0
+    lo, hi = jd_start, None
+    jd = jd_start + remaining / max(rate, 1e-6)
+    evaluations = 0
+    for _ in range(MAX_ITERATIONS):
+        angle, rate = sample(jd)
+        evaluations += 1
+        err = _wrap180(angle - target)
+        if err < 0:
+            lo = jd
+        else:
+            hi = jd
+        step = -err / max(rate, 1e-6)
+        if abs(step) < CONVERGED_STEP:
+            return jd + step, rate, evaluations
+        nxt = jd + step
+        if nxt <= lo or (hi is not None and nxt >= hi):
+            nxt = (lo + hi) / 2 if hi is not None else lo + 2 * abs(step)
+        jd = nxt
+    return jd, rate, evaluations
+
+
+def solve_nakshatra_end(jd_ut, moon_lon=None, cache=None):
+    """
+    End of the Moon's current pada and nakshatra after ``jd_ut``.
+    Returns a NakshatraEnd with 0-based nakshatra index, 1-based pada,
+    both end instants as Julian days (UT) and the ephemeris evaluation count.
+    With a SunMoonCache the Moon is sampled through it and ``moon_lon`` is
+    ignored.
+    """
+    if cache is not None:
+        sample, before = cache.moon, cache.evaluations
+        moon_lon, rate = sample(jd_ut)
+    else:
+        sample, before = moon_sidereal, 0
+        if moon_lon is None:
+            moon_lon, rate = sample(jd_ut)
+            before = -1
+        else:
+            rate = MOON_MEAN_SPEED
+
+    nak_index = int(moon_lon // NAKSHATRA_SPAN)
+    pada = int((moon_lon % NAKSHATRA_SPAN) // PADA_SPAN) + 1
+
+    pada_boundary = (int(moon_lon // PADA_SPAN) + 1) * PADA_SPAN % 360
+    pada_end, rate, evaluations = solve_crossing(sample, jd_ut, moon_lon, pada_boundary, rate)
+
+    if pada == 4:
+        nak_end = pada_end
+    else:
+        nak_boundary = (nak_index + 1) * NAKSHATRA_SPAN % 360
+        nak_end, rate, n = solve_crossing(sample, pada_end, pada_boundary, nak_boundary, rate)
+        evaluations += n
+
+    if cache is not None:
+        evaluations = cache.evaluations - before
+    else:
+        evaluations -= before
+    return NakshatraEnd(nak_index, pada, pada_end, nak_end, evaluations)
+
+
+def solve_tithi_end(jd_ut, tithi_angle=None, cache=None):
+    """
+    End of the tithi running at ``jd_ut``. Returns a TithiEnd with the
+    0-based tithi index, the end instant as a Julian day (UT), the next
+    tithi index and the ephemeris evaluation count. With a SunMoonCache
+    the elongation is sampled through it and ``tithi_angle`` is ignored.
+    """
+    if cache is not None:
+        sample, before = cache.elongation, cache.evaluations
+        tithi_angle, rate = sample(jd_ut)
+    else:
+        sample, before = elongation, 0
+        if tithi_angle is None:
+            tithi_angle, rate = sample(jd_ut)
+            before = -1
+        else:
+            rate = MOON_MEAN_SPEED - SUN_MEAN_SPEED
+
+    tithi = int(tithi_angle // TITHI_SPAN)
+    boundary = (tithi + 1) * TITHI_SPAN % 360
+    end, _, evaluations = solve_crossing(sample, jd_ut, tithi_angle, boundary, rate)
+
+    if cache is not None:
+        evaluations = cache.evaluations - before
+    else:
+        evaluations -= before
+    return TithiEnd(tithi, end, (tithi + 1) % 30, evaluations)
+
+
+def solve_karana_yoga_end(jd_ut, cache=None):
+    """
+    End of the karana and yoga running at ``jd_ut``, from true Sun/Moon
+    positions. Both solves share ``cache`` (a SunMoonCache). Returns a
+    KaranaYogaEnd with 0-based karana (half-tithi, 0-59) and yoga indices,
+    end instants as Julian days (UT) and the evaluations made by this call.
+    """
+    cache = cache if cache is not None else SunMoonCache()
+    before = cache.evaluations
+
+    delta, delta_rate = cache.elongation(jd_ut)
+    karana = int(delta // KARANA_SPAN)
+    karana_end, _, _ = solve_crossing(cache.elongation, jd_ut, delta,
+                                      (karana + 1) * KARANA_SPAN % 360, delta_rate)
+
+    total, total_rate = cache.yoga_angle(jd_ut)
+    yoga = int(total // YOGA_SPAN) % 27
+    yoga_end, _, _ = solve_crossing(cache.yoga_angle, jd_ut, total,
+                                    (yoga + 1) * YOGA_SPAN % 360, total_rate)
+
+    return KaranaYogaEnd(karana, karana_end, yoga, yoga_end, cache.evaluations - before)
+
+
+class PanchangaEngine:
+    """
+    Solves every panchanga boundary for one instant against a single
+    SunMoonCache, so the four solves share their start sample and any
+    instant they have in common (a karana ending with its tithi, say).
+    Each limb is solved at most once per engine.
+    """
+
+    def __init__(self, jd_ut, ephemeris=None):
+        self.jd_ut = jd_ut
+        self.cache = SunMoonCache(ephemeris)
+        self._tithi = self._nakshatra = self._karana_yoga = None
+
+    def tithi(self):
+        if self._tithi is None:
+            self._tithi = solve_tithi_end(self.jd_ut, cache=self.cache)
+        return self._tithi
+
+    def nakshatra(self):
+        if self._nakshatra is None:
+            self._nakshatra = solve_nakshatra_end(self.jd_ut, cache=self.cache)
+        return self._nakshatra
+
+    def karana_yoga(self):
+        if self._karana_yoga is None:
+            self._karana_yoga = solve_karana_yoga_end(self.jd_ut, self.cache)
+        return self._karana_yoga
+
+    def solve(self):
+        """Solve all four limbs and return a PanchangaResult."""
+        tithi, nak, ky = self.tithi(), self.nakshatra(), self.karana_yoga()
+        return PanchangaResult(
+            self.jd_ut, tithi.tithi, tithi.end, tithi.next_tithi,
+            nak.nakshatra, nak.pada, nak.pada_end, nak.nakshatra_end,
+            ky.karana, ky.karana_end, ky.yoga, ky.yoga_end,
+            self.cache.evaluations)
+
+
+def datetime_to_jd(value):
+    """Julian day (UT) for a datetime; naive values are taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    hour = value.hour + value.minute / 60 + (value.second + value.microsecond / 1e6) / 3600
+    return swe.julday(value.year, value.month, value.day, hour, swe.GREG_CAL)
+
+
+def jd_to_datetime(jd):
+    """Naive datetime for a Julian day, rounded to the nearest second."""
+    year, month, day, hour = swe.revjul(jd, swe.GREG_CAL)
+    return datetime(year, month, day) + timedelta(seconds=round(hour * 3600))
+
+
+# --- Panchanga limbs ---
+
+TELUGU_YEAR_NAMES = [
+    "Prabhava", "Vibhava", "Sukla", "Pramodoota", "Prajotpatti", "Angeerasa", "Sreemukha", "Bhava", "Yuva",
+    "Dhata", "Isvara", "Bahudhaanya", "Pramadhi", "Vikrama", "Vr̥uṣha", "Chitrabhanu", "Svabhaanu", "Taaraṇa",
+    "Paarthiva", "Vyaya", "Sarvajittu", "Sarvadhari", "Virodhi", "Vikr̥uti", "Khara", "Nandana", "Vijaya", "Jaya",
+    "Manmadha", "Durmukhi", "Hevaḷambi", "Viḷambi", "Vikaari", "Saarvari", "Plava", "Subhakr̥ut", "Sobhakr̥ut",
+    "Krodhi", "Viswaavasu", "Paraabhava", "Plavanga", "Keelaka", "Saumya", "Saadharaṇa", "Virodhikr̥ut", "Pareedhavi",
+    "Pramaadeecha", "Ananda", "Raakṣhasa", "Nala", "Pingaḷa", "Kaaḷayukti", "Siddharthi", "Raudri", "Durmati", "Dundubhi",
+    "Rudhirodgari", "Raktaakṣhi", "Krodhana", "Akṣaya"
+]
+
+TITHI_NAMES = [
+    "Pratipada", "Dwitiya", "Tritiya", "Chaturthi", "Panchami", "Shashti",
+    "Saptami", "Ashtami", "Navami", "Dashami", "Ekadashi", "Dwadashi",
+    "Trayodashi", "Chaturdashi", "Purnima",
+    "Pratipada (Krishna)", "Dwitiya (Krishna)", "Tritiya (Krishna)", "Chaturthi (Krishna)",
+    "Panchami (Krishna)", "Shashti (Krishna)", "Saptami (Krishna)", "Ashtami (Krishna)",
+    "Navami (Krishna)", "Dashami (Krishna)", "Ekadashi (Krishna)", "Dwadashi (Krishna)",
+    "Trayodashi (Krishna)", "Chaturdashi (Krishna)", "Amavasya"
+]
+
+NAKSHATRA_NAMES = [
+    "Ashwini","Bharani","Krittika","Rohini","Mrigashira","Ardra","Punarvasu","Pushya",
+    "Ashlesha","Magha","Purva Phalguni","Uttara Phalguni","Hasta","Chitra","Swati","Vishakha",
+    "Anuradha","Jyeshtha","Mula","Purva Ashadha","Uttara Ashadha","Shravana","Dhanishta",
+    "Shatabhisha","Purva Bhadrapada","Uttara Bhadrapada","Revati"
+]
+
+YOGA_NAMES = [
+    "Vishkumbha","Preeti","Ayushman","Saubhagya","Shobhana","Atiganda","Sukarma","Dhriti",
+    "Shoola","Ganda","Vriddhi","Dhruva","Vyaghata","Harshana","Vajra","Siddhi","Vyatipata",
+    "Variyana","Parigha","Shiva","Siddha","Sadhya","Shubha","Shukla","Brahma","Indra","Vaidhriti"
+]
+
+KARANA_NAMES = [
+    "Bava","Balava","Kaulava","Taitila","Garaja","Vanija","Vishti",
+    "Shakuni","Chatushpada","Nagava","Kimstughna"
+]
+
+KARANA_SEQUENCE = (
+    ["Kimstughna"]
+    + ["Bava", "Balava", "Kaulava", "Taitila", "Garaja", "Vanija", "Vishti"] * 8
+    + ["Shakuni", "Chatushpada", "Naga"]
+)
+
+
+def get_telugu_year(gregorian_year):
+    base_year = 1927  # Prabhava
+    index = (gregorian_year - base_year) % 60
+    return TELUGU_YEAR_NAMES[index]
+
+
+def compute_tithi(moon_sidereal, sun_sidereal, year, month, day, hour, minute, second, utc_offset,
+                  exact=True, engine=None):
+    """
+    Current tithi, its end time (local) and the next tithi.
+    exact=False uses the old hourly sampler (get_tithi_transitions) for comparison.
+    ``engine`` is the chart's PanchangaEngine, if the caller has one; the
+    exact tithi is the one it solved, so it always matches the end time.
+    """
+    if exact:
+        if engine is None:
+            jd_local = swe.julday(year, month, day, hour + minute/60 + second/3600, swe.GREG_CAL)
+            engine = PanchangaEngine(jd_local - utc_offset / 24.0)
+        result = engine.tithi()
+        tithi_name = TITHI_NAMES[result.tithi]
+        tithi_end_time = jd_to_datetime(result.end + utc_offset / 24.0)
+        next_tithi_name = TITHI_NAMES[result.next_tithi]
+        tithi_end_message = (f"{tithi_name} ends at {tithi_end_time.strftime('%Y-%m-%d %H:%M:%S')}, "
+                             f"then {next_tithi_name} begins")
+        return tithi_name, tithi_end_time, next_tithi_name, tithi_end_message
+
+    # Current tithi name
+    tithi_angle = (moon_sidereal - sun_sidereal) % 360
+    tithi_index = int(tithi_angle // 12)
+    tithi_name = TITHI_NAMES[tithi_index]
+
+    # Use transitions to find end time and next tithi
+    transitions = get_tithi_transitions(year, month, day, hour, minute, second, utc_offset)
+    # Find the first transition where tithi changes
+    next_tithi_name = None
+    tithi_end_time = None
+    for i in range(1, len(transitions)):
+        if transitions[i]["tithi"] != transitions[i-1]["tithi"]:
+            next_tithi_name = transitions[i]["tithi"]
+            tithi_end_time = transitions[i]["datetime"]
+            break
+
+    # Build message
+    if tithi_end_time and next_tithi_name:
+        tithi_end_message = f"{tithi_name} ends at {tithi_end_time.strftime('%Y-%m-%d %H:%M')}, then {next_tithi_name} begins"
+    else:
+        tithi_end_message = f"{tithi_name} continues all day"
+
+    return tithi_name, tithi_end_time, next_tithi_name, tithi_end_message
+
+
+def get_tithi_transitions(year, month, day, hour, minute, second, utc_offset, steps=24):
+    """Compute Tithi transitions for the given day (hourly samples)."""
+    jd_start = swe.julday(year, month, day, hour + minute/60 + second/3600)
+    ctx = default_context()
+    transitions = []
+    for i in range(steps):
+        jd = jd_start + i/24.0  # step in hours
+        moon_lon = ctx.calc_ut(jd, swe.MOON)[0][0]
+        sun_lon  = ctx.calc_ut(jd, swe.SUN)[0][0]
+        ayanamsa = ctx.get_ayanamsa(jd)
+        moon_sid = (moon_lon - ayanamsa) % 360
+        sun_sid  = (sun_lon - ayanamsa) % 360
+        sep = (moon_sid - sun_sid) % 360
+        tithi_index = int(sep // 12) % len(TITHI_NAMES)
+        tithi_name  = TITHI_NAMES[tithi_index]
+        dt = swe.revjul(jd, swe.GREG_CAL)
+        dt_obj = datetime(dt[0], dt[1], dt[2], int((dt[3])%24), int((dt[3]%1)*60))
+        transitions.append({"tithi": tithi_name, "datetime": dt_obj})
+    return transitions
+
+
+def compute_nakshatra(abs_lon, jd_ut, utc_offset, engine=None):
+    """
+    Current Nakshatra and pada of the Moon, and the time (UT) the pada ends.
+    The full solver result, including the Nakshatra end, comes from
+    PanchangaEngine.nakshatra().
+    """
+    engine = engine if engine is not None else PanchangaEngine(jd_ut)
+    result = engine.nakshatra()
+
+    nak_name = NAKSHATRA_NAMES[result.nakshatra]
+    nak_end = jd_to_datetime(result.pada_end)
+    return nak_name, result.pada, nak_end
+
+
+def compute_karana(moon_sidereal, sun_sidereal):
+    tithi_angle = (moon_sidereal - sun_sidereal) % 360
+    karana_index = int(tithi_angle // 6)
+    return KARANA_SEQUENCE[karana_index]
+
+
+def compute_yoga(moon_sidereal, sun_sidereal):
+    yoga_index = int((moon_sidereal + sun_sidereal) % 360 // (360 / 27))
+    return YOGA_NAMES[yoga_index]
+
+
+def current_karana_yoga_end(t0, sidereal_positions, jd_ut=None, engine=None):
+    """
+    Compute current Karana/Yoga names and their end times.
+    t0: datetime (UTC, tz-aware; naive values are taken as UTC)
+    sidereal_positions: dict with keys including "Sun" and "Moon"
+        Values are sidereal longitudes in degrees.
+    jd_ut: Julian day of t0, if the caller already has it.
+    Names and end times come from one solve on true Sun/Moon positions by
+    ``engine`` (the chart's PanchangaEngine) or a fresh one; the
+    boundaries returned are the Moon - Sun and Moon + Sun angles at
+    which the karana and yoga end.
+    """
+
+    # --- Solve both against one Sun/Moon sample cache ---
+    if engine is None:
+        engine = PanchangaEngine(jd_ut if jd_ut is not None else datetime_to_jd(t0))
+    ends = engine.karana_yoga()
+    t_k_end = jd_to_datetime(ends.karana_end).replace(tzinfo=timezone.utc)
+    t_y_end = jd_to_datetime(ends.yoga_end).replace(tzinfo=timezone.utc)
+
+    # --- Karana name mapping ---
+    karana_names_cycle = ["Bava", "Balava", "Kaulava", "Taitila",
+                          "Garaja", "Vanija", "Vishti"]
+    fixed_start = ["Kimstughna"]
+    fixed_end   = ["Sakuni", "Chatushpada", "Nagavamsa"]
+
+    half_tithi_index = ends.karana      # 0–59
+    if half_tithi_index == 0:
+        karana_name = fixed_start[0]
+    elif half_tithi_index >= 57:
+        karana_name = fixed_end[half_tithi_index - 57]
+    else:
+        karana_name = karana_names_cycle[(half_tithi_index - 1) % 7]
+
+    # --- Yoga name mapping ---
+    yoga_names = [
+        "Vishkambha", "Priti", "Ayushman", "Saubhagya", "Shobhana",
+        "Atiganda", "Sukarma", "Dhriti", "Shoola", "Ganda",
+        "Vriddhi", "Dhruva", "Vyaghata", "Harshana", "Vajra",
+        "Siddhi", "Vyatipata", "Variyan", "Parigha", "Shiva",
+        "Siddha", "Sadhya", "Shubha", "Shukla", "Brahma",
+        "Indra", "Vaidhriti"
+    ]
+    yoga_index = ends.yoga
+    yoga_name = yoga_names[yoga_index]
+
+    return {
+        "karana_name": karana_name,
+        "karana_end": t_k_end,
+        "yoga_name": yoga_name,
+        "yoga_end": t_y_end,
+        "karana_boundary": (ends.karana + 1) * KARANA_SPAN,
+        "yoga_boundary": (ends.yoga + 1) * YOGA_SPAN
+    }
@@ -0,0 +1,429 @@
+"""
+PDF export: the South Indian rasi chakra and the chart report page.
+
+A report page is split into a static skeleton (section headings, field
+labels, the rasi grid and its labels, the planet table's header, names
+and rules) and the per-chart text drawn over it. write_chart_pdf() draws
+both for a single page; ChartPdfWriter draws the skeleton once per file as
+a form XObject and only the chart text on each page, for batch exports.
+
+CalendarPdfWriter lays out birthchart.almanac days as one table per month.
+"""
+
+import os
+from datetime import date
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+from birthchart import instrument
+from birthchart.chart import PLANET_ROWS, planet_abbr
+
+WIDTH, HEIGHT = A4
+
+# Page layout
+CHART_X, CHART_Y, CHART_SIZE = 330, HEIGHT - 310, 220
+INFO_X, INFO_Y, INFO_STEP = 50, HEIGHT - 115, 18
+INFO_FIELDS = ("NAME", "DATE", "TIME", "PLACE", "WEEKDAY", "LAT", "LONG", "TELUGU_YEAR",
+               "TITHI", "TITHI_END", "NAKSHATRA", "NAK_END", "KARANA", "KARANA_END", "YOGA", "YOGA_END")
+TABLE_TOP = INFO_Y - len(INFO_FIELDS) * INFO_STEP - 70
+TABLE_HEADER = ["Planet", "Longitude", "ABS.Longitude", "Sign"]
+TABLE_COL_WIDTHS = [100, 120, 120, 80]
+TABLE_FONT_SIZE = 12        # leading is the same, so one line is this tall
+TABLE_PADDING = 3           # above and below the line
+TABLE_ROW_HEIGHT = TABLE_FONT_SIZE + 2 * TABLE_PADDING
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('FONTNAME',(0,0),(-1,0),'Helvetica-Bold'),   # header row only
+    ('FONTNAME', (0,1), (-1,-1), 'Courier'),      # body rows only
+    ('FONTSIZE', (0,0), (-1,-1), TABLE_FONT_SIZE),
+    ('LEFTPADDING',(0,0),(-1,-1),6),
+    ('RIGHTPADDING',(0,0),(-1,-1),6),
+    ('TOPPADDING',(0,0),(-1,-1),TABLE_PADDING),
+    ('BOTTOMPADDING',(0,0),(-1,-1),TABLE_PADDING),
+])
+
+# Fixed rāśi positions
+RASI_ORDER = {
+    "Pi": (0,0), "Ar": (0,1), "Ta": (0,2), "Ge": (0,3),
+    "Aq": (1,0), "Cn": (1,3),
+    "Cp": (2,0), "Le": (2,3),
+    "Sg": (3,0), "Sc": (3,1), "Li": (3,2), "Vi": (3,3)
+}
+RASI_NAMES = ["Ar","Ta","Ge","Cn","Le","Vi","Li","Sc","Sg","Cp","Aq","Pi"]
+
+SKELETON_FORM = "chartpage"
+
+# Calendar pages
+CALENDAR_MARGIN = 20
+CALENDAR_HEADER = ["Date", "Day", "Sunrise", "Sunset", "Tithi", "Nakshatra", "Yoga", "Karana"]
+CALENDAR_COL_WIDTHS = [30, 28, 34, 34, 132, 112, 92, 85]
+CALENDAR_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.lightblue),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 6.5),
+    ('LEADING', (0,0), (-1,-1), 7),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('GRID', (0,0), (-1,-1), 0.3, colors.black),
+    ('TOPPADDING', (0,0), (-1,-1), 1),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+    ('LEFTPADDING', (0,0), (-1,-1), 3),
+    ('RIGHTPADDING', (0,0), (-1,-1), 3),
+])
+
+
+def draw_south_indian_grid(c, x, y, size):
+    """The static part of the Rāśi Chakra: grid lines, rāśi labels and the centre title."""
+    cell = size / 4
+
+    # Draw horizontal lines
+    for i in range(5):
+        c.line(x, y + i*cell, x + size, y + i*cell)
+
+    # Draw vertical lines, skipping merged middle block
+    for j in range(5):
+        if j == 2:
+            # draw only top and bottom segments, leave the middle open
+            c.line(x + j*cell, y + 3*cell, x + j*cell, y + size)   # top two cells
+            c.line(x + j*cell, y, x + j*cell, y + cell)            # bottom cell
+        else:
+            c.line(x + j*cell, y, x + j*cell, y + size)
+
+    # Draw rāśi labels (smaller, gray font)
+    c.setFont("Helvetica", 9)
+    c.setFillColorRGB(0.5, 0.5, 0.5)  # gray color
+    for rasi, (row,col) in RASI_ORDER.items():
+        rx = x + col*cell
+        ry = y + (3-row)*cell
+        c.drawString(rx+2, ry+cell-12, rasi)
+    c.setFillColorRGB(0, 0, 0)        # reset to black for planets and other text
+
+    # Merged cell: RASI CHAKRA
+    rx = x + cell
+    ry = y + 2*cell
+    c.setFont("Helvetica-Bold", 11)
+    c.drawCentredString(rx + cell, ry + cell/2, "RASI CHAKRA")
+
+
+def draw_south_indian_planets(c, x, y, size, sidereal_positions, dob, tob):
+    """The per-chart part of the Rāśi Chakra: stacked planets, Ascendant and DOB/TOB."""
+    cell = size / 4
+
+    # Prepare planet stacking per rāśi
+    rasi_planets = {rasi: [] for rasi in RASI_ORDER}
+    for planet, lon in sidereal_positions.items():
+        if planet == "Ascendant":
+            continue  # skip Ascendant here, handle separately
+        rasi_index = int(lon // 30)
+        rasi = RASI_NAMES[rasi_index]
+        if rasi in rasi_planets:
+            abbr = planet_abbr.get(planet, planet[:2])
+            rasi_planets[rasi].append(abbr)
+
+    # Draw stacked planets with dynamic font sizing
+    for rasi, planets in rasi_planets.items():
+        if rasi in RASI_ORDER and planets:
+            row, col = RASI_ORDER[rasi]
+            rx = x + col*cell
+            ry = y + (3-row)*cell
+
+            count = len(planets)
+            if count >= 6:
+                font_size, line_gap = 9, 10
+            elif count >= 4:
+                font_size, line_gap = 10, 11
+            else:
+                font_size, line_gap = 11, 12
+
+            c.setFont("Courier", font_size)
+            # center the stack vertically
+            offset = (count-1) * line_gap / 2
+            for i, planet in enumerate(planets):
+                c.drawCentredString(rx + cell/2, ry + cell/2 - offset + i*line_gap, planet)
+
+    # Draw Ascendant separately as cusp marker
+    asc_lon = sidereal_positions.get("Ascendant", 0)
+    asc_rasi = RASI_NAMES[int(asc_lon // 30)]
+    if asc_rasi in RASI_ORDER:
+        row, col = RASI_ORDER[asc_rasi]
+        rx = x + col*cell
+        ry = y + (3-row)*cell
+        count = len(rasi_planets[asc_rasi])
+
+        # dynamic font sizing based on crowd
+        if count >= 6:
+            font_size, line_gap = 9, 10
+        elif count >= 4:
+            font_size, line_gap = 10, 11
+        else:
+            font_size, line_gap = 11, 12
+
+        c.setFont("Courier", font_size)
+
+        if count == 0:
+            asc_y = ry + cell/2
+        else:
+            offset = (count-1) * line_gap / 2
+            asc_y = ry + cell/2 - offset - line_gap  # one line above the stack
+
+        c.drawCentredString(rx + cell/2, asc_y, "Asc")
+
+    # Merged cell: DOB / TOB
+    rx = x + cell
+    ry = y + cell
+    c.setFont("Courier-Bold", 11)
+    c.drawCentredString(rx + cell, ry + cell/2 + 6, f"DOB: {dob}")
+    c.drawCentredString(rx + cell, ry + cell/2 - 6, f"TOB: {tob}")
+
+
+def draw_south_indian_chart(c, x, y, size, sidereal_positions, dob, tob):
+    """Draw South Indian 4x4 Rāśi Chakra with merged cells and spaced planets."""
+    draw_south_indian_grid(c, x, y, size)
+    draw_south_indian_planets(c, x, y, size, sidereal_positions, dob, tob)
+
+
+def _planet_table(rows):
+    table = Table([TABLE_HEADER] + rows, colWidths=TABLE_COL_WIDTHS, rowHeights=TABLE_ROW_HEIGHT)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+_table_cells = None
+
+
+def _table_value_cells():
+    """
+    (x, baseline y) of every value cell of the planet table, by row then
+    column, from the column widths and row height the table is built with:
+    a one-line string centred in its column, its baseline TABLE_PADDING
+    above the bottom of its row, as the table's CENTER/MIDDLE style puts
+    it. Computed once.
+    """
+    global _table_cells
+    if _table_cells is None:
+        x = (WIDTH - sum(TABLE_COL_WIDTHS)) / 2
+        centres = []
+        for col_width in TABLE_COL_WIDTHS:
+            centres.append(x + col_width / 2)
+            x += col_width
+        cells = []
+        for i in range(1, len(PLANET_ROWS) + 1):
+            baseline = TABLE_TOP - (i + 1) * TABLE_ROW_HEIGHT + TABLE_PADDING
+            cells.append([(centre, baseline) for centre in centres[1:]])
+        _table_cells = cells
+    return _table_cells
+
+
+def _info_label(label):
+    return f"{label:<13} : "
+
+
+def draw_page_skeleton(c):
+    """Everything on a report page that doesn't depend on the chart."""
+    # Section 1: Birth Data – Panchangam Details
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, HEIGHT - 90, "BIRTH DATA – PANCHANGAM DETAILS")
+
+    c.setFont("Courier", 11)  # larger font for details
+    for i, label in enumerate(INFO_FIELDS):
+        c.drawString(INFO_X, INFO_Y - i * INFO_STEP, _info_label(label))
+
+    # Section 2: Rāśi Chakra Diagram
+    draw_south_indian_grid(c, CHART_X, CHART_Y, CHART_SIZE)
+
+    # Section 3: Planet Positions
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, TABLE_TOP + 30, "PLANET POSITIONS")
+
+    table = _planet_table([[planet, "", "", ""] for planet in PLANET_ROWS])
+    width, height = table.wrap(0, 0)
+    table.drawOn(c, (WIDTH - width) / 2, TABLE_TOP - height)
+
+
+def draw_page_text(c, chart):
+    """The text of ``chart`` (a ChartResult) over draw_page_skeleton()."""
+    # Top title
+    c.setFont("Helvetica-Bold", 16)  # larger title font
+    c.drawCentredString(WIDTH / 2, HEIGHT - 50, f"Birth Chart for {chart.name}".upper())
+
+    # Telugu year cleanup
+    telugu_year = chart.info("TELUGU_YEAR").replace("(", "").replace(")", "").replace("☒", "").strip()
+
+    c.setFont("Courier", 11)
+    value_x = INFO_X + stringWidth(_info_label("NAME"), "Courier", 11)
+    for i, label in enumerate(INFO_FIELDS):
+        value = telugu_year if label == "TELUGU_YEAR" else chart.info(label)
+        c.drawString(value_x, INFO_Y - i * INFO_STEP, f"{value}")
+
+    draw_south_indian_planets(c, CHART_X, CHART_Y, CHART_SIZE, chart.positions, chart.dob, chart.tob)
+
+    c.setFont("Courier", 12)
+    for planet, cells in zip(PLANET_ROWS, _table_value_cells()):
+        for text, (x, y) in zip(chart.planet(planet), cells):
+            c.drawCentredString(x, y, text)
+
+
+def write_chart_pdf(chart, filename=None):
+    """
+    Write the one-page report for ``chart`` (a ChartResult).
+    Returns the file name, "<name>_birth_chart.pdf" unless given.
+    """
+    if filename is None:
+        filename = f"{chart.name}_birth_chart.pdf"
+    with instrument.span("pdf"):
+        c = canvas.Canvas(filename, pagesize=A4)
+        draw_page_skeleton(c)
+        draw_page_text(c, chart)
+        c.save()
+    return filename
+
+
+class ChartPdfWriter:
+    """
+    Report pages for many charts, one page per add().
+
+    The page skeleton is drawn once per file as a form XObject and each
+    page only adds the chart's text. reportlab keeps a document in memory
+    until it is saved, so with ``pages_per_file`` the output rolls over to
+    numbered files ("book-0001.pdf", ...) of that many pages each, which
+    keeps memory flat for any number of charts; ``pages_per_file=1`` gives
+    one PDF per chart.
+
+        with ChartPdfWriter("charts.pdf") as writer:
+            for chart in charts:
+                writer.add(chart)
+    """
+
+    def __init__(self, filename, pages_per_file=None):
+        self.filename = filename
+        self.pages_per_file = pages_per_file
+        self.files = []
+        self.pages = 0
+        self._canvas = None
+        self._file_pages = 0
+
+    def _path(self):
+        if not self.pages_per_file:
+            return self.filename
+        stem, ext = os.path.splitext(self.filename)
+        return f"{stem}-{len(self.files) + 1:04d}{ext or '.pdf'}"
+
+    def _open(self):
+        path = self._path()
+        self._canvas = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+        self._canvas.beginForm(SKELETON_FORM)
+        draw_page_skeleton(self._canvas)
+        self._canvas.endForm()
+        self._file_pages = 0
+        self.files.append(path)
+
+    def add(self, chart):
+        """Append a page for ``chart`` (a ChartResult)."""
+        with instrument.span("pdf"):
+            if self._canvas is None:
+                self._open()
+            c = self._canvas
+            c.doForm(SKELETON_FORM)
+            draw_page_text(c, chart)
+            c.showPage()
+        self.pages += 1
+        self._file_pages += 1
+        if self.pages_per_file and self._file_pages >= self.pages_per_file:
+            self._save()
+
+    def _save(self):
+        self._canvas.save()
+        self._canvas = None
+
+    def close(self):
+        """Finish the current file; returns the list of files written."""
+        if self._canvas is not None:
+            self._save()
+        return self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _calendar_cell(spans, day):
+    """One line per limb overlapping ``day``: "Name upto HH:MM" if it ends that day."""
+    return "\n".join(f"{span.name} upto {span.end:%H:%M}" if span.end.date() == day else span.name
+                     for span in spans)
+
+
+def _calendar_row(day):
+    return [day.date.strftime("%d"), day.weekday[:3],
+            f"{day.sunrise:%H:%M}" if day.sunrise else "-",
+            f"{day.sunset:%H:%M}" if day.sunset else "-",
+            *(_calendar_cell(spans, day.date) for spans in (day.tithi, day.nakshatra, day.yoga, day.karana))]
+
+
+class CalendarPdfWriter:
+    """
+    A panchanga calendar, one page per month, from birthchart.almanac
+    CalendarDays passed to add() in date order. Only the current month is
+    held in memory.
+    """
+
+    def __init__(self, filename, title=""):
+        self.filename = filename
+        self.title = title
+        self.pages = 0
+        self._canvas = canvas.Canvas(filename, pagesize=A4, pageCompression=1)
+        self._month = None
+        self._rows = []
+
+    def add(self, day):
+        month = (day.date.year, day.date.month)
+        if month != self._month and self._rows:
+            self._page()
+        self._month = month
+        self._rows.append(_calendar_row(day))
+
+    def _page(self):
+        c = self._canvas
+        year, month = self._month
+        heading = date(year, month, 1).strftime("%B %Y")
+        c.setFont("Helvetica-Bold", 14)
+        c.drawCentredString(WIDTH / 2, HEIGHT - CALENDAR_MARGIN - 14,
+                            f"{self.title} – {heading}" if self.title else heading)
+
+        table = Table([CALENDAR_HEADER] + self._rows, colWidths=CALENDAR_COL_WIDTHS)
+        table.setStyle(CALENDAR_STYLE)
+        width, height = table.wrap(0, 0)
+        top = HEIGHT - CALENDAR_MARGIN - 28
+        scale = min(1.0, (top - CALENDAR_MARGIN) / height)     # shrink a month with many limb changes to fit
+        c.saveState()
+        c.translate((WIDTH - width * scale) / 2, top - height * scale)
+        c.scale(scale, scale)
+        table.drawOn(c, 0, 0)
+        c.restoreState()
+        c.showPage()
+        self.pages += 1
+        self._rows = []
+
+    def close(self):
+        """Finish the last month and save; returns the file name."""
+        if self._canvas is not None:
+            if self._rows:
+                self._page()
+            self._canvas.save()
+            self._canvas = None
+        return self.filename
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
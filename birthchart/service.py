@@ -0,0 +1,314 @@
+"""
+Local HTTP service for the web front end: the app's charts, PDFs and
+panchanga as JSON over plain asyncio (no web framework).
+
+    python -m birthchart.service --port 8765 --workers 4
+
+    GET /chart?name=Ravi&dob=1985-07-14&tob=10:25:30&city=Hyderabad[&ayanamsa=raman]
+    GET /chart.pdf?...same parameters...
+    GET /panchanga?date=2026-03-01&city=Hyderabad[&days=7][&lat=..&lon=..&tz=..][&ayanamsa=..]
+    GET /stats
+
+/chart returns the ChartResult.as_json() fields (as in the bulk output),
+/chart.pdf the app's one-page report and /panchanga one almanac day_json()
+per day. Errors are {"error": ...} with status 400 for bad input.
+
+The event loop only parses requests and writes responses; charts, PDFs
+and calendars are computed on a process pool whose workers return the
+encoded bodies. Requests are keyed by normalized input (chart_key(), so
+spacing, date padding and place spelling don't matter): a key already in
+the LRU is answered from it, and a key already being computed waits for
+that computation instead of starting another. The X-Cache response header
+says which happened ("hit", "coalesced" or "miss").
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from birthchart.chart import AYANAMSA, ChartResult, chart_key, compute_chart
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode
+from birthchart.gazetteer import normalize_name
+
+MAX_DAYS = 31           # per /panchanga request
+MAX_HEADER_BYTES = 16 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+_worker = {}    # per-process state set up by _init_worker
+
+
+# --- Worker side ---
+
+def _init_worker(lookup, geocache_path):
+    """Per-process setup: data files, geocode cache and the lookup used for every city."""
+    from birthchart.chebyshev import default_ephemeris
+    from birthchart.gazetteer import default_gazetteer
+
+    default_ephemeris()
+    default_gazetteer()
+    if lookup is None:
+        from birthchart import geocode
+        from birthchart.geocache import GeoCache
+
+        lookup = partial(geocode.lookup_city, cache=GeoCache(geocache_path))
+    _worker["lookup"] = lookup
+    _worker["contexts"] = {}
+
+
+def _context(ayanamsa):
+    ctx = _worker["contexts"].get(ayanamsa)
+    if ctx is None:
+        ctx = _worker["contexts"][ayanamsa] = EphemerisContext(ayanamsa)
+    return ctx
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def chart_job(name, dob, tob, city, ayanamsa):
+    """(packed ChartResult, JSON body) for one chart."""
+    result = compute_chart(name, dob, tob, city, _worker["lookup"], ephemeris=_context(ayanamsa))
+    return result.pack(), _encode(result.as_json())
+
+
+def pdf_job(packed):
+    """The one-page report for a packed ChartResult, as PDF bytes."""
+    from birthchart import pdf
+
+    out = io.BytesIO()
+    pdf.write_chart_pdf(ChartResult.unpack(packed), out)
+    return out.getvalue()
+
+
+def panchanga_job(first_day, days, city, lat, lon, tz_string, ayanamsa):
+    """JSON body with the almanac days from ``first_day``; the place is looked up unless lat/lon/tz are given."""
+    from birthchart.almanac import day_json, panchanga_calendar
+
+    if lat is None:
+        lat, lon, _, tz_string = _worker["lookup"](city)
+    calendar = panchanga_calendar(first_day, first_day + timedelta(days=days - 1), lat, lon, tz_string,
+                                  _context(ayanamsa))
+    return _encode({"place": city, "lat": lat, "lon": lon, "tz": tz_string,
+                    "days": [day_json(day) for day in calendar]})
+
+
+# --- Event loop side ---
+
+class ChartService:
+    """
+    Request handling, the response cache and in-flight coalescing. The
+    cache and the in-flight table are only touched from the event loop.
+    """
+
+    def __init__(self, workers=None, lookup=None, geocache_path=None, cache_entries=1024):
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                        initializer=_init_worker, initargs=(lookup, geocache_path))
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()     # key -> value
+        self._in_flight = {}            # key -> asyncio.Task computing it
+        self.stats = {"requests": 0, "computed": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def cached(self, key, job, *args):
+        """
+        (value, how) for ``key``: from the cache ("hit"), by waiting for the
+        computation already running for it ("coalesced"), or by running
+        job(*args) on the pool ("miss"). Failures are not cached.
+        """
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return self._cache[key], "hit"
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            how = "coalesced"
+        else:
+            task = self._in_flight[key] = asyncio.ensure_future(self._compute(key, job, args))
+            # Retrieve the exception even if every waiting request has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            how = "miss"
+        # shield: a client disconnecting doesn't cancel the work others are waiting for
+        return await asyncio.shield(task), how
+
+    async def _compute(self, key, job, args):
+        try:
+            value = await asyncio.get_running_loop().run_in_executor(self.pool, job, *args)
+        finally:
+            del self._in_flight[key]
+        self.stats["computed"] += 1
+        self._cache[key] = value
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return value
+
+    # Endpoints: each returns (content type, body, how)
+
+    async def chart(self, params):
+        args, key = _chart_args(params)
+        (_, body), how = await self.cached(("chart", key), chart_job, *args)
+        return "application/json", body, how
+
+    async def chart_pdf(self, params):
+        args, key = _chart_args(params)
+        (packed, _), _ = await self.cached(("chart", key), chart_job, *args)
+        body, how = await self.cached(("pdf", key), pdf_job, packed)
+        return "application/pdf", body, how
+
+    async def panchanga(self, params):
+        try:
+            first_day = datetime.strptime(_required(params, "date"), "%Y-%m-%d").date()
+            days = int(params.get("days", 1))
+        except ValueError as e:
+            raise ValueError(f"bad date or days: {e}") from None
+        if not 1 <= days <= MAX_DAYS:
+            raise ValueError(f"days must be 1-{MAX_DAYS}")
+        ayanamsa = ayanamsa_mode(params.get("ayanamsa", AYANAMSA))
+        if params.get("lat") and params.get("lon") and params.get("tz"):
+            lat, lon, tz_string = float(params["lat"]), float(params["lon"]), params["tz"]
+            city = params.get("city", "")
+            place = (lat, lon, tz_string)
+        else:
+            city = _required(params, "city")
+            lat = lon = tz_string = None
+            place = normalize_name(city)
+        key = ("panchanga", first_day, days, place, ayanamsa)
+        body, how = await self.cached(key, panchanga_job, first_day, days, city, lat, lon, tz_string, ayanamsa)
+        return "application/json", body, how
+
+    async def stats_page(self, params):
+        stats = dict(self.stats, cache_entries=len(self._cache), in_flight=len(self._in_flight))
+        return "application/json", _encode(stats), "none"
+
+    ROUTES = {"/chart": chart, "/chart.pdf": chart_pdf, "/panchanga": panchanga, "/stats": stats_page}
+
+    async def respond(self, method, target):
+        """(status, content type, body, how) for one request."""
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        route = self.ROUTES.get(url.path)
+        if route is None:
+            return 404, "application/json", _encode({"error": f"no such endpoint {url.path}"}), "none"
+        if method not in ("GET", "HEAD"):
+            return 405, "application/json", _encode({"error": "use GET"}), "none"
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            content_type, body, how = await route(self, params)
+            return 200, content_type, body, how
+        except ValueError as e:
+            self.stats["errors"] += 1
+            return 400, "application/json", _encode({"error": str(e)}), "none"
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 500, "application/json", _encode({"error": f"{type(e).__name__}: {e}"}), "none"
+
+    async def handle(self, reader, writer):
+        """asyncio.start_server() callback: HTTP/1.1 with keep-alive, one request at a time."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _send(writer, 431, "application/json", b"{}", "none", False)
+                    break
+                request_line, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await _send(writer, 400, "application/json", _encode({"error": "bad request line"}),
+                                "none", False)
+                    break
+                headers = {}
+                for line in lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length"):
+                    await reader.readexactly(int(headers["content-length"]))
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                status, content_type, body, how = await self.respond(method, target)
+                await _send(writer, status, content_type, b"" if method == "HEAD" else body, how, keep_alive,
+                            len(body))
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def _required(params, name):
+    value = params.get(name, "").strip()
+    if not value:
+        raise ValueError(f"missing parameter {name!r}")
+    return value
+
+
+def _chart_args(params):
+    """(chart_job arguments, cache key) from /chart query parameters."""
+    name, dob, tob, city = (_required(params, p) for p in ("name", "dob", "tob", "city"))
+    ayanamsa = ayanamsa_mode(params.get("ayanamsa", AYANAMSA))
+    return (name, dob, tob, city, ayanamsa), chart_key(name, dob, tob, city, ayanamsa)
+
+
+async def _send(writer, status, content_type, body, how, keep_alive, length=None):
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body) if length is None else length}\r\n"
+            f"X-Cache: {how}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(service, host="127.0.0.1", port=8765, ready=None):
+    """Serve ``service`` until cancelled; ``ready(port)`` is called once listening."""
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+    async with server:
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m birthchart.service", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--geocache", help="SQLite geocode cache shared by the workers")
+    parser.add_argument("--cache-entries", type=int, default=1024, help="responses kept (default 1024)")
+    args = parser.parse_args(argv)
+
+    service = ChartService(args.workers, geocache_path=args.geocache, cache_entries=args.cache_entries)
+    try:
+        asyncio.run(serve(service, args.host, args.port,
+                          ready=lambda port: print(f"Serving on http://{args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Sign ingresses and nakshatra transits of the nine grahas over a date range.
+
+    python -m birthchart.transits 2026-01-01 2027-01-01 --graha Saturn --graha Jupiter
+    python -m birthchart.transits 2026-03-01 2026-04-01 --graha Moon --nakshatra
+
+Each graha's sidereal longitude is sampled with steps sized from how fast
+it can move. The Sun, Moon and nodes never change direction, so they use
+a fixed step of one boundary span at top speed and every boundary between
+two samples is crossed exactly once. The other grahas turn retrograde: the
+next sample is placed where, with the current speed and the graha's
+maximum acceleration, it could at most just reach the nearest boundary,
+so a crossing back and forth is not stepped over. Each bracketed crossing
+is then refined with a safeguarded Newton iteration on the graha's speed.
+Positions come from the Chebyshev tables where they cover the instant and
+were fitted for the requested ayanamsa, otherwise from Swiss Ephemeris.
+"""
+
+import argparse
+import heapq
+import math
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+import swisseph as swe
+
+from birthchart.chart import SIGNS, ZODIAC
+from birthchart.chebyshev import default_ephemeris
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode, default_context
+from birthchart.panchanga import NAKSHATRA_NAMES, NAKSHATRA_SPAN, datetime_to_jd, jd_to_datetime
+
+SIGN_SPAN = 30.0
+
+GRAHAS = ("Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu")
+
+# graha -> (body, longitude offset, min speed, max speed, max |acceleration|) in deg/day and deg/day²,
+# from Swiss Ephemeris over 1900-2100 with ~5-10% margin. Ketu is Rahu (mean node) + 180.
+MOTION = {
+    "Sun":     (swe.SUN,       0.0,   0.9,    1.05,   None),
+    "Moon":    (swe.MOON,      0.0,  11.5,   15.6,    None),
+    "Mars":    (swe.MARS,      0.0,  -0.43,   0.83,   0.017),
+    "Mercury": (swe.MERCURY,   0.0,  -1.45,   2.3,    0.22),
+    "Jupiter": (swe.JUPITER,   0.0,  -0.145,  0.255,  0.004),
+    "Venus":   (swe.VENUS,     0.0,  -0.67,   1.3,    0.047),
+    "Saturn":  (swe.SATURN,    0.0,  -0.09,   0.14,   0.004),
+    "Rahu":    (swe.MEAN_NODE, 0.0,  -0.0535, -0.0525, None),
+    "Ketu":    (swe.MEAN_NODE, 180.0, -0.0535, -0.0525, None),
+}
+
+MIN_STEP = 0.01         # days; a retrograde graha dipping across a boundary for less is not reported
+CONVERGED = 1e-6        # days (~0.1 s)
+MAX_ITERATIONS = 30
+
+# from_index/to_index are sign (0-11) or nakshatra (0-26) indices
+Transit = namedtuple("Transit", "jd_ut graha from_index to_index retrograde")
+
+
+def graha_position(graha, jd_ut, ephemeris=None):
+    """
+    Sidereal longitude and speed (deg, deg/day) of ``graha`` at ``jd_ut``,
+    for the ayanamsa of ``ephemeris`` (an EphemerisContext, default Lahiri).
+    """
+    body, offset = MOTION[graha][:2]
+    ctx = ephemeris if ephemeris is not None else default_context()
+    eph = default_ephemeris()
+    if eph is not None and eph.sid_mode == ctx.ayanamsa and eph.covers(jd_ut, body):
+        lon, speed = eph.position(jd_ut, body)
+    else:
+        lon, speed = ctx.sidereal(jd_ut, body)
+    return (lon + offset) % 360.0, speed
+
+
+def _wrap180(angle):
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def _refine(graha, boundary, t0, g0, t1, ephemeris=None):
+    """
+    Instant in [t0, t1] where ``graha`` is at ``boundary`` (degrees), given
+    g0 = wrap180(longitude - boundary) at t0 and a sign change by t1.
+    """
+    lo, hi = t0, t1
+    t = t0 + (t1 - t0) * 0.5
+    for _ in range(MAX_ITERATIONS):
+        lon, speed = graha_position(graha, t, ephemeris)
+        g = _wrap180(lon - boundary)
+        if (g < 0) == (g0 < 0):
+            lo = t
+        else:
+            hi = t
+        step = -g / speed if speed else 0.0
+        nxt = t + step
+        if not lo < nxt < hi:
+            nxt = (lo + hi) / 2
+        if abs(nxt - t) < CONVERGED:
+            return nxt
+        t = nxt
+    return t
+
+
+def _next_step(span, lon, speed, accel):
+    """Longest step after which a graha at ``lon`` moving at ``speed`` cannot be past the nearest boundary."""
+    into = lon % span
+    distance = min(into, span - into)
+    v = abs(speed)
+    step = (math.sqrt(v * v + 2.0 * accel * distance) - v) / accel
+    return max(step, MIN_STEP)
+
+
+def crossings(graha, jd_start, jd_end, span=SIGN_SPAN, ephemeris=None):
+    """
+    Yield a Transit each time ``graha`` crosses a multiple of ``span``
+    degrees in (jd_start, jd_end], with longitudes for the ayanamsa of
+    ``ephemeris`` (an EphemerisContext, default Lahiri).
+    """
+    _, _, min_speed, max_speed, accel = MOTION[graha]
+    count = round(360.0 / span)
+    fixed_step = span / max(abs(min_speed), abs(max_speed)) if accel is None else None
+
+    t0 = jd_start
+    lon0, speed0 = graha_position(graha, t0, ephemeris)
+    unwrapped0 = lon0
+    while t0 < jd_end:
+        step = fixed_step if fixed_step is not None else _next_step(span, lon0, speed0, accel)
+        t1 = min(t0 + step, jd_end)
+        lon1, speed1 = graha_position(graha, t1, ephemeris)
+        unwrapped1 = unwrapped0 + _wrap180(lon1 - lon0)
+
+        k0, k1 = math.floor(unwrapped0 / span), math.floor(unwrapped1 / span)
+        if k1 > k0:
+            boundaries = [(k, k - 1, k) for k in range(k0 + 1, k1 + 1)]
+        else:
+            boundaries = [(k, k, k - 1) for k in range(k0, k1, -1)]
+        for k, before, after in boundaries:
+            boundary = k * span % 360.0
+            jd = _refine(graha, boundary, t0, _wrap180(lon0 - boundary), t1, ephemeris)
+            retrograde = graha_position(graha, jd, ephemeris)[1] < 0
+            yield Transit(jd, graha, before % count, after % count, retrograde)
+
+        t0, lon0, speed0, unwrapped0 = t1, lon1, speed1, unwrapped1
+
+
+def sign_ingresses(jd_start, jd_end, grahas=GRAHAS, ephemeris=None):
+    """Every sign ingress of ``grahas`` in (jd_start, jd_end], in time order."""
+    return heapq.merge(*(crossings(g, jd_start, jd_end, SIGN_SPAN, ephemeris) for g in grahas))
+
+
+def nakshatra_transits(jd_start, jd_end, grahas=("Moon",), ephemeris=None):
+    """Every nakshatra change of ``grahas`` in (jd_start, jd_end], in time order."""
+    return heapq.merge(*(crossings(g, jd_start, jd_end, NAKSHATRA_SPAN, ephemeris) for g in grahas))
+
+
+def sign_index(sign):
+    """Sign index from 0-11, an abbreviation ("Pi") or a name ("Pisces")."""
+    if isinstance(sign, int):
+        return sign % 12
+    if sign in ZODIAC:
+        return ZODIAC.index(sign)
+    return [s.lower() for s in SIGNS].index(sign.lower())
+
+
+def next_ingress(graha, sign, jd_start, jd_end=None, ephemeris=None):
+    """
+    The first Transit after ``jd_start`` in which ``graha`` enters ``sign``
+    (directly or retrograde), or None if it doesn't before ``jd_end``
+    (default: 30 years on, longer than any graha's cycle).
+    """
+    target = sign_index(sign)
+    jd_end = jd_end if jd_end is not None else jd_start + 30 * 365.25
+    return next((t for t in crossings(graha, jd_start, jd_end, ephemeris=ephemeris) if t.to_index == target),
+                None)
+
+
+def describe(transit, span=SIGN_SPAN, tz=None):
+    """One line for a Transit, at UTC or in the pytz zone ``tz``."""
+    when = jd_to_datetime(transit.jd_ut)
+    if tz is not None:
+        import pytz
+
+        when = pytz.utc.localize(when).astimezone(tz)
+    names = ZODIAC if span == SIGN_SPAN else NAKSHATRA_NAMES
+    retro = " (R)" if transit.retrograde else ""
+    return (f"{when:%Y-%m-%d %H:%M:%S}  {transit.graha:<8} "
+            f"{names[transit.from_index]} -> {names[transit.to_index]}{retro}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m birthchart.transits", description=__doc__.split("\n\n")[0])
+    parser.add_argument("start", help="YYYY-MM-DD (UTC)")
+    parser.add_argument("end", help="YYYY-MM-DD (UTC)")
+    parser.add_argument("--graha", action="append", choices=GRAHAS, help="repeatable; default: all nine")
+    parser.add_argument("--nakshatra", action="store_true", help="nakshatra transits instead of sign ingresses")
+    parser.add_argument("--tz", help="print local times in this IANA zone")
+    parser.add_argument("--ayanamsa", default="lahiri", help="e.g. lahiri, raman, krishnamurti (default lahiri)")
+    args = parser.parse_args(argv)
+
+    jd_start = datetime_to_jd(datetime.strptime(args.start, "%Y-%m-%d"))
+    jd_end = datetime_to_jd(datetime.strptime(args.end, "%Y-%m-%d"))
+    tz = None
+    if args.tz:
+        import pytz
+
+        tz = pytz.timezone(args.tz)
+    ctx = EphemerisContext(ayanamsa_mode(args.ayanamsa))
+    if args.nakshatra:
+        span, events = NAKSHATRA_SPAN, nakshatra_transits(jd_start, jd_end, args.graha or ("Moon",), ctx)
+    else:
+        span, events = SIGN_SPAN, sign_ingresses(jd_start, jd_end, args.graha or GRAHAS, ctx)
+    for transit in events:
+        print(describe(transit, span, tz))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
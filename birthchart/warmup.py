@@ -0,0 +1,76 @@
+"""
+Background warm-up for the parts of the app that are only needed after a
+button press: reportlab for PDF export, requests and the timezone
+polygons for online geocoding, pytz, and the memory-mapped data files.
+
+The app starts this on a daemon thread once the first frame is drawn, so
+cold start only pays for Kivy and the chart core, and the first Generate
+or Save PDF no longer pays for the imports either.
+"""
+
+import threading
+import time
+
+
+def _import_pdf():
+    import birthchart.pdf  # noqa: F401  (reportlab canvas, platypus, colors)
+
+
+def _import_requests():
+    import requests  # noqa: F401
+
+
+def _import_pytz():
+    import pytz
+    pytz.timezone("Asia/Kolkata")
+
+
+def _timezone_polygons():
+    from birthchart.geocache import timezone_finder
+    timezone_finder()
+
+
+def _data_files():
+    from birthchart.chebyshev import default_ephemeris
+    from birthchart.gazetteer import default_gazetteer
+    default_gazetteer()
+    default_ephemeris()
+
+
+DEFAULT_STEPS = (
+    ("pytz", _import_pytz),
+    ("data files", _data_files),
+    ("reportlab", _import_pdf),
+    ("requests", _import_requests),
+    ("timezonefinder", _timezone_polygons),
+)
+
+
+def prewarm(steps=DEFAULT_STEPS):
+    """
+    Run each (name, fn) step in order and return {name: seconds}.
+    A step that fails is recorded as None; the feature it warms will
+    import (and raise) on first use as before.
+    """
+    timings = {}
+    for name, fn in steps:
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            timings[name] = None
+        else:
+            timings[name] = time.perf_counter() - start
+    return timings
+
+
+def start_prewarm(steps=DEFAULT_STEPS, callback=None):
+    """Run prewarm() on a daemon thread; ``callback(timings)`` is called from that thread."""
+    def run():
+        timings = prewarm(steps)
+        if callback is not None:
+            callback(timings)
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
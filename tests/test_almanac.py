@@ -0,0 +1,75 @@
+"""panchanga_calendar() against PanchangaEngine and across civil-day boundaries."""
+
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from birthchart.almanac import LIMBS, panchanga_calendar
+from birthchart.panchanga import PanchangaEngine, datetime_to_jd
+
+SECOND = 1.0 / 86400
+HYDERABAD = (17.385, 78.4867, "Asia/Kolkata")
+NEW_YORK = (40.7128, -74.0060, "America/New_York")
+
+# PanchangaResult fields holding each limb's end
+END_FIELD = {"tithi": "tithi_end", "nakshatra": "nakshatra_end", "yoga": "yoga_end", "karana": "karana_end"}
+
+
+@pytest.fixture(scope="module")
+def hyderabad_days():
+    return list(panchanga_calendar(date(2026, 1, 1), date(2026, 2, 15), *HYDERABAD))
+
+
+def unique_spans(days, limb):
+    """Every span of ``limb`` over ``days`` once, in order."""
+    spans = []
+    for day in days:
+        for span in getattr(day, limb):
+            if not spans or span != spans[-1]:
+                spans.append(span)
+    return spans
+
+
+@pytest.mark.parametrize("limb", LIMBS)
+def test_span_ends_match_engine(hyderabad_days, limb):
+    for span in unique_spans(hyderabad_days, limb):
+        start, end = datetime_to_jd(span.start), datetime_to_jd(span.end)
+        result = PanchangaEngine((start + end) / 2).solve()
+        assert getattr(result, limb) == span.index, span
+        # Span times are rounded to the second
+        assert abs(getattr(result, END_FIELD[limb]) - end) < 1.5 * SECOND, span
+
+
+@pytest.mark.parametrize("limb", LIMBS)
+def test_spans_are_contiguous(hyderabad_days, limb):
+    spans = unique_spans(hyderabad_days, limb)
+    count = {"tithi": 30, "nakshatra": 27, "yoga": 27, "karana": 60}[limb]
+    for before, after in zip(spans, spans[1:]):
+        assert after.start == before.end, (before, after)
+        assert after.index == (before.index + 1) % count, (before, after)
+    for day, nxt in zip(hyderabad_days, hyderabad_days[1:]):
+        # The span running at midnight closes one day and opens the next
+        assert getattr(day, limb)[-1] == getattr(nxt, limb)[0], day.date
+
+
+def test_midnights_across_dst_change():
+    lat, lon, tz_string = NEW_YORK
+    zone = ZoneInfo(tz_string)
+    days = list(panchanga_calendar(date(2026, 3, 1), date(2026, 3, 31), lat, lon, tz_string))
+    assert [day.date for day in days] == [date(2026, 3, 1) + timedelta(days=n) for n in range(31)]
+    for day in days:
+        midnight = datetime(day.date.year, day.date.month, day.date.day, tzinfo=zone)
+        following = day.date + timedelta(days=1)
+        next_midnight = datetime(following.year, following.month, following.day, tzinfo=zone)
+        length = next_midnight.astimezone(timezone.utc) - midnight.astimezone(timezone.utc)
+        assert length.total_seconds() == (82800 if day.date == date(2026, 3, 8) else 86400)
+        for limb in LIMBS:
+            spans = getattr(day, limb)
+            assert spans[0].start <= midnight < spans[0].end, (day.date, limb)
+            assert spans[-1].start < next_midnight <= spans[-1].end, (day.date, limb)
+            assert all(span.start < next_midnight and span.end > midnight for span in spans), (day.date, limb)
+        # 2026-03-08 02:00 EST becomes 03:00 EDT
+        offset = -4 if day.date >= date(2026, 3, 8) else -5
+        assert day.sunrise.date() == day.date
+        assert day.sunrise.utcoffset() == timedelta(hours=offset), day.date
@@ -0,0 +1,119 @@
+"""batch.compute_charts() and classify() against the per-chart path."""
+
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from birthchart.chart import POSITION_ORDER, ZODIAC, compute_chart, get_sign_and_abs, utc_offset_at
+from birthchart.panchanga import (
+    KARANA_SEQUENCE, KARANA_SPAN, MOON_MEAN_SPEED, NAKSHATRA_SPAN, PADA_SPAN, SUN_MEAN_SPEED, TITHI_SPAN,
+    YOGA_NAMES, SunMoonCache, compute_karana, compute_yoga, solve_karana_yoga_end, solve_nakshatra_end,
+    solve_tithi_end,
+)
+
+np = pytest.importorskip("numpy")
+from birthchart.batch import PLANETS, classify, compute_charts  # noqa: E402  (needs numpy)
+
+NEW_YORK = (40.71, -74.01, "America/New_York")
+KOLKATA = (22.57, 88.36, "Asia/Kolkata")
+
+
+def per_chart(local, lat, lon, tz, current_offset):
+    """compute_chart() for one record, with a lookup that gives ``current_offset`` as the zone's."""
+    return compute_chart("", f"{local:%Y-%m-%d}", f"{local:%H:%M:%S}", tz,
+                         lambda city: (lat, lon, current_offset, tz))
+
+
+@pytest.mark.parametrize("local, place, offset", [
+    (datetime(1990, 1, 15, 12, 0), NEW_YORK, -5.0),
+    (datetime(1990, 7, 15, 12, 0), NEW_YORK, -4.0),
+    (datetime(1943, 5, 1, 6, 30), KOLKATA, 6.5),        # war time
+    (datetime(1985, 7, 14, 10, 25, 30), KOLKATA, 5.5),
+    (datetime(2091, 7, 1, 9, 0), NEW_YORK, -4.0),         # DST rules continue past 2037
+    (datetime(1901, 3, 1, 9, 0), KOLKATA, (5 * 3600 + 21 * 60 + 10) / 3600),   # Madras time
+])
+def test_birth_time_offset(local, place, offset):
+    assert utc_offset_at(place[2], local) == offset
+    batch = compute_charts([(local, *place)])
+    # Whatever the zone's offset is today, the chart uses the one at the birth
+    for current_offset in (-4.0, -5.0, 5.5):
+        result = per_chart(local, *place, current_offset)
+        assert result.utc_offset == offset
+        assert result.jd_ut == pytest.approx(batch["jd_ut"][0], abs=1e-8)
+
+
+class LinearCache(SunMoonCache):
+    """Sun and Moon at given longitudes at ``jd0``, moving at their mean speeds."""
+
+    def __init__(self, jd0, sun, moon):
+        super().__init__()
+        self.jd0, self.sun, self.moon_lon = jd0, sun, moon
+
+    def sample(self, jd_ut):
+        days = jd_ut - self.jd0
+        return ((self.sun + SUN_MEAN_SPEED * days) % 360, (self.moon_lon + MOON_MEAN_SPEED * days) % 360,
+                SUN_MEAN_SPEED, MOON_MEAN_SPEED)
+
+
+def edges(span):
+    """Every multiple of ``span`` in 0-360 and the doubles just either side of it."""
+    out = []
+    for k in range(round(360 / span) + 1):
+        x = k * span
+        out += [math.nextafter(x, -math.inf), x, math.nextafter(x, math.inf)]
+    return [x for x in out if 0 <= x < 360]
+
+
+def boundary_rows():
+    """(sun, moon) pairs putting one of the limbs on or next to a boundary."""
+    rng = random.Random(3)
+    rows = []
+    for moon in edges(30.0) + edges(NAKSHATRA_SPAN) + edges(PADA_SPAN):
+        rows.append((rng.uniform(0, 360), moon))
+    for angle in edges(TITHI_SPAN) + edges(KARANA_SPAN):       # Moon - Sun
+        sun = rng.uniform(0, 360)
+        rows.append((sun, (sun + angle) % 360))
+    for angle in edges(NAKSHATRA_SPAN):                         # Moon + Sun
+        sun = rng.uniform(0, 360)
+        rows.append((sun, (angle - sun) % 360))
+    return rows
+
+
+def test_classify_matches_scalar_path_on_boundaries():
+    rows = boundary_rows()
+    longitudes = np.array([[sun, moon] + [moon] * 8 for sun, moon in rows])
+    batch = classify(longitudes)
+    jd0 = 2451545.0
+    for i, (sun, moon) in enumerate(rows):
+        cache = LinearCache(jd0, sun, moon)
+        nakshatra = solve_nakshatra_end(jd0, cache=cache)
+        tithi = solve_tithi_end(jd0, cache=cache)
+        karana_yoga = solve_karana_yoga_end(jd0, cache)
+        assert [get_sign_and_abs(lon)[2] for lon in longitudes[i]] == \
+            [ZODIAC[s] for s in batch["signs"][i]]
+        assert (batch["nakshatra"][i], batch["pada"][i]) == (nakshatra.nakshatra, nakshatra.pada), (sun, moon)
+        assert batch["tithi"][i] == tithi.tithi, (sun, moon)
+        assert (batch["karana"][i], batch["yoga"][i]) == (karana_yoga.karana, karana_yoga.yoga), (sun, moon)
+        assert KARANA_SEQUENCE[batch["karana"][i]] == compute_karana(moon, sun)
+        assert YOGA_NAMES[batch["yoga"][i]] == compute_yoga(moon, sun)
+
+
+def test_compute_charts_matches_compute_chart():
+    rng = random.Random(5)
+    places = [(17.385, 78.4867, "Asia/Kolkata"), (40.71, -74.01, "America/New_York"),
+              (51.51, -0.13, "Europe/London"), (-33.87, 151.21, "Australia/Sydney")]
+    records = [(datetime(1900, 1, 2) + timedelta(seconds=rng.randrange(200 * 365 * 86400)), *rng.choice(places))
+               for _ in range(150)]
+    batch = compute_charts(records)
+    assert list(PLANETS) == list(POSITION_ORDER)
+    for i, (local, lat, lon, tz) in enumerate(records):
+        result = per_chart(local, lat, lon, tz, 0.0)
+        assert result.jd_ut == pytest.approx(batch["jd_ut"][i], abs=1e-8)
+        for planet, a, b in zip(PLANETS, result.longitudes, batch["longitudes"][i]):
+            assert abs((a - b + 180) % 360 - 180) < 1e-6, planet
+        assert [get_sign_and_abs(x)[2] for x in result.longitudes] == \
+            [get_sign_and_abs(x)[2] for x in batch["longitudes"][i]]
+        assert (result.nakshatra, result.pada, result.tithi, result.karana, result.yoga) == (
+            batch["nakshatra"][i], batch["pada"][i], batch["tithi"][i], batch["karana"][i], batch["yoga"][i])
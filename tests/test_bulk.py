@@ -0,0 +1,90 @@
+"""bulk.run(): resuming after a crash, with failed records retried."""
+
+import csv
+import json
+
+import pytest
+
+from birthchart import bulk
+
+RECORDS = [
+    ("Ravi", "1985-07-14", "10:25:30", 17.385, 78.4867, "Asia/Kolkata"),
+    ("Sita", "1990-01-01", "06:00:00", 16.5062, 80.648, "Asia/Kolkata"),
+    ("Ann", "1969-07-20", "20:17:40", 40.71, -74.01, "America/New_York"),
+    ("Tom", "2001-02-03", "04:05:06", 51.51, -0.13, "Europe/London"),
+    ("Uma", "1950-12-31", "23:59:59", 17.385, 78.4867, "Asia/Kolkata"),
+    ("Hari", "2020-06-15", "12:00:00", -33.87, 151.21, "Australia/Sydney"),
+]
+
+
+def write_source(path, broken=()):
+    """The records as CSV; ids in ``broken`` get a timezone that doesn't exist, so they fail."""
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["id", "name", "dob", "tob", "city", "lat", "lon", "tz"])
+        for i, (name, dob, tob, lat, lon, tz) in enumerate(RECORDS, 1):
+            writer.writerow([i, name, dob, tob, "-", lat, lon, "Nowhere/Lost" if str(i) in broken else tz])
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def run(source, out, **kwargs):
+    return bulk.run(str(source), str(out), workers=1, log=None, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def clean(tmp_path_factory):
+    """{id: line} of an uninterrupted run."""
+    tmp = tmp_path_factory.mktemp("clean")
+    write_source(tmp / "records.csv")
+    summary = run(tmp / "records.csv", tmp / "charts.jsonl")
+    assert summary["errors"] == 0
+    return {line["id"]: line for line in read_output(tmp / "charts.jsonl")}
+
+
+def test_resume_after_crash_retries_failures(tmp_path, clean):
+    source, out = tmp_path / "records.csv", tmp_path / "charts.jsonl"
+    write_source(source, broken={"2", "5"})
+    summary = run(source, out)
+    assert summary["errors"] == 2
+
+    # Crash: the last line is only half written
+    data = out.read_bytes()
+    lines = data.splitlines(keepends=True)
+    torn = b"".join(lines[:-1]) + lines[-1][:len(lines[-1]) // 2]
+    out.write_bytes(torn)
+    kept = {line["id"] for line in map(json.loads, lines[:-1]) if "error" not in line}
+
+    # The transient failure is gone by the time the run is resumed
+    write_source(source)
+    summary = run(source, out, resume=True)
+    assert summary["skipped"] == len(kept)
+    assert summary["records"] == len(RECORDS) - len(kept)
+    assert summary["errors"] == 0
+
+    output = read_output(out)
+    assert sorted(line["id"] for line in output) == sorted(clean)     # one line per id, no errors
+    for line in output:
+        assert line == clean[line["id"]]
+    assert out.read_bytes().startswith(b"".join(l for l in lines[:-1] if b'"error"' not in l))
+
+
+def test_resume_keeps_lasting_failures_once(tmp_path):
+    source, out = tmp_path / "records.csv", tmp_path / "charts.jsonl"
+    write_source(source, broken={"3"})
+    run(source, out)
+    summary = run(source, out, resume=True)
+    assert (summary["skipped"], summary["records"], summary["errors"]) == (len(RECORDS) - 1, 1, 1)
+    output = read_output(out)
+    assert len(output) == len(RECORDS)
+    assert [line["id"] for line in output if "error" in line] == ["3"]
+
+
+def test_resume_of_missing_output_runs_everything(tmp_path):
+    source, out = tmp_path / "records.csv", tmp_path / "charts.jsonl"
+    write_source(source)
+    summary = run(source, out, resume=True)
+    assert (summary["skipped"], summary["records"]) == (0, len(RECORDS))
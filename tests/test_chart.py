@@ -0,0 +1,79 @@
+"""ChartResult.pack()/unpack() and write_results()/read_results() round trips."""
+
+import io
+
+import pytest
+
+from birthchart.chart import RESULTS_MAGIC, ChartResult, compute_chart, read_results, write_results
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode
+
+FIELDS = ("name", "dob", "tob", "place", "lat", "lon", "utc_offset", "tz_string", "jd_ut",
+          "tithi", "tithi_end", "nakshatra", "pada", "pada_end", "karana", "karana_end",
+          "yoga", "yoga_end", "ayanamsa")
+
+BIRTHS = [
+    ("Ravi", "1985-07-14", "10:25:30", "Hyderabad", (17.385, 78.4867, 5.5, "Asia/Kolkata")),
+    ("Śrī Lakṣmī", "1900-01-01", "00:00:00", "Tiruvannāmalai", (12.23, 79.07, 5.5, "Asia/Kolkata")),
+    ("", "2099-12-31", "23:59:59", "London", (51.51, -0.13, 0.0, "Europe/London")),
+    ("O'Neil", "1969-07-20", "20:17:40", "New York", (40.71, -74.01, -4.0, "America/New_York")),
+]
+
+
+def charts(ephemeris=None):
+    return [compute_chart(name, dob, tob, city, lambda city, geo=geo: geo, ephemeris=ephemeris)
+            for name, dob, tob, city, geo in BIRTHS]
+
+
+def assert_same(a, b):
+    for field in FIELDS:
+        assert getattr(a, field) == getattr(b, field), field
+    assert list(a.longitudes) == list(b.longitudes)
+    assert a.key == b.key
+    assert a.as_json() == b.as_json()
+
+
+@pytest.mark.parametrize("ayanamsa", ["lahiri", "raman"])
+def test_pack_unpack_round_trip(ayanamsa):
+    for result in charts(EphemerisContext(ayanamsa_mode(ayanamsa))):
+        assert_same(ChartResult.unpack(result.pack()), result)
+
+
+def test_unpack_from_walks_concatenated_records():
+    results = charts()
+    buffer = memoryview(b"".join(r.pack() for r in results))
+    offset = 0
+    for result in results:
+        unpacked, offset = ChartResult.unpack_from(buffer, offset)
+        assert_same(unpacked, result)
+    assert offset == len(buffer)
+
+
+def test_write_read_results_round_trip():
+    results = charts()
+    fh = io.BytesIO()
+    assert write_results(fh, results) == len(results)
+    fh.seek(0)
+    read = list(read_results(fh))
+    assert len(read) == len(results)
+    for a, b in zip(read, results):
+        assert_same(a, b)
+
+
+def test_read_results_empty_stream():
+    fh = io.BytesIO()
+    assert write_results(fh, []) == 0
+    fh.seek(0)
+    assert list(read_results(fh)) == []
+
+
+def test_read_results_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(read_results(io.BytesIO(b"PK\x03\x04 not a results file")))
+
+
+def test_read_results_rejects_truncated_record():
+    fh = io.BytesIO()
+    write_results(fh, charts()[:2])
+    data = fh.getvalue()
+    with pytest.raises(ValueError):
+        list(read_results(io.BytesIO(data[:len(RESULTS_MAGIC) + 40])))
@@ -0,0 +1,69 @@
+"""Chebyshev tables built into a temporary file, checked against Swiss Ephemeris."""
+
+import random
+
+import pytest
+import swisseph as swe
+
+from birthchart import chebyshev
+from birthchart.chebyshev import LAYOUT, ChebyshevEphemeris, build, calc_lon
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode, default_context
+
+START, END = 2461041.5, 2461406.5       # 2026
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    path = tmp_path_factory.mktemp("chebyshev") / "ephemeris.bin"
+    errors = build(str(path), start_jd=START, end_jd=END)
+    eph = ChebyshevEphemeris(str(path))
+    yield eph, errors
+    eph.close()
+
+
+@pytest.fixture
+def installed(tables, monkeypatch):
+    """The built tables in place of the bundled ones, for calc_lon()."""
+    monkeypatch.setattr(chebyshev, "_default", tables[0])
+    return tables[0]
+
+
+def separation_arcsec(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0) * 3600.0
+
+
+def test_stored_bound_is_the_measured_one(tables):
+    eph, errors = tables
+    assert set(errors) == set(LAYOUT)
+    for body, worst in errors.items():
+        assert eph.max_error_arcsec(body) == worst
+        assert worst < 10.0
+
+
+@pytest.mark.parametrize("body", list(LAYOUT), ids=swe.get_planet_name)
+def test_calc_lon_within_stored_bound(installed, body):
+    ctx = default_context()
+    rng = random.Random(body)
+    bound = installed.max_error_arcsec(body) + 1e-9
+    for _ in range(300):
+        jd = rng.uniform(START, END)
+        assert installed.covers(jd, body)
+        assert separation_arcsec(calc_lon(jd, body), ctx.sidereal_lon(jd, body)) <= bound
+
+
+def test_speed_matches_swiss_ephemeris(installed):
+    ctx = default_context()
+    for jd in (START + 0.3, START + 100.7, END - 5.1):
+        for body in LAYOUT:
+            assert installed.position(jd, body)[1] == pytest.approx(ctx.sidereal(jd, body)[1], abs=1e-4)
+
+
+def test_calc_lon_falls_back_outside_the_tables(installed):
+    ctx = default_context()
+    jd = START - 400.0
+    assert not installed.covers(jd, swe.SATURN)
+    assert calc_lon(jd, swe.SATURN) == ctx.sidereal_lon(jd, swe.SATURN)
+    # Tables fitted for Lahiri are not used for another ayanamsa
+    raman = EphemerisContext(ayanamsa_mode("raman"))
+    jd = START + 10.0
+    assert calc_lon(jd, swe.SATURN, raman) == raman.sidereal_lon(jd, swe.SATURN)
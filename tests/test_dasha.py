@@ -0,0 +1,107 @@
+"""Vimshottari dasha: current() against the periods() walk, and current_dashas() against current()."""
+
+import random
+
+import pytest
+
+from birthchart.dasha import (
+    CYCLE_YEARS, LEVELS, LORDS, YEAR_DAYS, YEARS, balance, birth_lord, current, current_dashas, periods,
+)
+from birthchart.panchanga import NAKSHATRA_SPAN
+
+CYCLE = CYCLE_YEARS * YEAR_DAYS
+
+
+def births(n, seed):
+    """(Moon longitude, UT Julian day) pairs, 1900-2100."""
+    rng = random.Random(seed)
+    return [(rng.uniform(0, 360), rng.uniform(2415021.0, 2488069.0)) for _ in range(n)]
+
+
+def containing(moon, jd_birth, jd, depth):
+    """The depth-``depth`` Period containing ``jd``, found by walking periods()."""
+    for period in periods(moon, jd_birth, depth, start=jd_birth - CYCLE):
+        if period.start <= jd < period.end:
+            return period
+    raise AssertionError("no period contains jd")
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_current_matches_periods(depth):
+    rng = random.Random(depth)
+    for moon, jd_birth in births(40, depth):
+        jd = jd_birth + rng.uniform(0, 2 * CYCLE)        # into the second cycle as well
+        found = current(moon, jd_birth, jd, depth)
+        assert len(found) == depth
+        expected = containing(moon, jd_birth, jd, depth)
+        assert found[-1].lords == expected.lords
+        assert found[-1].start == pytest.approx(expected.start, abs=1e-6)
+        assert found[-1].end == pytest.approx(expected.end, abs=1e-6)
+        for outer, inner in zip(found, found[1:]):
+            assert inner.lords[:-1] == outer.lords
+            assert outer.start - 1e-6 <= inner.start < inner.end <= outer.end + 1e-6
+
+
+def test_current_at_period_boundaries():
+    moon, jd_birth = 100.0, 2446261.0
+    for period in periods(moon, jd_birth, 2, start=jd_birth, end=jd_birth + 40 * YEAR_DAYS):
+        found = current(moon, jd_birth, period.start + 1e-6, 2)
+        assert found[-1].lords == period.lords
+
+
+def test_periods_are_contiguous_and_fill_the_cycle():
+    for moon, jd_birth in births(10, 7):
+        for depth in (1, 2, 3):
+            listed = list(periods(moon, jd_birth, depth))
+            assert len(listed) <= 9 ** depth
+            assert listed[0].start <= jd_birth < listed[0].end
+            for a, b in zip(listed, listed[1:]):
+                assert b.start == pytest.approx(a.end, abs=1e-6)
+            lord = birth_lord(moon)
+            assert listed[-1].end == pytest.approx(current(moon, jd_birth, jd_birth)[0].start + CYCLE,
+                                                  abs=1e-6)
+            assert listed[0].lords[0] == LORDS[lord]
+
+
+def test_periods_window():
+    moon, jd_birth = 250.0, 2446261.0
+    start, end = jd_birth + 30 * YEAR_DAYS, jd_birth + 31 * YEAR_DAYS
+    window = list(periods(moon, jd_birth, 3, start=start, end=end))
+    assert window[0].start <= start < window[0].end
+    assert window[-1].start < end <= window[-1].end
+    everything = list(periods(moon, jd_birth, 3, start=jd_birth - CYCLE, end=jd_birth + CYCLE))
+    assert window == [p for p in everything if p.end > start and p.start < end]
+
+
+def test_balance():
+    lord, days = balance(0.0)
+    assert (lord, days) == ("Ketu", YEARS[0] * YEAR_DAYS)
+    lord, days = balance(NAKSHATRA_SPAN * 1.5)                 # halfway through Bharani
+    assert lord == "Venus" and days == pytest.approx(YEARS[1] * YEAR_DAYS / 2)
+    maha = current(NAKSHATRA_SPAN * 1.5, 2446261.0, 2446261.0, 1)[0]
+    assert maha.end - 2446261.0 == pytest.approx(days)
+
+
+def test_current_errors():
+    moon, jd_birth = 100.0, 2446261.0
+    with pytest.raises(ValueError):
+        current(moon, jd_birth, jd_birth - CYCLE)
+    with pytest.raises(ValueError):
+        current(moon, jd_birth, jd_birth, depth=len(LEVELS) + 1)
+    with pytest.raises(ValueError):
+        next(periods(moon, jd_birth, depth=0))
+
+
+def test_current_dashas_matches_current():
+    np = pytest.importorskip("numpy")
+    pairs = births(200, 11)
+    rng = random.Random(12)
+    moons = np.array([moon for moon, _ in pairs])
+    jd_births = np.array([jd for _, jd in pairs])
+    jds = jd_births + np.array([rng.uniform(0, 2 * CYCLE) for _ in pairs])
+    out = current_dashas(moons, jd_births, jds, depth=4)
+    for i, (moon, jd_birth) in enumerate(pairs):
+        for level, period in enumerate(current(moon, jd_birth, jds[i], 4)):
+            assert LORDS[out["lords"][i, level]] == period.lords[-1]
+            assert out["start"][i, level] == pytest.approx(period.start, abs=1e-6)
+            assert out["end"][i, level] == pytest.approx(period.end, abs=1e-6)
@@ -0,0 +1,36 @@
+"""EphemerisContext under concurrency: charts in several ayanamsas computed on a thread pool."""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from birthchart.chart import compute_chart
+from birthchart.ephemeris import EphemerisContext, ayanamsa_mode
+
+AYANAMSAS = ("lahiri", "raman", "krishnamurti", "fagan_bradley", "yukteshwar")
+PLACES = [(17.385, 78.4867, 5.5, "Asia/Kolkata"), (51.51, -0.13, 0.0, "Europe/London"),
+          (40.71, -74.01, -5.0, "America/New_York"), (-33.87, 151.21, 10.0, "Australia/Sydney")]
+
+
+def births(n, seed):
+    rng = random.Random(seed)
+    return [(f"{rng.randint(1900, 2099)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+             rng.choice(PLACES)) for _ in range(n)]
+
+
+def record(mode, birth):
+    dob, tob, geo = birth
+    return compute_chart("", dob, tob, geo[3], lambda city: geo, ephemeris=EphemerisContext(mode)).pack()
+
+
+def test_threads_match_serial_reference():
+    modes = [ayanamsa_mode(name) for name in AYANAMSAS]
+    tasks = [(mode, birth) for mode in modes for birth in births(12, 0)]
+    reference = {task: record(*task) for task in tasks}
+    assert len({reference[(mode, tasks[0][1])] for mode in modes}) == len(modes)   # ayanamsas differ
+
+    shuffled = tasks * 3
+    random.Random(1).shuffle(shuffled)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        records = list(pool.map(lambda task: record(*task), shuffled))
+    assert [r == reference[task] for task, r in zip(shuffled, records)] == [True] * len(shuffled)
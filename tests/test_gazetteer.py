@@ -0,0 +1,105 @@
+"""Gazetteer: build, round trip and prefix lookup against a full scan."""
+
+import csv
+import random
+
+import pytest
+
+from birthchart.gazetteer import (
+    TOP_RECORDS, TOP_THRESHOLD, City, Gazetteer, build, normalize_name, read_csv,
+)
+
+FIELDS = ["name", "alternate_names", "country", "lat", "lon", "tz"]
+
+NAMED = [
+    ("Hyderabad", ["Bhagyanagar"], "IN", 17.385, 78.4867, "Asia/Kolkata"),
+    ("São Paulo", ["Sao Paulo", "Sampa"], "BR", -23.5505, -46.6333, "America/Sao_Paulo"),
+    ("Zürich", ["Zurich"], "CH", 47.3769, 8.5417, "Europe/Zurich"),
+    ("Straße", [], "DE", 52.0, 13.0, "Europe/Berlin"),
+    ("Ōsaka", [], "JP", 34.6937, 135.5023, "Asia/Tokyo"),
+    ("Saint-Étienne", ["St Etienne"], "FR", 45.4397, 4.3872, "Europe/Paris"),
+    ("Hyderabad", [], "PK", 25.396, 68.3578, "Asia/Karachi"),
+]
+
+
+def synthetic_rows(n, seed):
+    """Enough cities under "sa", "san" and "sant" to give those prefixes top lists."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        stem = rng.choice(["San", "Santa", "Santo", "Sal", "Sam"])
+        name = f"{stem} {rng.choice(['Cruz', 'José', 'Marí', 'Ana'])} {i}"
+        alt = [f"Sa{i:03d}"] if rng.random() < 0.3 else []
+        rows.append((name, alt, "XX", rng.uniform(-60, 60), rng.uniform(-180, 180), "UTC"))
+    return rows
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return NAMED + synthetic_rows(400, seed=3)
+
+
+@pytest.fixture(scope="module")
+def gazetteer(rows, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("gazetteer")
+    source = directory / "cities.csv"
+    with open(source, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        for name, alt, country, lat, lon, tz in rows:
+            writer.writerow([name, "|".join(alt), country, repr(lat), repr(lon), tz])
+    path = str(directory / "cities.bin")
+    assert build(read_csv(str(source)), path) == (len(rows), sum(
+        len({normalize_name(n) for n in [row[0]] + row[1]}) for row in rows))
+    gaz = Gazetteer(path)
+    yield gaz
+    gaz.close()
+
+
+def full_scan(rows, text, limit):
+    """The first ``limit`` rows with any name starting with ``text``, in build order."""
+    key = normalize_name(text)
+    return [City(name, country, lat, lon, tz)
+            for name, alt, country, lat, lon, tz in rows
+            if any(normalize_name(n).startswith(key) for n in [name] + alt)][:limit]
+
+
+def test_round_trip(rows, gazetteer):
+    assert len(gazetteer) == len(rows)
+    for idx, (name, alt, country, lat, lon, tz) in enumerate(rows):
+        assert gazetteer._record(idx) == City(name, country, lat, lon, tz)
+        for alias in [name] + alt:
+            assert City(name, country, lat, lon, tz) in gazetteer.find(alias)
+
+
+def test_find_folds_accents_and_case(gazetteer):
+    assert [c.country for c in gazetteer.find("HYDERABAD")] == ["IN", "PK"]
+    assert gazetteer.find("sao paulo")[0].name == "São Paulo"
+    assert gazetteer.find("ZURICH")[0].name == "Zürich"
+    assert gazetteer.find("strasse")[0].name == "Straße"
+    assert gazetteer.find("osaka")[0].name == "Ōsaka"
+    assert gazetteer.lookup("Hyderabad, PK").country == "PK"
+
+
+@pytest.mark.parametrize("text", ["Zü", "zu", "SÃO", "são p", "Saint-É", "saint e", "STRAS", "ōs", "hy"])
+def test_prefix_folds_accents_and_case(rows, gazetteer, text):
+    assert gazetteer.prefix(text) == full_scan(rows, text, 10)
+    assert gazetteer.prefix(text)
+
+
+@pytest.mark.parametrize("text", ["s", "sa", "San", "SANT", "santa", "sal", "sam", "sa0"])
+@pytest.mark.parametrize("limit", [1, 10, TOP_RECORDS, TOP_RECORDS + 8])
+def test_prefix_matches_full_scan(rows, gazetteer, text, limit):
+    assert gazetteer.prefix(text, limit) == full_scan(rows, text, limit)
+
+
+def test_top_lists_are_stored(rows, gazetteer):
+    for text in ["s", "sa", "san", "sant"]:
+        key = normalize_name(text)
+        matching = sum(1 for row in rows for n in {normalize_name(n) for n in [row[0]] + row[1]}
+                       if n.startswith(key))
+        assert matching > TOP_THRESHOLD
+        top = gazetteer._top_records(key.encode("utf-8"))
+        assert top is not None, text
+        assert [gazetteer._record(idx) for idx in top] == full_scan(rows, text, TOP_RECORDS)
+    assert gazetteer._top_records(b"hy") is None
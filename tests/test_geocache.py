@@ -0,0 +1,115 @@
+"""GeoCache: TTL expiry, LRU eviction, stats counters and name prefixes."""
+
+import pytest
+
+from birthchart import geocache
+from birthchart.geocache import GeoCache
+
+HYDERABAD = (17.385, 78.4867, "Asia/Kolkata")
+ROME = (41.9, 12.5, "Europe/Rome")
+
+
+class Clock:
+    """Stands in for the time module inside geocache."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(geocache, "time", clock)
+    return clock
+
+
+def test_memory_then_disk_then_miss(tmp_path, clock):
+    path = str(tmp_path / "geocache.sqlite")
+    cache = GeoCache(path)
+    cache.put("Hyderabad", *HYDERABAD)
+    assert cache.get("  HYDERABAD ") == HYDERABAD
+    assert cache.get("Rome") is None
+    cache.close()
+
+    reopened = GeoCache(path)
+    assert reopened.get("hyderabad") == HYDERABAD       # from disk, then remembered
+    assert reopened.get("Hyderabad") == HYDERABAD
+    assert reopened.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "evictions": 0}
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1, "evictions": 0}
+    reopened.close()
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_entries_expire_after_ttl(tmp_path, clock, on_disk):
+    cache = GeoCache(str(tmp_path / "geocache.sqlite") if on_disk else None, ttl=100)
+    cache.put("Hyderabad", *HYDERABAD)
+    clock.now += 99
+    assert cache.get("Hyderabad") == HYDERABAD
+    assert [name for name, *_ in cache.prefix("hyd")] == (["Hyderabad"] if on_disk else [])
+    clock.now += 1
+    assert cache.get("Hyderabad") is None
+    assert cache.prefix("hyd") == []
+    assert cache.stats["misses"] == 1
+    cache.put("Hyderabad", *HYDERABAD)      # a fresh put restarts the clock
+    clock.now += 99
+    assert cache.get("Hyderabad") == HYDERABAD
+    cache.close()
+
+
+def test_expired_rows_are_evicted_on_put(tmp_path, clock):
+    path = str(tmp_path / "geocache.sqlite")
+    cache = GeoCache(path, ttl=100)
+    cache.put("Hyderabad", *HYDERABAD)
+    clock.now += 100
+    cache.put("Rome", *ROME)
+    assert cache.stats["evictions"] == 1
+    cache.close()
+    assert GeoCache(path, ttl=10 ** 9).get("Hyderabad") is None
+
+
+def test_memory_lru_eviction(clock):
+    cache = GeoCache(memory_entries=2)
+    cache.put("Hyderabad", *HYDERABAD)
+    cache.put("Rome", *ROME)
+    assert cache.get("Hyderabad") == HYDERABAD      # Rome is now least recently used
+    cache.put("Paris", 48.86, 2.35, "Europe/Paris")
+    assert cache.stats["evictions"] == 1
+    assert cache.get("Rome") is None
+    assert cache.get("Hyderabad") == HYDERABAD
+    assert cache.get("Paris") == (48.86, 2.35, "Europe/Paris")
+    assert cache.stats == {"memory_hits": 3, "disk_hits": 0, "misses": 1, "evictions": 1}
+
+
+def test_memory_eviction_falls_back_to_disk(tmp_path, clock):
+    cache = GeoCache(str(tmp_path / "geocache.sqlite"), memory_entries=1)
+    cache.put("Hyderabad", *HYDERABAD)
+    cache.put("Rome", *ROME)
+    assert cache.get("Hyderabad") == HYDERABAD
+    assert cache.stats == {"memory_hits": 0, "disk_hits": 1, "misses": 0, "evictions": 2}
+    cache.close()
+
+
+def test_disk_lru_eviction(tmp_path, clock):
+    cache = GeoCache(str(tmp_path / "geocache.sqlite"), memory_entries=1, disk_entries=2)
+    cache.put("Hyderabad", *HYDERABAD)
+    clock.now += 1
+    cache.put("Rome", *ROME)
+    clock.now += 1
+    assert cache.get("Hyderabad") == HYDERABAD      # from disk; Rome is now least recently accessed
+    clock.now += 1
+    cache.put("Paris", 48.86, 2.35, "Europe/Paris")
+    assert sorted(name for text in "hpr" for name, *_ in cache.prefix(text)) == ["Hyderabad", "Paris"]
+    cache.close()
+
+
+def test_prefix_includes_names_outside_the_bmp(tmp_path):
+    cache = GeoCache(str(tmp_path / "geocache.sqlite"))
+    cache.put("Ra\U00020000pur", 1.0, 2.0, "Asia/Kolkata")
+    cache.put("Rampur", 28.8, 79.0, "Asia/Kolkata")
+    cache.put("Rome", 41.9, 12.5, "Europe/Rome")
+    assert [name for name, *_ in cache.prefix("ra")] == ["Rampur", "Ra\U00020000pur"]
+    assert [name for name, *_ in cache.prefix("ra\U00020000")] == ["Ra\U00020000pur"]
+    cache.close()
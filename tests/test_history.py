@@ -0,0 +1,93 @@
+"""ChartHistory.search(): folded name prefixes, date and place filters, order and limit."""
+
+import itertools
+
+import pytest
+
+from birthchart import history as history_module
+from birthchart.chart import ChartResult, chart_key, compute_chart
+from birthchart.history import ChartHistory
+
+HYDERABAD = (17.385, 78.4867, 5.5, "Asia/Kolkata")
+
+# (name, dob, place) in the order they are saved
+CHARTS = [
+    ("Ravi Kumar", "1985-07-14", "Hyderabad"),
+    ("ravi", "1990-01-01", "Chennai"),
+    ("Rāvī Shankar", "1970-04-07", "Varanasi"),
+    ("Ravindra", "1985-07-14", "Hyderabad"),
+    ("Raghav", "1985-07-14", "Chennai"),
+    ("Gravity", "2000-02-02", "Hyderabad"),
+    ("O'Neil", "1969-07-20", "New York"),
+    ("Ra\U00020000", "1999-09-09", "Hyderabad"),     # a name character outside the BMP
+]
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(history_module.time, "time", lambda: float(next(clock)))
+    base = compute_chart("", "1985-07-14", "10:25:30", "Hyderabad", lambda city: HYDERABAD).pack()
+    history = ChartHistory(str(tmp_path / "history.sqlite"))
+    for name, dob, place in CHARTS:
+        result = ChartResult.unpack(base)
+        result.name, result.dob, result.place = name, dob, place
+        history.put(result)
+    yield history
+    history.close()
+
+
+def names(entries):
+    return [entry.name for entry in entries]
+
+
+def test_prefix_folds_case_and_accents(history):
+    assert set(names(history.search("RAV"))) == {"Ravi Kumar", "ravi", "Rāvī Shankar", "Ravindra"}
+    assert names(history.search("ravi")) == names(history.search("Rāvī"))
+
+
+def test_prefix_matches_only_the_start(history):
+    assert "Gravity" not in names(history.search("rav"))
+    assert names(history.search("ravi k")) == ["Ravi Kumar"]
+    assert names(history.search("ravi  kumar ")) == ["Ravi Kumar"]
+    assert names(history.search("ravindra x")) == []
+    assert names(history.search("o neil")) == ["O'Neil"]
+    assert names(history.search("o'n")) == ["O'Neil"]
+
+
+def test_prefix_includes_names_outside_the_bmp(history):
+    assert "Ra\U00020000" in names(history.search("ra"))
+    assert names(history.search("ra\U00020000")) == ["Ra\U00020000"]
+
+
+def test_ordered_by_folded_name_then_birth_date(history):
+    entries = history.search("r")
+    assert names(entries) == ["Raghav", "ravi", "Ravi Kumar", "Rāvī Shankar", "Ravindra", "Ra\U00020000"]
+
+
+def test_date_and_place_filters(history):
+    assert names(history.search("ra", dob="1985-07-14")) == ["Raghav", "Ravi Kumar", "Ravindra"]
+    assert names(history.search("ra", place=" hyderabad ")) == ["Ravi Kumar", "Ravindra", "Ra\U00020000"]
+    assert names(history.search("ra", dob="1985-07-14", place="Chennai")) == ["Raghav"]
+    assert names(history.search(dob="1985-07-14")) == ["Raghav", "Ravi Kumar", "Ravindra"]
+    assert names(history.search(place="new york")) == ["O'Neil"]
+
+
+def test_limit(history):
+    assert names(history.search("r", limit=2)) == ["Raghav", "ravi"]
+
+
+def test_no_criteria_lists_most_recent_first(history):
+    expected = [name for name, _, _ in reversed(CHARTS)]
+    assert names(history.search()) == expected
+    assert names(history.search("  ")) == expected
+    assert names(history.recent(limit=3)) == expected[:3]
+
+
+def test_saving_again_refreshes_instead_of_duplicating(history):
+    entry, = history.search("gravity")
+    result = history.load(entry.id)
+    assert history.get(chart_key("Gravity", "2000-02-02", "10:25:30", "HYDERABAD")).name == "Gravity"
+    assert history.put(result) == entry.id
+    assert len(history) == len(CHARTS)
+    assert names(history.recent(limit=1)) == ["Gravity"]
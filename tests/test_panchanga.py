@@ -0,0 +1,103 @@
+"""Boundary solver against brute-force bisection and against the chart's own positions."""
+
+import random
+
+import pytest
+import swisseph as swe
+
+from birthchart.chart import sidereal_positions, solve_chart
+from birthchart.ephemeris import EphemerisContext, default_context
+from birthchart.panchanga import (
+    KARANA_SPAN, NAKSHATRA_SPAN, PADA_SPAN, TITHI_SPAN, YOGA_SPAN, PanchangaEngine,
+)
+
+SECOND = 1.0 / 86400
+LAT, LON = 17.385, 78.4867
+
+
+def births(n, seed):
+    rng = random.Random(seed)
+    return [rng.uniform(2415021.0, 2488069.0) for _ in range(n)]      # 1900-2100
+
+
+def angles(ctx, jd):
+    """Tithi, nakshatra, yoga and karana angles at ``jd`` from FLG_SIDEREAL positions."""
+    sun = ctx.sidereal(jd, swe.SUN)[0]
+    moon = ctx.sidereal(jd, swe.MOON)[0]
+    return {"tithi": (moon - sun) % 360, "karana": (moon - sun) % 360, "pada": moon,
+            "nakshatra": moon, "yoga": (moon + sun) % 360}
+
+
+SPANS = {"tithi": TITHI_SPAN, "karana": KARANA_SPAN, "pada": PADA_SPAN,
+         "nakshatra": NAKSHATRA_SPAN, "yoga": YOGA_SPAN}
+
+
+def brute_force_end(ctx, limb, jd):
+    """First instant after ``jd`` the limb's index changes: hourly steps, then bisection."""
+    span = SPANS[limb]
+    index = int(angles(ctx, jd)[limb] // span)
+    lo = jd
+    hi = jd + 1 / 24
+    while int(angles(ctx, hi)[limb] // span) == index:
+        lo, hi = hi, hi + 1 / 24
+    while hi - lo > 0.01 * SECOND:
+        mid = (lo + hi) / 2
+        if int(angles(ctx, mid)[limb] // span) == index:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+@pytest.mark.parametrize("jd", births(40, 3))
+def test_ends_match_bisection(jd):
+    ctx = default_context()
+    result = PanchangaEngine(jd, ctx).solve()
+    ends = {"tithi": result.tithi_end, "karana": result.karana_end, "pada": result.pada_end,
+            "nakshatra": result.nakshatra_end, "yoga": result.yoga_end}
+    for limb, end in ends.items():
+        assert abs(end - brute_force_end(ctx, limb, jd)) < SECOND, limb
+
+
+def test_ends_with_other_ayanamsa():
+    ctx = EphemerisContext(swe.SIDM_RAMAN)
+    for jd in births(10, 4):
+        result = PanchangaEngine(jd, ctx).solve()
+        assert abs(result.nakshatra_end - brute_force_end(ctx, "nakshatra", jd)) < SECOND
+        assert abs(result.yoga_end - brute_force_end(ctx, "yoga", jd)) < SECOND
+
+
+def chart_indices(positions):
+    moon, sun = positions["Moon"], positions["Sun"]
+    return {"tithi": int((moon - sun) % 360 // TITHI_SPAN), "karana": int((moon - sun) % 360 // KARANA_SPAN),
+            "yoga": int((moon + sun) % 360 // YOGA_SPAN), "nakshatra": int(moon // NAKSHATRA_SPAN),
+            "pada": int(moon // PADA_SPAN)}
+
+
+@pytest.mark.parametrize("jd", births(100, 5))
+def test_chart_ends_against_chart_positions(jd):
+    """Each limb a chart shows is the one its positions fall in, and changes at its end time."""
+    positions = sidereal_positions(jd, LAT, LON)
+    result = solve_chart("Test", "2000-01-01", "00:00:00", "Hyderabad", LAT, LON, 5.5, jd,
+                         positions, "Asia/Kolkata")
+    now = chart_indices(positions)
+    assert (result.tithi, result.karana, result.yoga, result.nakshatra) == \
+        (now["tithi"], now["karana"], now["yoga"], now["nakshatra"])
+
+    ends = {"tithi": result.tithi_end, "karana": result.karana_end, "yoga": result.yoga_end,
+            "pada": result.pada_end}
+    for limb, end in ends.items():
+        assert chart_indices(sidereal_positions(end - SECOND, LAT, LON))[limb] == now[limb], limb
+        assert chart_indices(sidereal_positions(end + SECOND, LAT, LON))[limb] != now[limb], limb
+
+
+def test_chart_just_before_yoga_end():
+    """A chart 20 s before its yoga ends still shows that yoga."""
+    for jd in births(20, 6):
+        end = PanchangaEngine(jd).karana_yoga().yoga_end
+        birth = end - 20 * SECOND
+        positions = sidereal_positions(birth, LAT, LON)
+        result = solve_chart("Test", "2000-01-01", "00:00:00", "Hyderabad", LAT, LON, 5.5, birth,
+                             positions, "Asia/Kolkata")
+        assert result.yoga == chart_indices(positions)["yoga"]
+        assert abs(result.yoga_end - end) < SECOND
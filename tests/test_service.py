@@ -0,0 +1,105 @@
+"""ChartService.cached(): cache hits, coalescing of concurrent requests and failures."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from birthchart.chart import ChartResult
+from birthchart.service import ChartService
+
+
+# Jobs and the lookup run in the service's worker processes, so they are module-level functions
+
+def hyderabad(city):
+    return 17.385, 78.4867, 5.5, "Asia/Kolkata"
+
+
+def slow_token(delay):
+    """A value unique to this call, after ``delay`` seconds."""
+    time.sleep(delay)
+    return time.time_ns()
+
+
+def slow_failure(delay, message):
+    time.sleep(delay)
+    raise ValueError(message)
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = ChartService(workers=2, lookup=hyderabad, cache_entries=4)
+    yield service
+    service.close()
+
+
+def run(*calls):
+    """Start ``calls`` (coroutines) together and return their results, exceptions included."""
+    async def gather():
+        return await asyncio.gather(*calls, return_exceptions=True)
+    return asyncio.run(gather())
+
+
+def test_concurrent_requests_share_one_computation(service):
+    computed = service.stats["computed"]
+    results = run(*(service.cached("shared", slow_token, 0.3) for _ in range(5)))
+    values = {value for value, _ in results}
+    assert len(values) == 1
+    assert [how for _, how in results] == ["miss"] + ["coalesced"] * 4
+    assert service.stats["computed"] == computed + 1
+    assert not service._in_flight
+
+    (value, how), = run(service.cached("shared", slow_token, 0.3))
+    assert (value, how) == (values.pop(), "hit")
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached(service):
+    computed = service.stats["computed"]
+    results = run(*(service.cached("failing", slow_failure, 0.3, "no such city") for _ in range(3)))
+    assert all(isinstance(r, ValueError) and str(r) == "no such city" for r in results)
+    assert service.stats["computed"] == computed
+    assert "failing" not in service._cache
+    assert not service._in_flight
+
+    # The next request for the key computes again rather than replaying the failure
+    (value, how), = run(service.cached("failing", slow_token, 0))
+    assert how == "miss"
+
+
+def test_cancelled_waiter_does_not_cancel_the_computation(service):
+    async def scenario():
+        first = asyncio.ensure_future(service.cached("cancelled", slow_token, 0.3))
+        second = asyncio.ensure_future(service.cached("cancelled", slow_token, 0.3))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        value, how = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return value, how
+
+    value, how = asyncio.run(scenario())
+    assert how == "coalesced"
+    assert service._cache["cancelled"] == value
+
+
+def test_cache_evicts_least_recently_used(service):
+    keys = [f"lru{i}" for i in range(5)]
+    for key in keys[:4] + [keys[0], keys[4]]:   # keys[0] again: now the most recently used
+        run(service.cached(key, slow_token, 0))
+    assert keys[0] in service._cache
+    assert keys[1] not in service._cache
+    assert len(service._cache) == service.cache_entries
+
+
+def test_chart_endpoint(service):
+    params = {"name": "Ravi", "dob": "1985-07-14", "tob": "10:25:30", "city": "Hyderabad"}
+    first, second = run(service.chart(params),
+                        service.chart(dict(params, name=" Ravi", tob="10:25:30 ", city="hyderabad")))
+    assert first[0] == "application/json"
+    assert {first[2], second[2]} == {"miss", "coalesced"}     # same normalized key
+    assert first[1] == second[1]
+    body = json.loads(first[1])
+    assert body["name"] == "Ravi" and body["tz"] == "Asia/Kolkata"
+    packed, _ = service._cache[next(k for k in service._cache if k[0] == "chart")]
+    assert ChartResult.unpack(packed).name == "Ravi"
@@ -0,0 +1,55 @@
+"""transits.crossings() against a brute-force scan of the same longitudes."""
+
+import math
+
+import pytest
+
+from birthchart.panchanga import NAKSHATRA_SPAN
+from birthchart.transits import SIGN_SPAN, crossings, graha_position, next_ingress
+
+SCAN_STEP = 0.05        # days
+JD_1990 = 2447892.5
+
+
+def scan(graha, jd_start, jd_end, span):
+    """(jd, from, to) of every index change between samples SCAN_STEP apart."""
+    count = round(360 / span)
+    changes = []
+    jd = jd_start
+    index = math.floor(graha_position(graha, jd)[0] / span) % count
+    while jd < jd_end:
+        nxt = min(jd + SCAN_STEP, jd_end)
+        new = math.floor(graha_position(graha, nxt)[0] / span) % count
+        if new != index:
+            changes.append((nxt, index, new))
+        jd, index = nxt, new
+    return changes
+
+
+@pytest.mark.parametrize("graha, years, span", [
+    ("Mercury", 20, SIGN_SPAN),
+    ("Venus", 20, SIGN_SPAN),
+    ("Mars", 30, SIGN_SPAN),
+    ("Moon", 2, NAKSHATRA_SPAN),
+])
+def test_crossings_match_scan(graha, years, span):
+    jd_end = JD_1990 + years * 365.25
+    found = list(crossings(graha, JD_1990, jd_end, span))
+    expected = scan(graha, JD_1990, jd_end, span)
+    assert len(found) == len(expected)
+    for transit, (jd, before, after) in zip(found, expected):
+        assert (transit.from_index, transit.to_index) == (before, after)
+        assert jd - SCAN_STEP <= transit.jd_ut <= jd
+        lon, speed = graha_position(graha, transit.jd_ut)
+        assert transit.retrograde == (speed < 0)
+        boundary = (before if transit.retrograde else after) * span
+        assert abs((lon - boundary + 180) % 360 - 180) / abs(speed) < 1e-5     # days, about a second
+    if graha != "Moon":
+        assert any(t.retrograde for t in found)
+
+
+def test_next_ingress():
+    transit = next_ingress("Saturn", "Pisces", JD_1990)
+    assert transit.to_index == 11
+    assert graha_position("Saturn", transit.jd_ut - 1)[0] // SIGN_SPAN != 11
+    assert graha_position("Saturn", transit.jd_ut + 1)[0] // SIGN_SPAN == 11